@@ -0,0 +1,160 @@
+"""
+Catálogo de bases (estado/UF/base/siglas) com índices imutáveis montados uma vez no import.
+
+Índices: estado -> UF, UF -> estado, base -> Base (estado, UF, siglas), nome normalizado
+(names.name_key, sem acento/caixa) -> Base, sigla -> bases, e busca por prefixo de qualquer
+palavra do nome para autocomplete. As listas de opções dos selectbox (com o "" inicial) já
+ficam prontas em tuplas.
+
+Fonte: bases.py, ou um JSON externo (novas bases sem deploy; lido no início do processo):
+  - CCR_BASES_FILE, ou runtime_dir()/bases.json se existir
+Formato:
+    {
+      "estados": {"Acre": "AC", ...},
+      "bases": {"Acre": ["Base Acre", {"nome": "Base Rio Branco", "sigla_cielo": "RBR", "sigla_geral": "RBR"}]}
+    }
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+import bases
+import settings
+from names import name_key
+
+
+class Base(NamedTuple):
+    nome: str
+    estado: str
+    uf: str
+    sigla_cielo: str = ""
+    sigla_geral: str = ""
+
+
+def _parse_base(item: Any, estado: str, uf: str) -> Base:
+    if isinstance(item, str):
+        return Base(item.strip(), estado, uf)
+    return Base(
+        str(item["nome"]).strip(),
+        estado,
+        uf,
+        str(item.get("sigla_cielo") or "").strip().upper(),
+        str(item.get("sigla_geral") or "").strip().upper(),
+    )
+
+
+class BaseCatalog:
+    """Índices somente leitura sobre as bases; monte uma vez e compartilhe."""
+
+    def __init__(self, estado_para_uf: Mapping[str, str], bases_por_estado: Mapping[str, Sequence[Any]]) -> None:
+        by_name: Dict[str, Base] = {}
+        by_key: Dict[str, Base] = {}
+        by_sigla: Dict[str, List[Base]] = {}
+        per_estado: Dict[str, Tuple[Base, ...]] = {}
+        for estado, items in bases_por_estado.items():
+            uf = estado_para_uf.get(estado)
+            if not uf:
+                raise ValueError(f"Estado sem UF no catálogo de bases: {estado!r}")
+            parsed = tuple(_parse_base(it, estado, uf) for it in items)
+            per_estado[estado] = parsed
+            for b in parsed:
+                if b.nome in by_name:
+                    raise ValueError(f"Base duplicada no catálogo: {b.nome!r}")
+                by_name[b.nome] = b
+                by_key.setdefault(name_key(b.nome), b)
+                for sigla in {b.sigla_cielo, b.sigla_geral} - {""}:
+                    by_sigla.setdefault(sigla, []).append(b)
+
+        self.estados: Tuple[str, ...] = tuple(per_estado)
+        self.ufs: Tuple[str, ...] = tuple(sorted(set(estado_para_uf.values())))
+        self.estado_options: Tuple[str, ...] = ("",) + self.estados
+        self._uf_by_estado = MappingProxyType(dict(estado_para_uf))
+        self._estado_by_uf = MappingProxyType({uf: e for e, uf in estado_para_uf.items()})
+        self._bases_by_estado = MappingProxyType(per_estado)
+        self._base_options = MappingProxyType(
+            {e: ("",) + tuple(b.nome for b in bs) for e, bs in per_estado.items()}
+        )
+        self._by_name = MappingProxyType(by_name)
+        self._by_key = MappingProxyType(by_key)
+        self._by_sigla = MappingProxyType({s: tuple(bs) for s, bs in by_sigla.items()})
+
+        # Prefixo de qualquer palavra: "base fedex sao paulo" também entra como "fedex sao paulo",
+        # "sao paulo" e "paulo"; a busca é um bisect na lista ordenada
+        prefixes: List[Tuple[str, str]] = []
+        for b in by_name.values():
+            words = name_key(b.nome).split()
+            prefixes.extend((" ".join(words[i:]), b.nome) for i in range(len(words)))
+        prefixes.sort()
+        self._prefix_keys: Tuple[str, ...] = tuple(k for k, _ in prefixes)
+        self._prefix_names: Tuple[str, ...] = tuple(n for _, n in prefixes)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def uf(self, estado: str) -> str:
+        return self._uf_by_estado.get(estado, "")
+
+    def estado(self, uf: str) -> str:
+        return self._estado_by_uf.get((uf or "").strip().upper(), "")
+
+    def bases(self, estado: str) -> Tuple[Base, ...]:
+        return self._bases_by_estado.get(estado, ())
+
+    def base_options(self, estado: str) -> Tuple[str, ...]:
+        """Opções do selectbox de base (com "" inicial); só ("",) se o estado não existir."""
+        return self._base_options.get(estado, ("",))
+
+    def get(self, nome: str) -> Optional[Base]:
+        """Base pelo nome exato ou normalizado ("base fedex sao luis" acha "Base Fedex São Luís")."""
+        b = self._by_name.get(nome)
+        if b is None and nome:
+            b = self._by_key.get(name_key(nome))
+        return b
+
+    def by_sigla(self, sigla: str) -> Tuple[Base, ...]:
+        return self._by_sigla.get((sigla or "").strip().upper(), ())
+
+    def is_base_in_estado(self, nome: str, estado: str) -> bool:
+        b = self._by_name.get(nome)
+        return b is not None and b.estado == estado
+
+    def search(self, prefix: str, limit: int = 20) -> List[Base]:
+        """Autocomplete: bases com alguma palavra começando por prefix (sem acento/caixa)."""
+        key = name_key(prefix)
+        if not key:
+            return []
+        out: List[Base] = []
+        seen: Set[str] = set()
+        i = bisect.bisect_left(self._prefix_keys, key)
+        while i < len(self._prefix_keys) and self._prefix_keys[i].startswith(key) and len(out) < limit:
+            nome = self._prefix_names[i]
+            if nome not in seen:
+                seen.add(nome)
+                out.append(self._by_name[nome])
+            i += 1
+        return out
+
+
+def catalog_file() -> Optional[Path]:
+    p = os.environ.get("CCR_BASES_FILE", "").strip()
+    if p:
+        return Path(p).expanduser()
+    default = settings.runtime_dir() / "bases.json"
+    return default if default.exists() else None
+
+
+def load_catalog(path: Optional[Path] = None) -> BaseCatalog:
+    """Catálogo do JSON (path, CCR_BASES_FILE ou runtime_dir()/bases.json) ou de bases.py."""
+    path = path or catalog_file()
+    if path is None:
+        return BaseCatalog(bases.ESTADO_PARA_UF, bases.BASES_POR_ESTADO)
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return BaseCatalog(data.get("estados") or bases.ESTADO_PARA_UF, data["bases"])
+
+
+CATALOG = load_catalog()
@@ -0,0 +1,228 @@
+"""
+Validação em lote (vetorizada com NumPy) de colunas de CPF, CNPJ, telefone, CEP e datas.
+
+Complementa validators.py (um valor por vez) para importações e revalidação em massa: cada
+função recebe uma coluna (lista, array NumPy ou pandas Series) e devolve um ColumnCheck com
+os valores normalizados e a máscara de erro por linha (True = inválido).
+
+Ao contrário dos modelos, CPF e CNPJ são conferidos pelos dígitos verificadores (mod 11):
+documentos inválidos são barrados antes de chegar ao Brasil Risk.
+
+Exemplo:
+    masks = error_masks({"cpf": df["cpf"], "celular": df["celular"]}, {"cpf": "cpf", "celular": "phone"})
+    df[any_error(masks)]
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# DDDs em uso no Brasil (Anatel)
+VALID_DDD = frozenset({
+    11, 12, 13, 14, 15, 16, 17, 18, 19,
+    21, 22, 24, 27, 28,
+    31, 32, 33, 34, 35, 37, 38,
+    41, 42, 43, 44, 45, 46, 47, 48, 49,
+    51, 53, 54, 55,
+    61, 62, 63, 64, 65, 66, 67, 68, 69,
+    71, 73, 74, 75, 77, 79,
+    81, 82, 83, 84, 85, 86, 87, 88, 89,
+    91, 92, 93, 94, 95, 96, 97, 98, 99,
+})
+
+ERROR_MESSAGES: Dict[str, str] = {
+    "cpf": "CPF inválido (11 dígitos com dígitos verificadores corretos).",
+    "cnpj": "CNPJ inválido (14 dígitos com dígitos verificadores corretos).",
+    "phone": "Telefone inválido. Informe DDD válido + número (10 ou 11 dígitos, celular começando com 9).",
+    "cep": "CEP deve ter 8 dígitos.",
+    "date": "Data inválida. Use o formato dd/mm/aaaa.",
+}
+
+_DDD_OK = np.zeros(100, dtype=bool)
+_DDD_OK[sorted(VALID_DDD)] = True
+
+_CPF_W1 = np.arange(10, 1, -1)
+_CPF_W2 = np.arange(11, 1, -1)
+_CNPJ_W1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_CNPJ_W2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_ZERO, _NINE, _SLASH = ord("0"), ord("9"), ord("/")
+
+
+class ColumnCheck(NamedTuple):
+    values: np.ndarray    # normalizados (só dígitos / datetime64[D]); "" ou NaT onde inválido
+    invalid: np.ndarray   # bool por linha
+
+
+def _cell_bytes(x: Any) -> bytes:
+    if x is None or (isinstance(x, float) and x != x):  # None / NaN
+        return b""
+    if isinstance(x, float) and x.is_integer():
+        return str(int(x)).encode("ascii")  # Excel transforma CPF/telefone em número
+    if isinstance(x, bytes):
+        return x
+    return str(x).encode("utf-8")
+
+
+def _as_bytes(values: Iterable[Any]) -> np.ndarray:
+    """Coluna como array 'S' (bytes UTF-8 de largura fixa, preenchidos com NUL)."""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "S":
+        return values
+    if isinstance(values, np.ndarray) and values.dtype.kind == "U":
+        return np.char.encode(values, "utf-8")
+    return np.array([_cell_bytes(x) for x in values], dtype=bytes)
+
+
+def _byte_matrix(raw: np.ndarray, min_width: int) -> np.ndarray:
+    """Array 'S' de N linhas -> matriz uint8 (N, largura >= min_width)."""
+    width = raw.dtype.itemsize
+    u8 = np.ascontiguousarray(raw).view(np.uint8).reshape(len(raw), width)
+    if width < min_width:
+        u8 = np.pad(u8, ((0, 0), (0, min_width - width)))
+    return u8
+
+
+def _digits(values: Iterable[Any], min_width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Remove os não dígitos de cada linha: (matriz de dígitos 0-9 alinhados à esquerda, contagem)."""
+    u8 = _byte_matrix(_as_bytes(values), min_width)
+    is_digit = (u8 >= _ZERO) & (u8 <= _NINE)
+    counts = is_digit.sum(axis=1)
+    pos = np.cumsum(is_digit, axis=1) - 1
+    out = np.zeros_like(u8)
+    r, c = np.nonzero(is_digit)
+    out[r, pos[r, c]] = u8[r, c] - _ZERO
+    return out, counts
+
+
+def _digit_strings(d: np.ndarray, counts: np.ndarray, keep: np.ndarray) -> np.ndarray:
+    """Matriz de dígitos -> array de str; linhas fora de keep viram ""."""
+    width = d.shape[1]
+    cols = np.arange(width)
+    chars = np.where((cols < counts[:, None]) & keep[:, None], d + _ZERO, 0).astype(np.uint8)
+    return np.ascontiguousarray(chars).view(f"S{width}").ravel().astype(str)
+
+
+def _empty(counts: np.ndarray, allow_empty: bool) -> np.ndarray:
+    return (counts == 0) if allow_empty else np.zeros(len(counts), dtype=bool)
+
+
+def only_digits(values: Iterable[Any]) -> np.ndarray:
+    """Versão em lote de validators.only_digits."""
+    d, counts = _digits(values, 1)
+    return _digit_strings(d, counts, np.ones(len(counts), dtype=bool))
+
+
+def check_exact_digits(values: Iterable[Any], n: int, allow_empty: bool = False) -> ColumnCheck:
+    d, counts = _digits(values, n)
+    empty = _empty(counts, allow_empty)
+    ok = counts == n
+    return ColumnCheck(_digit_strings(d, counts, ok), ~(ok | empty))
+
+
+def _mod11_cpf_dv(d: np.ndarray, w: np.ndarray) -> np.ndarray:
+    return (d[:, : len(w)] @ w) * 10 % 11 % 10
+
+
+def _mod11_cnpj_dv(d: np.ndarray, w: np.ndarray) -> np.ndarray:
+    r = (d[:, : len(w)] @ w) % 11
+    return np.where(r < 2, 0, 11 - r)
+
+
+def check_cpf(values: Iterable[Any], allow_empty: bool = False) -> ColumnCheck:
+    d, counts = _digits(values, 11)
+    m = d[:, :11].astype(np.int64)
+    ok = (
+        (counts == 11)
+        & (_mod11_cpf_dv(m, _CPF_W1) == m[:, 9])
+        & (_mod11_cpf_dv(m, _CPF_W2) == m[:, 10])
+        & ~(m == m[:, :1]).all(axis=1)  # 000.000.000-00, 111..., passam no mod 11
+    )
+    return ColumnCheck(_digit_strings(d, counts, ok), ~(ok | _empty(counts, allow_empty)))
+
+
+def check_cnpj(values: Iterable[Any], allow_empty: bool = False) -> ColumnCheck:
+    d, counts = _digits(values, 14)
+    m = d[:, :14].astype(np.int64)
+    ok = (
+        (counts == 14)
+        & (_mod11_cnpj_dv(m, _CNPJ_W1) == m[:, 12])
+        & (_mod11_cnpj_dv(m, _CNPJ_W2) == m[:, 13])
+        & ~(m == m[:, :1]).all(axis=1)
+    )
+    return ColumnCheck(_digit_strings(d, counts, ok), ~(ok | _empty(counts, allow_empty)))
+
+
+def check_phone(values: Iterable[Any], allow_empty: bool = False) -> ColumnCheck:
+    """DDD + número: 10 dígitos (fixo) ou 11 com o nono dígito 9 (celular)."""
+    d, counts = _digits(values, 11)
+    ddd = d[:, 0].astype(np.int64) * 10 + d[:, 1]
+    ok = (
+        ((counts == 10) | ((counts == 11) & (d[:, 2] == 9)))
+        & _DDD_OK[ddd]
+    )
+    return ColumnCheck(_digit_strings(d, counts, ok), ~(ok | _empty(counts, allow_empty)))
+
+
+def check_cep(values: Iterable[Any], allow_empty: bool = False) -> ColumnCheck:
+    d, counts = _digits(values, 8)
+    ok = (counts == 8) & d[:, :8].any(axis=1)  # 00000-000 não existe
+    return ColumnCheck(_digit_strings(d, counts, ok), ~(ok | _empty(counts, allow_empty)))
+
+
+def check_date_ddmmyyyy(values: Iterable[Any], allow_empty: bool = False) -> ColumnCheck:
+    """Datas dd/mm/aaaa (com zeros à esquerda); values sai como datetime64[D] (NaT se inválida)."""
+    raw = np.char.strip(_as_bytes(values))
+    lengths = np.char.str_len(raw)
+    u8 = _byte_matrix(raw, 10)[:, :10].astype(np.int64)
+    digit_cols = [0, 1, 3, 4, 6, 7, 8, 9]
+    shape_ok = (
+        (lengths == 10)
+        & (u8[:, 2] == _SLASH) & (u8[:, 5] == _SLASH)
+        & ((u8[:, digit_cols] >= _ZERO) & (u8[:, digit_cols] <= _NINE)).all(axis=1)
+    )
+    n = u8 - _ZERO
+    day = n[:, 0] * 10 + n[:, 1]
+    month = n[:, 3] * 10 + n[:, 4]
+    year = n[:, 6] * 1000 + n[:, 7] * 100 + n[:, 8] * 10 + n[:, 9]
+    month_ok = (month >= 1) & (month <= 12)
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    max_day = _DAYS_IN_MONTH[np.where(month_ok, month, 0)] + ((month == 2) & leap)
+    ok = shape_ok & month_ok & (year >= 1) & (day >= 1) & (day <= max_day)
+
+    out = np.full(len(raw), np.datetime64("NaT"), dtype="datetime64[D]")
+    months = (year[ok] - 1970) * 12 + (month[ok] - 1)
+    out[ok] = months.astype("datetime64[M]").astype("datetime64[D]") + (day[ok] - 1)
+    return ColumnCheck(out, ~(ok | _empty(lengths, allow_empty)))
+
+
+CHECKS = {
+    "cpf": check_cpf,
+    "cnpj": check_cnpj,
+    "phone": check_phone,
+    "cep": check_cep,
+    "date": check_date_ddmmyyyy,
+}
+
+
+def error_masks(
+    columns: Mapping[str, Iterable[Any]],
+    kinds: Mapping[str, str],
+    optional: Sequence[str] = (),
+) -> Dict[str, np.ndarray]:
+    """Máscara de erro por coluna. kinds: coluna -> "cpf" | "cnpj" | "phone" | "cep" | "date".
+
+    Colunas em optional aceitam vazio.
+    """
+    return {
+        col: CHECKS[kind](columns[col], allow_empty=col in optional).invalid
+        for col, kind in kinds.items()
+    }
+
+
+def any_error(masks: Mapping[str, np.ndarray]) -> np.ndarray:
+    """Linhas com erro em pelo menos uma coluna."""
+    masks = list(masks.values())
+    if not masks:
+        return np.zeros(0, dtype=bool)
+    return np.logical_or.reduce(masks)
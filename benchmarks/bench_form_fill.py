@@ -0,0 +1,120 @@
+"""
+Latência de preenchimento do Motorista/Criar contra fixtures/motorista_criar.html.
+
+Compara o preenchimento campo a campo (um fill/select_option por campo) com o lote único
+do form_fill, sem e com o catálogo de opções (rótulo -> value resolvido em Python). Cada iteração recarrega a página; o tempo medido é só o preenchimento.
+O catálogo é gravado num runtime temporário (CCR_RUNTIME_DIR), não no runtime real.
+
+Uso:
+    python benchmarks/bench_form_fill.py --iterations 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from playwright.async_api import Page, async_playwright  # noqa: E402
+
+import config  # noqa: E402
+from form_fill import DRIVER_FORM, _lookup  # noqa: E402
+from option_catalog import OptionCatalog  # noqa: E402
+
+FIXTURE = (ROOT / "fixtures" / "motorista_criar.html").as_uri()
+
+PAYLOAD: Dict[str, Any] = {
+    "dados_pessoais": {
+        "nome": "Maria da Silva", "genero": "Feminino", "data_nascimento": "01/02/1990",
+        "cpf": "52998224725", "rg": "123456789", "data_emissao": "10/10/2010", "orgao_exp": "SSP",
+        "nome_pai": "José da Silva", "nome_mae": "Ana da Silva",
+        "funcao": "Motorista", "perfil": "Agregado",
+    },
+    "centro_custos": {"empresa_centro_custo": "FEDEX", "responsavel_faturamento": "FEDEX BRASIL"},
+    "endereco": {
+        "cep": "01001000", "uf": "SP", "cidade": "São Paulo", "bairro": "Sé",
+        "logradouro": "Praça da Sé", "numero": "100", "complemento": "Sala 1",
+    },
+    "contato": {"telefone": "1133334444", "celular": "11999998888", "email": "maria@example.com"},
+    "habilitacao": {
+        "numero_registro": "01234567890", "cnh_no": "987654321", "categoria": "B",
+        "validade": "01/01/2030", "uf_cnh": "SP",
+    },
+}
+
+
+async def fill_per_field(page: Page, payload: Dict[str, Any]) -> None:
+    for path, selector, mapping in config.DRIVER_FORM_FIELDS:
+        value = _lookup(payload, tuple(path.split(".")))
+        if value in (None, ""):
+            continue
+        field = page.locator(selector)
+        if mapping == "label":
+            await field.select_option(label=str(value))
+        elif isinstance(mapping, dict):
+            await field.select_option(value=mapping[value])
+        else:
+            await field.fill(str(value))
+
+
+async def fill_batched(page: Page, payload: Dict[str, Any]) -> None:
+    await DRIVER_FORM.fill(page, payload)
+
+
+async def _measure(page: Page, fill: Callable[[Page, Dict[str, Any]], Any], iterations: int) -> List[float]:
+    out: List[float] = []
+    for _ in range(iterations):
+        await page.goto(FIXTURE)
+        t0 = time.perf_counter()
+        await fill(page, PAYLOAD)
+        out.append((time.perf_counter() - t0) * 1000)
+    # Confere que o formulário preenchido passa na validação da fixture
+    await page.locator(config.DRIVER_FORM_SUBMIT).first.click()
+    if not await page.locator("#resultado").is_visible():
+        errors = await page.locator(config.DRIVER_FORM_ERRORS).all_inner_texts()
+        raise SystemExit(f"{fill.__name__}: formulário inválido: {errors}")
+    return out
+
+
+def _report(name: str, ms: List[float]) -> None:
+    ms = sorted(ms)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{name:<16} mediana {statistics.median(ms):7.1f} ms   p95 {p95:7.1f} ms   ({len(ms)} forms)")
+
+
+async def main_async(iterations: int, headed: bool) -> None:
+    catalog = OptionCatalog("bench-fixture")
+
+    async def fill_batched_catalog(page: Page, payload: Dict[str, Any]) -> None:
+        await DRIVER_FORM.fill(page, payload, catalog)
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=not headed)
+        page = await browser.new_page()
+        await _measure(page, fill_batched, 3)  # aquecimento
+        _report("campo a campo", await _measure(page, fill_per_field, iterations))
+        _report("lote (evaluate)", await _measure(page, fill_batched, iterations))
+        _report("lote + catálogo", await _measure(page, fill_batched_catalog, iterations))
+        await browser.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark do preenchimento do Motorista/Criar.")
+    ap.add_argument("--iterations", type=int, default=30)
+    ap.add_argument("--headed", action="store_true")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["CCR_RUNTIME_DIR"] = tmp
+        asyncio.run(main_async(args.iterations, args.headed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Custo por chamada de validators.normalize_name: implementação antiga (re.split sem compilar,
+sem cache) x names.normalize_name com cache frio (nomes distintos) e quente (nomes repetidos).
+
+Uso:
+    python benchmarks/bench_names.py --calls 200000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import names  # noqa: E402
+
+FIRST = ["Maria", "JOSÉ", "ana", "João", "Francisca", "antônio", "Luiz", "Conceição", "Ana Clara", "Maria-Eduarda"]
+LAST = ["da Silva", "DOS SANTOS", "oliveira", "de Souza", "Pereira", "d'Ávila", "do Nascimento", "Lima"]
+CITIES = ["SÃO PAULO", "rio de janeiro", "Belo Horizonte", "CAMPINAS", "são josé dos campos", "Curitiba"]
+
+_LEGACY_LOWER_PARTS = {"da", "das", "de", "do", "dos", "e"}
+
+
+def legacy_normalize_name(name: str) -> str:
+    s = (name or "").strip()
+    if not s:
+        return s
+    parts = [p for p in re.split(r"\s+", s) if p]
+    out = []
+    for p in parts:
+        pl = p.lower()
+        if pl in _LEGACY_LOWER_PARTS:
+            out.append(pl)
+        else:
+            out.append(pl[:1].upper() + pl[1:])
+    return " ".join(out)
+
+
+def per_call_ns(fn: Callable[[str], str], inputs: List[str]) -> float:
+    t = time.perf_counter_ns()
+    for s in inputs:
+        fn(s)
+    return (time.perf_counter_ns() - t) / len(inputs)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200000)
+    args = ap.parse_args()
+
+    random.seed(1)
+    # Repetidos: o que o portal/modelos validam a cada rerun (nome, mãe, pai, cidade)
+    repeated = [
+        random.choice([f"{random.choice(FIRST)} {random.choice(LAST)}", random.choice(CITIES)])
+        for _ in range(args.calls)
+    ]
+    # Distintos: sufixo único por chamada, sempre erra o cache
+    distinct = [f"{random.choice(FIRST)} {random.choice(LAST)} {i}" for i in range(args.calls)]
+
+    print(f"{args.calls} chamadas, ns/chamada")
+    print(f"  legado (repetidos)           {per_call_ns(legacy_normalize_name, repeated):8.0f}")
+    names.cache_clear()
+    print(f"  names (repetidos, cache)     {per_call_ns(names.normalize_name, repeated):8.0f}")
+    print(f"  {names.cache_info()['normalize_name']}")
+    names.cache_clear()
+    print(f"  legado (distintos)           {per_call_ns(legacy_normalize_name, distinct):8.0f}")
+    print(f"  names (distintos, sem cache) {per_call_ns(names.normalize_name, distinct):8.0f}")
+    names.cache_clear()
+    print(f"  name_key (repetidos, cache)  {per_call_ns(names.name_key, repeated):8.0f}")
+
+
+if __name__ == "__main__":
+    main()
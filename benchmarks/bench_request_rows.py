@@ -0,0 +1,130 @@
+"""
+Memória das representações de requests numa listagem do admin.
+
+Popula um SQLite temporário com N requests sintéticas e compara o pico de memória
+(tracemalloc) de:
+  - dicts:     db.list_requests() (um dict por linha, com payload_json)
+  - summaries: todas as páginas de db.list_requests_page() (RequestSummary, sem payload)
+  - frame:     db.load_requests_frame() (colunar, status/base como category)
+  - dicts->df: pd.DataFrame(db.list_requests()), o caminho antigo da tela
+
+Uso:
+    python benchmarks/bench_request_rows.py --rows 50000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+BASES = [("SAO PAULO - SP", "SP"), ("CAMPINAS - SP", "SP"), ("RIO DE JANEIRO - RJ", "RJ"), ("CURITIBA - PR", "PR")]
+STATUSES = ["Aguardando", "Em andamento", "Concluído", "Erro"]
+NAMES = ["Maria", "José", "Ana", "João", "Francisca", "Antônio", "Silva", "Santos", "Oliveira", "Souza"]
+
+
+def _synthetic_batch(start: int, n: int, t0: datetime) -> List[Tuple[Dict[str, Any], Dict[str, Any], None]]:
+    out = []
+    for i in range(start, start + n):
+        base_nome, base_uf = random.choice(BASES)
+        nome = " ".join(random.sample(NAMES, 3))
+        cpf = f"{random.randrange(10**11):011d}"
+        payload = {
+            "base_nome": base_nome,
+            "base_uf": base_uf,
+            "modalidade": "Agregado",
+            "dados_pessoais": {"nome": nome, "cpf": cpf, "nome_mae": " ".join(random.sample(NAMES, 3))},
+            "endereco": {"cep": "01001000", "uf": base_uf, "cidade": "São Paulo", "logradouro": "Praça da Sé"},
+            "contato": {"celular": "11999998888", "email": "courier@example.com"},
+        }
+        meta = {
+            "request_id": f"BENCH{i:08d}",
+            "created_at": (t0 + timedelta(seconds=i)).isoformat(timespec="seconds"),
+            "request_type": "CADASTRO",
+            "role": random.choice(["Motorista", "Ajudante"]),
+            "has_vehicle": False,
+            "nome": nome,
+            "nome_padrao": nome.upper(),
+            "cpf": cpf,
+            "status_overall": random.choice(STATUSES),
+            "status_brasil_risk": random.choice(STATUSES),
+            "status_rlog_cielo": random.choice(STATUSES),
+            "status_rlog_geral": random.choice(STATUSES),
+            "status_bringg": random.choice(STATUSES),
+        }
+        out.append((meta, payload, None))
+    return out
+
+
+def _all_summaries(db: Any) -> List[Any]:
+    items: List[Any] = []
+    cursor = None
+    while True:
+        page = db.list_requests_page(cursor=cursor, limit=1000)
+        items.extend(page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            return items
+
+
+def measure(fn: Callable[[], Any]) -> Tuple[int, int, float]:
+    """(bytes retidos pelo resultado, pico durante a carga, segundos)."""
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak, elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20000)
+    args = ap.parse_args()
+
+    random.seed(1)
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["CCR_DB_PATH"] = str(Path(tmp.name) / "bench.db")
+    import db  # noqa: E402
+
+    db.init_db()
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for start in range(0, args.rows, 5000):
+        db.create_requests(_synthetic_batch(start, min(5000, args.rows - start), t0))
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "dicts": db.list_requests,
+        "summaries": lambda: _all_summaries(db),
+        "frame": db.load_requests_frame,
+        "dicts->df": lambda: pd.DataFrame(db.list_requests()),
+    }
+    print(f"{args.rows} requests")
+    print(f"{'representação':<12} {'retido MiB':>11} {'pico MiB':>9} {'B/linha':>8} {'tempo s':>8}")
+    for name, fn in cases.items():
+        retained, peak, elapsed = measure(fn)
+        print(
+            f"{name:<12} {retained / 2**20:>11.1f} {peak / 2**20:>9.1f} "
+            f"{retained / args.rows:>8.0f} {elapsed:>8.2f}"
+        )
+
+    db.close_connection()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Espelho local dos CPFs e placas já cadastrados no Brasil Risk.
+
+Lê as telas Motorista/Listar e Veiculo/Listar (config.DRIVER_LIST_URL / VEHICLE_LIST_URL),
+guarda as chaves em SQLite (db.br_mirror) e mantém um set em memória para consulta O(1)
+antes de despachar um job: courier que já está cadastrado não gasta um preenchimento.
+
+A atualização é incremental: as listagens vêm das mais recentes para as mais antigas, então
+a leitura para na primeira página sem nada novo. Uma vez por dia (ou com full=True) todas
+as páginas são relidas, para pegar o que tiver escapado, e o espelho é reconciliado: chaves
+que não aparecem mais (desativadas/excluídas no Brasil Risk) são removidas.
+
+A leitura completa só conta como completa com um sinal positivo de fim da lista (tabela
+de resultados sem linhas, ou paginador sem próxima página; seletores em config.LIST_*).
+Uma página vazia por erro, sessão ou render incompleto não apaga nada: sem o sinal, o
+espelho só recebe as chaves novas e a reconciliação fica para a próxima leitura.
+
+Overrides por env var:
+  - CCR_BR_MIRROR_REFRESH_S: intervalo da atualização incremental (padrão 30 min)
+  - CCR_BR_MIRROR_FULL_S: intervalo da releitura completa (padrão 24h)
+  - CCR_BR_MIRROR_MAX_PAGES: limite de páginas por leitura (padrão 500)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Pattern, Set, Tuple
+
+import config
+import db
+from br_session import is_auth_url
+from validators import normalize_cpf
+
+# Na listagem o CPF aparece com máscara; sem ela 11 dígitos podem ser um celular
+_RE_CPF = re.compile(r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b")
+# Placa antiga (ABC-1234) e Mercosul (ABC1D23)
+_RE_PLATE = re.compile(r"\b[A-Z]{3}-?\d[A-Z0-9]\d{2}\b")
+_RE_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+
+
+def normalize_plate(placa: str) -> str:
+    return _RE_NON_ALNUM.sub("", (placa or "").upper())
+
+
+KINDS: Dict[str, Tuple[str, Pattern[str], Any]] = {
+    "cpf": (config.DRIVER_LIST_URL, _RE_CPF, normalize_cpf),
+    "placa": (config.VEHICLE_LIST_URL, _RE_PLATE, normalize_plate),
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _age_s(iso: Optional[str]) -> float:
+    if not iso:
+        return float("inf")
+    return (datetime.now(timezone.utc) - datetime.fromisoformat(iso)).total_seconds()
+
+
+class MirrorRefreshFailed(RuntimeError):
+    pass
+
+
+class BrMirror:
+    def __init__(self) -> None:
+        self.refresh_s = _env_float("CCR_BR_MIRROR_REFRESH_S", 30 * 60)
+        self.full_s = _env_float("CCR_BR_MIRROR_FULL_S", 24 * 3600)
+        self.max_pages = int(_env_float("CCR_BR_MIRROR_MAX_PAGES", 500))
+        self._keys: Dict[str, Set[str]] = {kind: set() for kind in KINDS}
+        self._lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "checks": 0, "pages": 0, "added": 0, "removed": 0, "incomplete": 0}
+
+    def load(self) -> None:
+        for kind in KINDS:
+            self._keys[kind] = db.mirror_keys(kind)
+
+    def _has(self, kind: str, key: str) -> bool:
+        self.stats["checks"] += 1
+        found = bool(key) and key in self._keys[kind]
+        if found:
+            self.stats["hits"] += 1
+        return found
+
+    def has_cpf(self, cpf: str) -> bool:
+        return self._has("cpf", normalize_cpf(cpf))
+
+    def has_plate(self, placa: str) -> bool:
+        return self._has("placa", normalize_plate(placa))
+
+    def due(self, kind: str) -> Optional[bool]:
+        """None = em dia; False = incremental; True = releitura completa."""
+        state = db.get_mirror_state(kind)
+        if _age_s(state["full_refreshed_at"]) >= self.full_s:
+            return True
+        if _age_s(state["refreshed_at"]) >= self.refresh_s:
+            return False
+        return None
+
+    async def refresh(self, context: Any, kind: str, full: bool = False) -> int:
+        """Lê as páginas da listagem; retorna quantas chaves novas entraram no espelho."""
+        url, pattern, normalize = KINDS[kind]
+        added = 0
+        async with self._lock:
+            page = await context.new_page()
+            seen: Set[str] = set()
+            complete = False
+            try:
+                previous: Set[str] = set()
+                for n in range(1, self.max_pages + 1):
+                    await page.goto(url + config.LIST_PAGE_QUERY.format(page=n))
+                    if is_auth_url(page.url):
+                        raise MirrorRefreshFailed(f"Listagem redirecionou para login: {page.url}")
+                    if not await page.locator(config.LIST_TABLE).count():
+                        break  # erro/redirecionamento no meio da lista: incompleta
+                    text = await page.inner_text("body")
+                    self.stats["pages"] += 1
+                    keys = {normalize(m) for m in pattern.findall(text)}
+                    last = not await page.locator(config.LIST_NEXT_PAGE).count()
+                    if not keys:
+                        # Fim só se a tabela está mesmo vazia (linhas sem chave = tela mudou)
+                        complete = last and not await page.locator(config.LIST_ROWS).count()
+                        break
+                    if keys == previous:  # paginação ignorada: não dá para saber se acabou
+                        break
+                    previous = keys
+                    if full:
+                        seen |= keys  # gravado de uma vez na reconciliação
+                        if last:
+                            complete = True
+                            break
+                        continue
+                    new = keys - self._keys[kind]
+                    if not new:
+                        break
+                    added += await asyncio.to_thread(db.mirror_add, kind, new)
+                    self._keys[kind] |= new
+                    if last:
+                        break
+            finally:
+                await page.close()
+            if full:
+                # Só reconcilia com a lista inteira: uma leitura cortada (max_pages, página
+                # com erro) ou vazia apagaria chaves que continuam cadastradas
+                if complete and seen:
+                    added, removed = await asyncio.to_thread(db.mirror_reconcile, kind, seen)
+                    self._keys[kind] = seen
+                    self.stats["removed"] += removed
+                else:
+                    self.stats["incomplete"] += 1
+                    new = seen - self._keys[kind]
+                    if new:
+                        added = await asyncio.to_thread(db.mirror_add, kind, new)
+                        self._keys[kind] |= new
+            await asyncio.to_thread(db.set_mirror_refreshed, kind, full and complete)
+        self.stats["added"] += added
+        return added
+
+    async def refresh_due(self, context: Any) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for kind in KINDS:
+            full = await asyncio.to_thread(self.due, kind)
+            if full is not None:
+                out[kind] = await self.refresh(context, kind, full=full)
+        return out
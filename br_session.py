@@ -0,0 +1,222 @@
+"""
+Sessão do Brasil Risk reaproveitada entre execuções do worker.
+
+O storageState (cookies + localStorage) de cada tenant fica em runtime_dir()/sessions,
+junto com um .meta.json (quando foi salvo, estimativa de expiração, contadores).
+Antes de usar, a sessão é validada com um probe barato (GET sem seguir redirects); perto
+de expirar, é renovada proativamente pelo perfil persistente, em modo headless — o SSO
+do OKTA costuma devolver uma sessão nova sem interação. Só quando essa renovação
+silenciosa falha o worker abre o navegador e aguarda o login humano.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import config
+import settings
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def is_auth_url(url: str) -> bool:
+    u = url or ""
+    return any(h in u for h in config.OKTA_HOST_HINTS) or config.SAML_INTERMEDIATE_HINT in u
+
+
+def sessions_dir() -> Path:
+    return settings.runtime_dir() / "sessions"
+
+
+class SessionRefreshFailed(Exception):
+    """Nem a renovação silenciosa nem o login humano produziram uma sessão válida."""
+
+
+class SessionManager:
+    """Sessão autenticada de um tenant, compartilhada pelos contextos do worker pool.
+
+    Overrides por env var:
+      - CCR_BR_TENANT: nome do tenant (padrão "default")
+      - CCR_BR_SESSION_TTL_S: validade assumida quando os cookies não dizem (padrão 8h)
+      - CCR_BR_SESSION_REFRESH_MARGIN_S: renova quando faltar menos que isso (padrão 15 min)
+      - CCR_BR_SESSION_PROBE_S: intervalo entre probes de uma sessão em uso (padrão 5 min)
+    """
+
+    def __init__(
+        self,
+        tenant: Optional[str] = None,
+        probe_url: str = config.DRIVER_LIST_URL,
+        human_timeout_s: float = 900,
+    ) -> None:
+        self.tenant = tenant or os.environ.get("CCR_BR_TENANT", "default")
+        self.probe_url = probe_url
+        self.human_timeout_s = human_timeout_s
+        self.ttl_s = _env_float("CCR_BR_SESSION_TTL_S", 8 * 3600)
+        self.refresh_margin_s = _env_float("CCR_BR_SESSION_REFRESH_MARGIN_S", 15 * 60)
+        self.probe_interval_s = _env_float("CCR_BR_SESSION_PROBE_S", 5 * 60)
+
+        self._lock = asyncio.Lock()
+        self._validated_at = 0.0  # monotonic do último probe ok
+        self._meta: Dict[str, Any] = self._load_meta()
+        self.stats: Dict[str, float] = {
+            "hits": 0, "misses": 0, "probes": 0, "probe_failures": 0,
+            "silent_refreshes": 0, "human_refreshes": 0, "refresh_failures": 0,
+            "human_wait_s": 0.0,
+        }
+
+    # ---- arquivos ----
+
+    @property
+    def state_path(self) -> Path:
+        return sessions_dir() / f"{self.tenant}.json"
+
+    @property
+    def meta_path(self) -> Path:
+        return sessions_dir() / f"{self.tenant}.meta.json"
+
+    def _load_meta(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self) -> None:
+        sessions_dir().mkdir(parents=True, exist_ok=True)
+        self.meta_path.write_text(json.dumps(self._meta, indent=2), encoding="utf-8")
+
+    def _estimate_expiry(self, saved_at: float) -> float:
+        """Menor expiração entre os cookies persistentes do Brasil Risk, limitada pelo TTL."""
+        expires = saved_at + self.ttl_s
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return expires
+        for c in state.get("cookies", []):
+            exp = float(c.get("expires") or -1)
+            if exp > saved_at and "brasilrisk" in (c.get("domain") or ""):
+                expires = min(expires, exp)
+        return expires
+
+    # ---- estado ----
+
+    def expires_in(self) -> float:
+        if not self.state_path.exists():
+            return 0.0
+        return float(self._meta.get("expires_at", 0)) - time.time()
+
+    def invalidate(self) -> None:
+        """Marca a sessão como inválida (ex.: um job caiu no OKTA); a próxima ensure renova."""
+        self._meta["expires_at"] = 0
+        self._validated_at = 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        out = dict(self.stats)
+        uses = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / uses if uses else 0.0
+        out["expires_in_s"] = max(self.expires_in(), 0.0)
+        return out
+
+    # ---- probe / refresh ----
+
+    async def probe(self, browser: Any, state_path: Optional[Path] = None) -> bool:
+        """GET autenticado na probe_url sem seguir redirects: 200 = sessão válida."""
+        self.stats["probes"] += 1
+        ctx = await browser.new_context(storage_state=str(state_path or self.state_path))
+        try:
+            resp = await ctx.request.get(self.probe_url, max_redirects=0, fail_on_status_code=False)
+            location = resp.headers.get("location", "")
+            ok = resp.status == 200 and not is_auth_url(resp.url) and not is_auth_url(location)
+        except Exception:
+            ok = False
+        finally:
+            await ctx.close()
+        if not ok:
+            self.stats["probe_failures"] += 1
+        return ok
+
+    async def _login(self, pw: Any, browser: Any, headless: bool, timeout_s: float) -> bool:
+        """Abre o perfil persistente, vai ao BR_HOME e espera sair do OKTA/SAML.
+
+        O storageState novo é gravado ao lado e só substitui o atual se passar no probe:
+        uma renovação que volta sem sessão válida não estraga a que ainda vale.
+        """
+        settings.ensure_runtime_dirs()
+        sessions_dir().mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".new.json")
+        ctx = await pw.chromium.launch_persistent_context(str(settings.pw_profile_dir()), headless=headless)
+        try:
+            page = ctx.pages[0] if ctx.pages else await ctx.new_page()
+            await page.goto(config.BR_HOME)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout_s
+            while is_auth_url(page.url):
+                if loop.time() > deadline:
+                    return False
+                await asyncio.sleep(1)
+            await page.wait_for_load_state()
+            await ctx.storage_state(path=str(tmp_path))
+        finally:
+            await ctx.close()
+
+        if not await self.probe(browser, tmp_path):
+            tmp_path.unlink(missing_ok=True)
+            return False
+        os.replace(tmp_path, self.state_path)
+
+        saved_at = time.time()
+        self._meta.update({"tenant": self.tenant, "saved_at": saved_at, "expires_at": self._estimate_expiry(saved_at)})
+        self._save_meta()
+        self._validated_at = time.monotonic()
+        return True
+
+    async def refresh(self, pw: Any, browser: Any) -> None:
+        """Renova: primeiro silenciosamente (SSO), e só então com o humano no navegador.
+
+        Cada tentativa só conta como renovada se o storageState salvo passar no probe.
+        """
+        if await self._login(pw, browser, headless=True, timeout_s=20):
+            self.stats["silent_refreshes"] += 1
+            return
+        t0 = time.monotonic()
+        try:
+            ok = await self._login(pw, browser, headless=False, timeout_s=self.human_timeout_s)
+        finally:
+            self.stats["human_wait_s"] += time.monotonic() - t0
+        if not ok:
+            self.stats["refresh_failures"] += 1
+            raise SessionRefreshFailed("Login OKTA/SAML não concluído a tempo ou sessão recusada pelo probe.")
+        self.stats["human_refreshes"] += 1
+
+    async def ensure(self, pw: Any, browser: Any) -> Path:
+        """Retorna o caminho de um storageState válido, renovando quando necessário.
+
+        - longe de expirar e validada há pouco: retorna direto (sem I/O);
+        - senão, valida com probe; perto de expirar, tenta renovar em silêncio, mas se
+          não der continua usando a atual enquanto ela ainda vale;
+        - inválida: refresh completo (silencioso, depois humano).
+        """
+        async with self._lock:
+            remaining = self.expires_in()
+            if remaining > self.refresh_margin_s and time.monotonic() - self._validated_at < self.probe_interval_s:
+                self.stats["hits"] += 1
+                return self.state_path
+
+            if remaining > 0 and await self.probe(browser):
+                self._validated_at = time.monotonic()
+                if remaining <= self.refresh_margin_s and await self._login(pw, browser, headless=True, timeout_s=20):
+                    self.stats["silent_refreshes"] += 1
+                self.stats["hits"] += 1
+                return self.state_path
+
+            self.stats["misses"] += 1
+            await self.refresh(pw, browser)
+            return self.state_path
@@ -5,6 +5,14 @@ BR_HOME = "https://sistema.brasilrisk.com.br/"
 DRIVER_CREATE_URL = "https://br2.brasilrisk.com.br/Motorista/Criar"
 DRIVER_LIST_URL   = "https://br2.brasilrisk.com.br/Motorista/Listar"
 VEHICLE_LIST_URL  = "https://br2.brasilrisk.com.br/Veiculo/Listar"
+# Paginação das listagens (mais recentes primeiro); confirme o parâmetro na tela real
+LIST_PAGE_QUERY = "?pagina={page}"
+# Fim da lista só com sinal positivo: a tabela de resultados presente e sem linhas, ou o
+# paginador sem link para a próxima página. Página sem a tabela (erro, redirecionamento,
+# render incompleto) deixa a leitura incompleta.
+LIST_TABLE = "table.table"
+LIST_ROWS = "table.table tbody tr:not(.sem-registros)"
+LIST_NEXT_PAGE = ".pagination li:not(.disabled) a[rel='next'], .pagination li.next:not(.disabled) a"
 
 # Auth/captcha detection
 OKTA_HOST_HINTS = ("okta.com", "purpleid.okta.com")
@@ -39,3 +47,44 @@ PERFIL_TO_VALUE = {
 
 # Cost Center / Billing responsible: values vary per tenant.
 # For MVP we will select by visible label (recommended), but you can replace by numeric values if you prefer.
+
+# Motorista/Criar: payload (caminho com ".") -> campo do formulário -> tradução do valor.
+# Tradução: None = texto como está; dict = <option value> pelo rótulo; "label" = seleciona pelo rótulo visível.
+# Os name= seguem o HTML de exemplo da tela; confirme na tela real se algo mudar.
+DRIVER_FORM_FIELDS = (
+    ("dados_pessoais.nome",             '[name="Nome"]',                      None),
+    ("dados_pessoais.genero",           '[name="CodGenero"]',                 GENERO_TO_VALUE),
+    ("dados_pessoais.data_nascimento",  '[name="DataNascimento"]',            None),
+    ("dados_pessoais.cpf",              '[name="CPF"]',                       None),
+    ("dados_pessoais.rg",               '[name="RG"]',                        None),
+    ("dados_pessoais.data_emissao",     '[name="DataEmissaoRG"]',             None),
+    ("dados_pessoais.orgao_exp",        '[name="OrgaoExpedidor"]',            None),
+    ("dados_pessoais.nome_pai",         '[name="NomePai"]',                   None),
+    ("dados_pessoais.nome_mae",         '[name="NomeMae"]',                   None),
+    ("dados_pessoais.funcao",           '[name="CodMotoristaFuncao"]',        FUNCAO_TO_VALUE),
+    ("dados_pessoais.perfil",           '[name="CodMotoristaPerfil"]',        PERFIL_TO_VALUE),
+    ("centro_custos.empresa_centro_custo",    '[name="CodCentroCusto"]',             "label"),
+    ("centro_custos.responsavel_faturamento", '[name="CodResponsavelFaturamento"]',  "label"),
+    ("endereco.cep",                    '[name="CEP"]',                       None),
+    ("endereco.uf",                     '[name="UF"]',                        None),
+    ("endereco.cidade",                 '[name="Cidade"]',                    None),
+    ("endereco.bairro",                 '[name="Bairro"]',                    None),
+    ("endereco.logradouro",             '[name="Logradouro"]',                None),
+    ("endereco.numero",                 '[name="Numero"]',                    None),
+    ("endereco.complemento",            '[name="Complemento"]',               None),
+    ("contato.telefone",                '[name="Telefone"]',                  None),
+    ("contato.celular",                 '[name="Celular"]',                   None),
+    ("contato.telefone_comercial",      '[name="TelefoneComercial"]',         None),
+    ("contato.email",                   '[name="Email"]',                     None),
+    ("habilitacao.numero_registro",     '[name="CNHRegistro"]',               None),
+    ("habilitacao.cnh_no",              '[name="CNHNumero"]',                 None),
+    ("habilitacao.categoria",           '[name="CNHCategoria"]',              None),
+    ("habilitacao.validade",            '[name="CNHValidade"]',               None),
+    ("habilitacao.uf_cnh",              '[name="CNHUF"]',                     None),
+)
+# Campos cuja máscara/busca reage a eventos reais de teclado/foco (ex.: CEP preenche o
+# endereço no blur). Ficam fora do preenchimento em lote e recebem fill + Tab.
+DRIVER_FORM_NEEDS_EVENTS = frozenset({'[name="CEP"]'})
+DRIVER_FORM_SUBMIT = 'button[type="submit"], input[type="submit"]'
+# Erros de validação do ASP.NET MVC após o submit
+DRIVER_FORM_ERRORS = ".validation-summary-errors li, .field-validation-error"
@@ -2,16 +2,57 @@ from __future__ import annotations
 
 import json
 import os
+import random
+import re
 import sqlite3
-from datetime import datetime, timezone
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from ids import normalize_protocol_query
+from pagination import SUMMARY_COLUMNS, Page, build_page, decode_cursor, project_columns
+from request_cache import get_request_cache
+from submissions import SubmitInput, SubmitItem, SubmitResult, as_submit_items, new_idempotency_key
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar("T")
+
+_RE_WORD = re.compile(r"\w+")
+_RE_MASKED_DIGITS = re.compile(r"[\d.\-/]*\d[\d.\-/]*")
+_RE_NON_DIGITS = re.compile(r"\D+")
+
+# Tuning da conexão SQLite (portal e worker escrevem no mesmo arquivo)
+_BUSY_TIMEOUT_MS = 5000
+_CACHE_SIZE_KIB = 16384          # PRAGMA cache_size negativo = KiB
+_MMAP_SIZE = 64 * 1024 * 1024
+_STATEMENT_CACHE = 256           # statements preparados mantidos por conexão
+
+# Fila de jobs
+JOB_ACTIVE_STATUSES = ("PENDING", "QUEUED", "RUNNING", "BLOCKED")
+_JOB_LEASE_S = 300
+_JOB_BACKOFF_S = 30
+_JOB_BACKOFF_MAX_S = 1800
+
+# Retry em "database is locked" / "database is busy"
+_LOCK_RETRIES = 5
+_LOCK_BACKOFF_S = 0.05
+_LOCK_BACKOFF_MAX_S = 1.0
+
+_local = threading.local()
 
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 
+def _utc_iso_in(seconds: float) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat(timespec="seconds")
+
+
 def _default_db_path() -> Path:
     base = Path(__file__).resolve().parent
     return base / "data" / "app.db"
@@ -25,13 +66,98 @@ def get_db_path() -> Path:
 
 
 def connect() -> sqlite3.Connection:
+    """Abre uma conexão nova e independente (o chamador é responsável por fechá-la).
+
+    As funções deste módulo usam get_connection(), que reaproveita uma conexão por thread.
+    """
     db_path = get_db_path()
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(str(db_path))
+    con = sqlite3.connect(
+        str(db_path),
+        timeout=_BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,  # autocommit; escritas abrem BEGIN IMMEDIATE explícito
+        cached_statements=_STATEMENT_CACHE,
+    )
     con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA synchronous = NORMAL")
+    con.execute(f"PRAGMA cache_size = -{_CACHE_SIZE_KIB}")
+    con.execute(f"PRAGMA mmap_size = {_MMAP_SIZE}")
+    con.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+    return con
+
+
+def get_connection() -> sqlite3.Connection:
+    """Conexão persistente da thread atual (reaberta se CCR_DB_PATH mudar)."""
+    path = str(get_db_path())
+    con = getattr(_local, "con", None)
+    if con is not None and getattr(_local, "path", None) == path:
+        return con
+    if con is not None:
+        con.close()
+    con = connect()
+    _local.con = con
+    _local.path = path
+    _local.has_fts = None
     return con
 
 
+def close_connection() -> None:
+    """Fecha a conexão persistente da thread atual (ex.: no shutdown do worker)."""
+    con = getattr(_local, "con", None)
+    if con is not None:
+        con.close()
+    _local.con = None
+    _local.path = None
+    _local.has_fts = None
+
+
+def _is_lock_error(e: sqlite3.OperationalError) -> bool:
+    m = str(e).lower()
+    return "database is locked" in m or "database is busy" in m
+
+
+def _with_lock_retry(fn: Callable[[], T]) -> T:
+    """Repete fn em "database is locked" com backoff exponencial (com jitter) limitado."""
+    delay = _LOCK_BACKOFF_S
+    for attempt in range(_LOCK_RETRIES + 1):
+        try:
+            return fn()
+        except sqlite3.OperationalError as e:
+            if attempt >= _LOCK_RETRIES or not _is_lock_error(e):
+                raise
+        time.sleep(delay * (0.5 + random.random()))
+        delay = min(delay * 2, _LOCK_BACKOFF_MAX_S)
+    raise AssertionError("unreachable")
+
+
+def _write(work: Callable[[sqlite3.Connection], T]) -> T:
+    """Executa work numa transação BEGIN IMMEDIATE com um único COMMIT (com retry em lock)."""
+    def _attempt() -> T:
+        con = get_connection()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            out = work(con)
+            con.execute("COMMIT")
+        except BaseException:
+            # COMMIT também pode falhar ("database is locked" sem WAL): não deixe a transação
+            # aberta segurando o lock, senão o retry cai em "transaction within a transaction"
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        return out
+
+    return _with_lock_retry(_attempt)
+
+
+def _query_all(sql: str, params: Any = ()) -> List[sqlite3.Row]:
+    return _with_lock_retry(lambda: get_connection().execute(sql, params).fetchall())
+
+
+def _query_one(sql: str, params: Any = ()) -> Optional[sqlite3.Row]:
+    return _with_lock_retry(lambda: get_connection().execute(sql, params).fetchone())
+
+
 def _table_columns(con: sqlite3.Connection, table: str) -> List[str]:
     rows = con.execute(f"PRAGMA table_info({table})").fetchall()
     return [r["name"] for r in rows]
@@ -43,8 +169,7 @@ def _ensure_column(con: sqlite3.Connection, table: str, col_name: str, col_def:
         con.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
 
 
-def init_db() -> None:
-    con = connect()
+def _migration_0001_base_schema(con: sqlite3.Connection) -> None:
     cur = con.cursor()
 
     cur.execute("""
@@ -94,39 +219,302 @@ def init_db() -> None:
     );
     """)
 
-    # Migrações simples (caso você rode versões futuras)
+    # Bancos criados antes do controle por user_version podem não ter estas colunas
     _ensure_column(con, "requests", "payload_json", "TEXT NOT NULL DEFAULT '{}'")
     _ensure_column(con, "requests", "status_rlog_geral", "TEXT NOT NULL DEFAULT 'Aguardando'")
     _ensure_column(con, "requests", "status_bringg", "TEXT NOT NULL DEFAULT 'Aguardando'")
     _ensure_column(con, "requests", "nome_padrao", "TEXT")
 
-    con.commit()
-    con.close()
 
+def _migration_0002_indexes(con: sqlite3.Connection) -> None:
+    # list_requests_by_cpf: WHERE cpf = ? ORDER BY created_at DESC
+    con.execute("CREATE INDEX IF NOT EXISTS idx_requests_cpf_created_at ON requests (cpf, created_at)")
+    # list_events: WHERE request_id = ? ORDER BY id DESC
+    con.execute("CREATE INDEX IF NOT EXISTS idx_events_request_id_id ON events (request_id, id)")
+    # list_requests / search_requests: ORDER BY created_at
+    con.execute("CREATE INDEX IF NOT EXISTS idx_requests_created_at ON requests (created_at)")
 
-def insert_event(request_id: str, level: str, message: str) -> None:
-    con = connect()
-    con.execute(
-        "INSERT INTO events (request_id, ts, level, message) VALUES (?, ?, ?, ?)",
-        (request_id, _utc_now_iso(), level.upper(), message),
+
+_FTS_COLUMNS_SQL = """
+    {p}.request_id, {p}.cpf, {p}.nome, {p}.nome_padrao,
+    CASE WHEN json_valid({p}.payload_json) THEN json_extract({p}.payload_json, '$.base_nome') END,
+    CASE WHEN json_valid({p}.payload_json) THEN json_extract({p}.payload_json, '$.modalidade') END
+"""
+
+
+def _fts5_available(con: sqlite3.Connection) -> bool:
+    try:
+        return con.execute("SELECT 1 FROM pragma_module_list WHERE name = 'fts5'").fetchone() is not None
+    except sqlite3.OperationalError:  # SQLite < 3.30 sem pragma_module_list
+        return bool(con.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def _ensure_requests_fts(con: sqlite3.Connection) -> bool:
+    """Cria o índice full-text e seus triggers, se o SQLite tiver FTS5. Retorna se o índice existe."""
+    if con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requests_fts'").fetchone():
+        return True
+    if not _fts5_available(con):
+        return False  # SQLite sem FTS5: search_requests continua no LIKE
+    con.execute("""
+    CREATE VIRTUAL TABLE requests_fts USING fts5(
+        request_id, cpf, nome, nome_padrao, base_nome, modalidade,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
     )
-    con.commit()
-    con.close()
+    """)
+
+    # A linha do índice é ligada ao request pelo request_id, não pelo rowid: requests tem PK
+    # TEXT, e o rowid implícito pode ser renumerado por um VACUUM. O DELETE acha a linha pelo
+    # índice (MATCH na coluna request_id) e confere o valor exato.
+    cols = "request_id, cpf, nome, nome_padrao, base_nome, modalidade"
+    delete_old = """
+        DELETE FROM requests_fts
+        WHERE requests_fts MATCH 'request_id:"' || replace(old.request_id, '"', '""') || '"'
+          AND request_id = old.request_id;
+    """
+    con.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS requests_fts_ai AFTER INSERT ON requests BEGIN
+        INSERT INTO requests_fts ({cols}) VALUES ({_FTS_COLUMNS_SQL.format(p="new")});
+    END
+    """)
+    con.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS requests_fts_ad AFTER DELETE ON requests BEGIN
+        {delete_old}
+    END
+    """)
+    con.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS requests_fts_au
+    AFTER UPDATE OF request_id, cpf, nome, nome_padrao, payload_json ON requests BEGIN
+        {delete_old}
+        INSERT INTO requests_fts ({cols}) VALUES ({_FTS_COLUMNS_SQL.format(p="new")});
+    END
+    """)
+    con.execute(f"INSERT INTO requests_fts ({cols}) SELECT {_FTS_COLUMNS_SQL.format(p='r')} FROM requests r")
+    return True
 
 
-def create_request(meta: Dict[str, Any], payload: Dict[str, Any], vehicle_payload: Optional[Dict[str, Any]] = None) -> str:
-    con = connect()
+def _migration_0003_requests_fts(con: sqlite3.Connection) -> None:
+    # Índice full-text (sem acento, com prefixo) sincronizado por triggers.
+    # Sem FTS5 aqui, init_db cria o índice quando um SQLite com FTS5 abrir o banco
+    _ensure_requests_fts(con)
+
+
+def _migration_0004_requests_keyset_index(con: sqlite3.Connection) -> None:
+    # Paginação por cursor ordena/filtra por (created_at, request_id); o índice cobre o antigo
+    con.execute("CREATE INDEX IF NOT EXISTS idx_requests_created_at_request_id ON requests (created_at, request_id)")
+    con.execute("DROP INDEX IF EXISTS idx_requests_created_at")
+
+
+def _migration_0005_idempotency_keys(con: sqlite3.Connection) -> None:
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        idempotency_key TEXT PRIMARY KEY,
+        request_id TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+
+def _migration_0006_jobs(con: sqlite3.Connection) -> None:
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        request_id TEXT NOT NULL,
+        job_type TEXT NOT NULL,                 -- STEP1_DRIVER | STEP2_VEHICLE
+        status TEXT NOT NULL,                   -- PENDING | QUEUED | RUNNING | DONE | FAILED | BLOCKED
+        priority INTEGER NOT NULL DEFAULT 100,  -- menor = mais urgente
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        available_at TEXT NOT NULL,             -- não reclamar antes disso (backoff)
+        lease_owner TEXT,
+        lease_expires_at TEXT,
+        last_error TEXT,
+        log TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        FOREIGN KEY(request_id) REFERENCES requests(request_id)
+    )
+    """)
+    # claim_job: WHERE status = 'QUEUED' AND available_at <= ? ORDER BY priority, available_at
+    con.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority, available_at)")
+    # leases vencidos: WHERE status = 'RUNNING' AND lease_expires_at < ?
+    con.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires_at)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_jobs_request_id ON jobs (request_id, id)")
+
+
+def _migration_0007_br_mirror(con: sqlite3.Connection) -> None:
+    # Espelho do que já está cadastrado no Brasil Risk (kind: 'cpf' | 'placa')
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS br_mirror (
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        seen_at TEXT NOT NULL,
+        PRIMARY KEY (kind, key)
+    ) WITHOUT ROWID
+    """)
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS br_mirror_state (
+        kind TEXT PRIMARY KEY,
+        refreshed_at TEXT,
+        full_refreshed_at TEXT
+    )
+    """)
+
+
+# Colunas de status por sistema, na ordem do painel
+STATUS_SYSTEMS = ("overall", "brasil_risk", "rlog_cielo", "rlog_geral", "bringg")
+
+_COUNT_BASE_UF_SQL = "COALESCE(CASE WHEN json_valid({p}.payload_json) THEN json_extract({p}.payload_json, '$.base_uf') END, '')"
+_COUNT_DAY_SQL = "substr({p}.created_at, 1, 10)"
+
+
+def _count_key_sql(system: str, p: str) -> str:
+    return f"'{system}', {p}.status_{system}, {_COUNT_BASE_UF_SQL.format(p=p)}, {_COUNT_DAY_SQL.format(p=p)}"
+
+
+def _migration_0008_request_status_counts(con: sqlite3.Connection) -> None:
+    # Contadores por (sistema, status, UF da base, dia de criação) mantidos por triggers:
+    # o painel lê esta tabela em vez de varrer requests
     con.execute("""
-        INSERT INTO requests (
-            request_id, created_at,
-            request_type, role, has_vehicle,
-            nome, nome_padrao, cpf,
-            requester_name, requester_org,
-            cnh_received,
-            status_overall, status_brasil_risk, status_rlog_cielo, status_rlog_geral, status_bringg,
-            payload_json
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    CREATE TABLE IF NOT EXISTS request_status_counts (
+        system TEXT NOT NULL,
+        status TEXT NOT NULL,
+        base_uf TEXT NOT NULL,
+        day TEXT NOT NULL,      -- YYYY-MM-DD (UTC) de requests.created_at
+        n INTEGER NOT NULL,
+        PRIMARY KEY (system, status, base_uf, day)
+    ) WITHOUT ROWID
+    """)
+    inc = """
+        INSERT INTO request_status_counts (system, status, base_uf, day, n) VALUES ({key}, 1)
+        ON CONFLICT (system, status, base_uf, day) DO UPDATE SET n = n + 1;
+    """
+    dec = """
+        UPDATE request_status_counts SET n = n - 1
+        WHERE (system, status, base_uf, day) = ({key});
+    """
+    for system in STATUS_SYSTEMS:
+        new_key, old_key = _count_key_sql(system, "new"), _count_key_sql(system, "old")
+        con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS requests_counts_{system}_ai AFTER INSERT ON requests BEGIN
+            {inc.format(key=new_key)}
+        END
+        """)
+        con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS requests_counts_{system}_ad AFTER DELETE ON requests BEGIN
+            {dec.format(key=old_key)}
+        END
+        """)
+        con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS requests_counts_{system}_au
+        AFTER UPDATE OF status_{system}, payload_json, created_at ON requests
+        WHEN ({old_key}) IS NOT ({new_key})
+        BEGIN
+            {dec.format(key=old_key)}
+            {inc.format(key=new_key)}
+        END
+        """)
+    _rebuild_status_counts(con)
+
+
+def _rebuild_status_counts(con: sqlite3.Connection) -> None:
+    con.execute("DELETE FROM request_status_counts")
+    union = " UNION ALL ".join(
+        f"SELECT {_count_key_sql(system, 'r')} FROM requests r" for system in STATUS_SYSTEMS
+    )
+    # Sem nomes de coluna no UNION: agrupa pelas posições 1..4
+    con.execute(f"""
+        INSERT INTO request_status_counts (system, status, base_uf, day, n)
+        SELECT *, COUNT(*) FROM ({union}) GROUP BY 1, 2, 3, 4
+    """)
+
+
+def _migration_0009_requests_fts_by_request_id(con: sqlite3.Connection) -> None:
+    # O índice da migração 3 era ligado a requests.rowid (instável com PK TEXT): recria
+    # índice e triggers ligados pelo request_id, a partir do conteúdo atual de requests
+    for trigger in ("requests_fts_ai", "requests_fts_ad", "requests_fts_au"):
+        con.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    con.execute("DROP TABLE IF EXISTS requests_fts")
+    _ensure_requests_fts(con)
+
+
+# Migrações numeradas, aplicadas uma única vez e em ordem (PRAGMA user_version).
+# Nunca altere uma migração já publicada: acrescente uma nova no fim da lista.
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migration_0001_base_schema),
+    (2, _migration_0002_indexes),
+    (3, _migration_0003_requests_fts),
+    (4, _migration_0004_requests_keyset_index),
+    (5, _migration_0005_idempotency_keys),
+    (6, _migration_0006_jobs),
+    (7, _migration_0007_br_mirror),
+    (8, _migration_0008_request_status_counts),
+    (9, _migration_0009_requests_fts_by_request_id),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version() -> int:
+    row = _query_one("PRAGMA user_version")
+    return int(row[0]) if row else 0
+
+
+def _apply_migrations(con: sqlite3.Connection) -> int:
+    # Relido dentro da transação: outro processo pode ter migrado enquanto esperávamos o lock
+    current = int(con.execute("PRAGMA user_version").fetchone()[0])
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        migration(con)
+        con.execute(f"PRAGMA user_version = {int(version)}")
+        current = version
+    return current
+
+
+def init_db() -> None:
+    """Cria/atualiza o schema. Com o banco já em SCHEMA_VERSION, custa um PRAGMA (e uma consulta
+    ao sqlite_master na primeira chamada de cada conexão)."""
+    if schema_version() < SCHEMA_VERSION:
+        _write(_apply_migrations)
+        _local.has_fts = None
+    if not _has_fts() and _fts5_available(get_connection()):
+        # Banco migrado por um SQLite sem FTS5 (a migração 3 não criou o índice)
+        _write(_ensure_requests_fts)
+        _local.has_fts = None
+
+
+def insert_event(request_id: str, level: str, message: str) -> None:
+    _write(lambda con: con.execute(_INSERT_EVENT_SQL, (request_id, _utc_now_iso(), level.upper(), message)))
+
+
+def insert_events(rows: Sequence[Tuple[str, str, str, str]]) -> None:
+    """Grava vários eventos (request_id, ts, level, message) num único COMMIT."""
+    if not rows:
+        return
+    _write(lambda con: con.executemany(_INSERT_EVENT_SQL, [(rid, ts, level.upper(), msg) for rid, ts, level, msg in rows]))
+
+
+_INSERT_REQUEST_SQL = """
+    INSERT INTO requests (
+        request_id, created_at,
+        request_type, role, has_vehicle,
+        nome, nome_padrao, cpf,
+        requester_name, requester_org,
+        cnh_received,
+        status_overall, status_brasil_risk, status_rlog_cielo, status_rlog_geral, status_bringg,
+        payload_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_REPLACE_VEHICLE_SQL = "REPLACE INTO vehicles (request_id, vehicle_json) VALUES (?, ?)"
+_INSERT_EVENT_SQL = "INSERT INTO events (request_id, ts, level, message) VALUES (?, ?, ?, ?)"
+_CREATED_MESSAGE = "Solicitação criada e enviada para a fila."
+
+RequestItem = Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]
+
+
+def _request_params(meta: Dict[str, Any], payload: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
         meta["request_id"], meta["created_at"],
         meta["request_type"], meta["role"], int(meta["has_vehicle"]),
         meta["nome"], meta.get("nome_padrao"), meta["cpf"],
@@ -134,104 +522,631 @@ def create_request(meta: Dict[str, Any], payload: Dict[str, Any], vehicle_payloa
         int(meta.get("cnh_received", 0)),
         meta["status_overall"], meta["status_brasil_risk"], meta["status_rlog_cielo"], meta["status_rlog_geral"], meta["status_bringg"],
         json.dumps(payload, ensure_ascii=False),
-    ))
-
-    if vehicle_payload is not None:
-        con.execute(
-            "REPLACE INTO vehicles (request_id, vehicle_json) VALUES (?, ?)",
-            (meta["request_id"], json.dumps(vehicle_payload, ensure_ascii=False))
-        )
+    )
 
-    con.commit()
-    con.close()
 
-    insert_event(meta["request_id"], "INFO", "Solicitação criada e enviada para a fila.")
+def create_request(meta: Dict[str, Any], payload: Dict[str, Any], vehicle_payload: Optional[Dict[str, Any]] = None) -> str:
+    """Cria a solicitação, o veículo (opcional) e o evento de criação numa única transação."""
+    create_requests([(meta, payload, vehicle_payload)])
     return meta["request_id"]
 
 
+def create_requests(batch: Sequence[RequestItem]) -> List[str]:
+    """Cria várias solicitações (meta, payload, vehicle_payload) num único COMMIT.
+
+    Tudo ou nada: se uma linha falhar (ex.: request_id duplicado), nenhuma é gravada.
+    """
+    if not batch:
+        return []
+    ts = _utc_now_iso()
+    request_rows = [_request_params(meta, payload) for meta, payload, _ in batch]
+    vehicle_rows = [
+        (meta["request_id"], json.dumps(veh, ensure_ascii=False))
+        for meta, _, veh in batch
+        if veh is not None
+    ]
+    event_rows = [(meta["request_id"], ts, "INFO", _CREATED_MESSAGE) for meta, _, _ in batch]
+
+    def _work(con: sqlite3.Connection) -> None:
+        con.executemany(_INSERT_REQUEST_SQL, request_rows)
+        if vehicle_rows:
+            con.executemany(_REPLACE_VEHICLE_SQL, vehicle_rows)
+        con.executemany(_INSERT_EVENT_SQL, event_rows)
+
+    _write(_work)
+    return [meta["request_id"] for meta, _, _ in batch]
+
+
+def _portal_row_to_item(req: Dict[str, Any], veh: Optional[Dict[str, Any]]) -> RequestItem:
+    """Converte as linhas enviadas pelo portal (formato Supabase) em (meta, payload, vehicle_payload)."""
+    meta = dict(req)
+    payload = meta.pop("payload_json", None) or {}
+    vehicle_payload = None
+    if veh is not None:
+        vehicle_payload = veh.get("payload_json") or {k: val for k, val in veh.items() if k != "request_id"}
+    return meta, payload, vehicle_payload
+
+
+def portal_submit_requests(batch: Sequence[SubmitInput]) -> List[SubmitResult]:
+    """Stand-in local de db_supabase.portal_submit_requests (mesmo contrato), para testes/offline.
+
+    Tudo numa transação; cada item num SAVEPOINT próprio, então um item inválido
+    não derruba os demais.
+    """
+    items = as_submit_items(batch)
+    if not items:
+        return []
+    ts = _utc_now_iso()
+
+    def _work(con: sqlite3.Connection) -> List[SubmitResult]:
+        out: List[SubmitResult] = []
+        for it in items:
+            row = con.execute(
+                "SELECT request_id FROM idempotency_keys WHERE idempotency_key = ?", (it.idempotency_key,)
+            ).fetchone()
+            if row:
+                out.append(SubmitResult(it.idempotency_key, True, row["request_id"], duplicate=True))
+                continue
+            con.execute("SAVEPOINT submit_item")
+            try:
+                meta, payload, vehicle_payload = _portal_row_to_item(it.req, it.veh)
+                con.execute(_INSERT_REQUEST_SQL, _request_params(meta, payload))
+                if vehicle_payload is not None:
+                    con.execute(_REPLACE_VEHICLE_SQL, (meta["request_id"], json.dumps(vehicle_payload, ensure_ascii=False)))
+                con.execute(_INSERT_EVENT_SQL, (meta["request_id"], ts, "INFO", _CREATED_MESSAGE))
+                con.execute(
+                    "INSERT INTO idempotency_keys (idempotency_key, request_id, created_at) VALUES (?, ?, ?)",
+                    (it.idempotency_key, meta["request_id"], ts),
+                )
+            except (sqlite3.IntegrityError, KeyError, TypeError, ValueError) as e:
+                con.execute("ROLLBACK TO submit_item")
+                con.execute("RELEASE submit_item")
+                out.append(SubmitResult(it.idempotency_key, False, error=str(e)))
+                continue
+            con.execute("RELEASE submit_item")
+            out.append(SubmitResult(it.idempotency_key, True, meta["request_id"]))
+        return out
+
+    return _write(_work)
+
+
+def portal_submit_request(
+    req: Dict[str, Any],
+    veh: Optional[Dict[str, Any]],
+    idempotency_key: Optional[str] = None,
+) -> str:
+    """Stand-in local de db_supabase.portal_submit_request."""
+    res = portal_submit_requests([SubmitItem(req, veh, idempotency_key or new_idempotency_key())])[0]
+    if not res.ok or not res.request_id:
+        raise RuntimeError(f"Submit local falhou: {res.error}")
+    return res.request_id
+
+
 def update_request_fields(request_id: str, fields: Dict[str, Any]) -> None:
     if not fields:
         return
     keys = list(fields.keys())
     set_clause = ", ".join([f"{k} = ?" for k in keys])
     values = [fields[k] for k in keys] + [request_id]
-    con = connect()
-    con.execute(f"UPDATE requests SET {set_clause} WHERE request_id = ?", values)
-    con.commit()
-    con.close()
+    try:
+        _write(lambda con: con.execute(f"UPDATE requests SET {set_clause} WHERE request_id = ?", values))
+    finally:
+        get_request_cache().invalidate("local", request_id)
+
+
+def _loads_or_empty(text: Optional[str]) -> Dict[str, Any]:
+    try:
+        return json.loads(text or "{}")
+    except Exception:
+        return {}
 
 
 def get_request(request_id: str) -> Optional[Dict[str, Any]]:
-    con = connect()
-    row = con.execute("SELECT * FROM requests WHERE request_id = ?", (request_id,)).fetchone()
-    con.close()
-    return dict(row) if row else None
+    def _load() -> Optional[Dict[str, Any]]:
+        row = _query_one("SELECT * FROM requests WHERE request_id = ?", (request_id,))
+        return dict(row) if row else None
+
+    return get_request_cache().get_or_load("local", "request", request_id, _load)
 
 
 def get_payload(request_id: str) -> Dict[str, Any]:
-    r = get_request(request_id)
-    if not r:
-        return {}
-    try:
-        return json.loads(r.get("payload_json") or "{}")
-    except Exception:
-        return {}
+    """payload_json decodificado (do cache quando possível; cópia própria do chamador)."""
+    def _load() -> Optional[Dict[str, Any]]:
+        row = _query_one("SELECT payload_json FROM requests WHERE request_id = ?", (request_id,))
+        return _loads_or_empty(row["payload_json"]) if row else None
+
+    return get_request_cache().get_or_load("local", "payload", request_id, _load) or {}
 
 
 def get_vehicle_payload(request_id: str) -> Dict[str, Any]:
-    con = connect()
-    row = con.execute("SELECT vehicle_json FROM vehicles WHERE request_id = ?", (request_id,)).fetchone()
-    con.close()
-    if not row:
-        return {}
-    try:
-        return json.loads(row["vehicle_json"] or "{}")
-    except Exception:
-        return {}
+    """vehicle_json decodificado (do cache quando possível; cópia própria do chamador)."""
+    def _load() -> Optional[Dict[str, Any]]:
+        row = _query_one("SELECT vehicle_json FROM vehicles WHERE request_id = ?", (request_id,))
+        return _loads_or_empty(row["vehicle_json"]) if row else None
 
+    return get_request_cache().get_or_load("local", "vehicle", request_id, _load) or {}
 
-def list_requests(order_desc: bool = True) -> List[Dict[str, Any]]:
-    con = connect()
+
+def list_requests(order_desc: bool = True, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     order = "DESC" if order_desc else "ASC"
-    rows = con.execute(f"SELECT * FROM requests ORDER BY created_at {order}").fetchall()
-    con.close()
+    rows = _query_all(f"SELECT * FROM requests ORDER BY created_at {order} LIMIT ?", (-1 if limit is None else int(limit),))
     return [dict(r) for r in rows]
 
 
+def list_requests_page(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    columns: Optional[Sequence[str]] = None,
+    order_desc: bool = True,
+) -> Page:
+    """Página de requests ordenada por (created_at, request_id), via keyset.
+
+    Sem columns, os itens são RequestSummary (sem payload_json; use get_payload sob demanda).
+    Com columns, são dicts só com essas colunas (mais created_at/request_id).
+    Passe o next_cursor da página anterior para buscar a seguinte.
+    """
+    cols = project_columns(columns)
+    order = "DESC" if order_desc else "ASC"
+    where = ""
+    params: List[Any] = []
+    if cursor:
+        where = f"WHERE (created_at, request_id) {'<' if order_desc else '>'} (?, ?)"
+        params.extend(decode_cursor(cursor))
+    params.append(int(limit) + 1)
+    rows = _query_all(f"""
+        SELECT {", ".join(cols)} FROM requests
+        {where}
+        ORDER BY created_at {order}, request_id {order}
+        LIMIT ?
+    """, params)
+    return build_page(rows, int(limit), columns)
+
+
+_FRAME_BASE_SQL = "CASE WHEN json_valid(payload_json) THEN json_extract(payload_json, '$.{key}') END AS {key}"
+
+
+def load_requests_frame(order_desc: bool = True) -> "pd.DataFrame":
+    """Todas as requests como DataFrame colunar (sem payload_json; status/base como category).
+
+    base_nome/base_uf vêm do payload. Use no lugar de pd.DataFrame(list_requests()).
+    """
+    from request_frame import frame_from_cursor  # pandas só é carregado por quem usa
+
+    order = "DESC" if order_desc else "ASC"
+    cols = ", ".join(
+        list(SUMMARY_COLUMNS) + [_FRAME_BASE_SQL.format(key=k) for k in ("base_nome", "base_uf")]
+    )
+
+    def _load() -> "pd.DataFrame":
+        cur = get_connection().cursor()
+        cur.row_factory = None  # tuplas simples: sem um sqlite3.Row por linha
+        try:
+            cur.execute(f"SELECT {cols} FROM requests ORDER BY created_at {order}, request_id {order}")
+            return frame_from_cursor(cur)
+        finally:
+            cur.close()
+
+    return _with_lock_retry(_load)
+
+
 def list_requests_by_cpf(cpf_digits: str) -> List[Dict[str, Any]]:
-    con = connect()
-    rows = con.execute("""
+    rows = _query_all("""
         SELECT * FROM requests
         WHERE cpf = ?
         ORDER BY created_at DESC
-    """, (cpf_digits,)).fetchall()
-    con.close()
+    """, (cpf_digits,))
     return [dict(r) for r in rows]
 
 
-def search_requests(query: str) -> List[Dict[str, Any]]:
-    q = (query or "").strip()
+def _has_fts() -> bool:
+    """Se requests_fts existe; consultado uma vez por conexão."""
+    get_connection()  # (re)abre a conexão da thread, zerando o cache se ela for nova
+    if getattr(_local, "has_fts", None) is None:
+        row = _query_one("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'requests_fts'")
+        _local.has_fts = row is not None
+    return _local.has_fts
+
+
+def _fts_query(q: str) -> str:
+    """Converte a busca do admin numa query FTS5: todos os termos, cada um como prefixo."""
+    terms: List[str] = []
+    for raw in q.split():
+        # CPF digitado com máscara (123.456.789-01) vira um único termo numérico
+        if _RE_MASKED_DIGITS.fullmatch(raw):
+            raw = _RE_NON_DIGITS.sub("", raw)
+        terms.extend(f'"{t}"*' for t in _RE_WORD.findall(raw))
+    return " ".join(terms)
+
+
+def search_requests(query: str, limit: int = 200) -> List[Dict[str, Any]]:
+    """Busca por nome, nome padrão, CPF, request_id, base ou modalidade.
+
+    Sem diferenciar acentos ("conceicao" acha "Conceição"), por prefixo e ordenada por
+    relevância (bm25). Sem FTS5 disponível, cai no LIKE antigo. O protocolo como exibido
+    ao courier (com hífen) é normalizado para o request_id antes da busca.
+    """
+    q = normalize_protocol_query(query)
     if not q:
-        return list_requests()
+        return list_requests(limit=limit)
+
+    match = _fts_query(q)
+    if match and _has_fts():
+        rows = _query_all("""
+            SELECT r.*
+            FROM requests_fts
+            JOIN requests r ON r.request_id = requests_fts.request_id
+            WHERE requests_fts MATCH ?
+            ORDER BY bm25(requests_fts, 10.0, 8.0, 4.0, 2.0, 1.0, 1.0), r.created_at DESC
+            LIMIT ?
+        """, (match, limit))
+        return [dict(r) for r in rows]
+
     like = f"%{q}%"
-    con = connect()
-    rows = con.execute("""
+    rows = _query_all("""
         SELECT * FROM requests
         WHERE cpf LIKE ? OR nome LIKE ? OR request_id LIKE ?
         ORDER BY created_at DESC
-    """, (like, like, like)).fetchall()
-    con.close()
+        LIMIT ?
+    """, (like, like, like, limit))
     return [dict(r) for r in rows]
 
 
 def list_events(request_id: str, limit: int = 200) -> List[Dict[str, Any]]:
-    con = connect()
-    rows = con.execute("""
+    rows = _query_all("""
         SELECT ts, level, message
         FROM events
         WHERE request_id = ?
         ORDER BY id DESC
         LIMIT ?
-    """, (request_id, limit)).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
\ No newline at end of file
+    """, (request_id, limit))
+    return [dict(r) for r in rows]
+
+
+def list_events_since(request_id: str, after_id: Optional[int] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    """Eventos com id > after_id, em ordem crescente de id (usa idx_events_request_id_id).
+
+    Com after_id None retorna os últimos `limit` (carga inicial do tail), também em ordem crescente.
+    """
+    if after_id is not None:
+        rows = _query_all("""
+            SELECT id, ts, level, message
+            FROM events
+            WHERE request_id = ? AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (request_id, after_id, limit))
+        return [dict(r) for r in rows]
+    rows = _query_all("""
+        SELECT id, ts, level, message
+        FROM events
+        WHERE request_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+    """, (request_id, limit))
+    return [dict(r) for r in reversed(rows)]
+
+
+# -------------------- FILA DE JOBS --------------------
+# Cada job é reclamado por um worker com um lease (visibility timeout). Enquanto trabalha,
+# o worker renova o lease com heartbeat_job; se morrer, o lease vence e o job volta para a
+# fila (ou vai para FAILED, a dead-letter, se esgotou as tentativas).
+
+def enqueue_job(
+    request_id: str,
+    job_type: str,
+    priority: int = 100,
+    max_attempts: int = 3,
+    delay_s: float = 0,
+) -> int:
+    """Enfileira um job e retorna seu id. Se já houver um job ativo do mesmo tipo para o
+    request (ex.: duplo clique do admin), retorna o id existente."""
+    now = _utc_now_iso()
+
+    def _work(con: sqlite3.Connection) -> int:
+        row = con.execute(f"""
+            SELECT id FROM jobs
+            WHERE request_id = ? AND job_type = ? AND status IN ({",".join("?" * len(JOB_ACTIVE_STATUSES))})
+            ORDER BY id DESC LIMIT 1
+        """, (request_id, job_type, *JOB_ACTIVE_STATUSES)).fetchone()
+        if row:
+            return int(row["id"])
+        cur = con.execute("""
+            INSERT INTO jobs (request_id, job_type, status, priority, max_attempts, available_at, created_at, updated_at)
+            VALUES (?, ?, 'QUEUED', ?, ?, ?, ?, ?)
+        """, (request_id, job_type, int(priority), int(max_attempts), _utc_iso_in(delay_s), now, now))
+        return int(cur.lastrowid)
+
+    return _write(_work)
+
+
+def _reap_expired_leases(con: sqlite3.Connection, now: str) -> None:
+    con.execute("""
+        UPDATE jobs SET
+            status = CASE WHEN attempts >= max_attempts THEN 'FAILED' ELSE 'QUEUED' END,
+            last_error = COALESCE(last_error, 'Lease expirado (worker não renovou).'),
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            available_at = ?,
+            updated_at = ?
+        WHERE status = 'RUNNING' AND lease_expires_at < ?
+    """, (now, now, now))
+
+
+def claim_job(
+    worker_id: str,
+    job_types: Optional[Sequence[str]] = None,
+    lease_s: float = _JOB_LEASE_S,
+) -> Optional[Dict[str, Any]]:
+    """Reclama atomicamente o próximo job disponível (menor priority, depois mais antigo).
+
+    Retorna a linha do job (já RUNNING, com lease de lease_s segundos) ou None se a fila
+    estiver vazia. Vários workers podem chamar em paralelo sem pegar o mesmo job.
+    """
+    now = _utc_now_iso()
+    type_filter = ""
+    params: List[Any] = [worker_id, _utc_iso_in(lease_s), now, now]
+    if job_types:
+        type_filter = f"AND job_type IN ({','.join('?' * len(job_types))})"
+        params.extend(job_types)
+
+    def _work(con: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        _reap_expired_leases(con, now)
+        return con.execute(f"""
+            UPDATE jobs SET
+                status = 'RUNNING',
+                lease_owner = ?,
+                lease_expires_at = ?,
+                attempts = attempts + 1,
+                updated_at = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = 'QUEUED' AND available_at <= ? {type_filter}
+                ORDER BY priority, available_at, id
+                LIMIT 1
+            )
+            RETURNING *
+        """, params).fetchone()
+
+    row = _write(_work)
+    return dict(row) if row else None
+
+
+def _update_owned_job(job_id: int, worker_id: str, set_clause: str, params: Sequence[Any]) -> bool:
+    """Aplica set_clause só se o job ainda estiver RUNNING com o lease deste worker."""
+    def _work(con: sqlite3.Connection) -> bool:
+        cur = con.execute(f"""
+            UPDATE jobs SET {set_clause}, updated_at = ?
+            WHERE id = ? AND status = 'RUNNING' AND lease_owner = ?
+        """, (*params, _utc_now_iso(), job_id, worker_id))
+        return cur.rowcount == 1
+
+    return _write(_work)
+
+
+def heartbeat_job(job_id: int, worker_id: str, lease_s: float = _JOB_LEASE_S) -> bool:
+    """Renova o lease. False se o job não pertence mais a este worker (lease venceu)."""
+    return _update_owned_job(job_id, worker_id, "lease_expires_at = ?", (_utc_iso_in(lease_s),))
+
+
+def complete_job(job_id: int, worker_id: str) -> bool:
+    return _update_owned_job(
+        job_id, worker_id,
+        "status = 'DONE', lease_owner = NULL, lease_expires_at = NULL, last_error = NULL", (),
+    )
+
+
+def block_job(job_id: int, worker_id: str, reason: str) -> bool:
+    """Marca BLOCKED (aguardando ação humana: OKTA/captcha). Volta à fila com requeue_job."""
+    return _update_owned_job(
+        job_id, worker_id,
+        "status = 'BLOCKED', lease_owner = NULL, lease_expires_at = NULL, last_error = ?", (reason,),
+    )
+
+
+def _job_backoff_s(attempts: int) -> float:
+    delay = min(_JOB_BACKOFF_S * (2 ** max(attempts - 1, 0)), _JOB_BACKOFF_MAX_S)
+    return delay * (0.75 + random.random() / 2)
+
+
+def fail_job(job_id: int, worker_id: str, error: str, retryable: bool = True) -> Optional[str]:
+    """Registra a falha. Com tentativas sobrando (e retryable), reagenda com backoff
+    exponencial e retorna 'QUEUED'; senão manda para a dead-letter e retorna 'FAILED'.
+    Retorna None se o job não pertence mais a este worker."""
+    row = _query_one("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,))
+    if not row:
+        return None
+    if retryable and row["attempts"] < row["max_attempts"]:
+        ok = _update_owned_job(
+            job_id, worker_id,
+            "status = 'QUEUED', lease_owner = NULL, lease_expires_at = NULL, last_error = ?, available_at = ?",
+            (error, _utc_iso_in(_job_backoff_s(row["attempts"]))),
+        )
+        return "QUEUED" if ok else None
+    ok = _update_owned_job(
+        job_id, worker_id,
+        "status = 'FAILED', lease_owner = NULL, lease_expires_at = NULL, last_error = ?", (error,),
+    )
+    return "FAILED" if ok else None
+
+
+def requeue_job(job_id: int, reset_attempts: bool = False, delay_s: float = 0) -> bool:
+    """Devolve à fila um job BLOCKED/FAILED/PENDING (ex.: admin resolveu o captcha ou o erro)."""
+    attempts = "0" if reset_attempts else "attempts"
+
+    def _work(con: sqlite3.Connection) -> bool:
+        cur = con.execute(f"""
+            UPDATE jobs SET status = 'QUEUED', attempts = {attempts}, available_at = ?, updated_at = ?
+            WHERE id = ? AND status IN ('BLOCKED', 'FAILED', 'PENDING')
+        """, (_utc_iso_in(delay_s), _utc_now_iso(), job_id))
+        return cur.rowcount == 1
+
+    return _write(_work)
+
+
+def set_job_log(job_id: int, pointer: str) -> None:
+    """Grava em jobs.log o ponteiro para o log em disco (ver job_logs)."""
+    _write(lambda con: con.execute("UPDATE jobs SET log = ? WHERE id = ?", (pointer, job_id)))
+
+
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    row = _query_one("SELECT * FROM jobs WHERE id = ?", (job_id,))
+    return dict(row) if row else None
+
+
+def list_jobs(
+    request_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    """Jobs mais recentes primeiro. list_jobs(status='FAILED') é a dead-letter."""
+    where: List[str] = []
+    params: List[Any] = []
+    if request_id is not None:
+        where.append("request_id = ?")
+        params.append(request_id)
+    if status is not None:
+        where.append("status = ?")
+        params.append(status)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    params.append(limit)
+    rows = _query_all(f"SELECT * FROM jobs {clause} ORDER BY id DESC LIMIT ?", params)
+    return [dict(r) for r in rows]
+
+
+# -------------------- PAINEL (CONTADORES) --------------------
+# Leem request_status_counts (mantida por triggers), nunca a tabela requests.
+
+def _counts_where(
+    system: Optional[str],
+    since_day: Optional[str],
+    until_day: Optional[str],
+    base_uf: Optional[str],
+) -> Tuple[str, List[Any]]:
+    where: List[str] = ["n > 0"]
+    params: List[Any] = []
+    if system is not None:
+        where.append("system = ?")
+        params.append(system)
+    if since_day is not None:
+        where.append("day >= ?")
+        params.append(since_day)
+    if until_day is not None:
+        where.append("day <= ?")
+        params.append(until_day)
+    if base_uf is not None:
+        where.append("base_uf = ?")
+        params.append(base_uf)
+    return " AND ".join(where), params
+
+
+def status_counts(
+    system: str = "overall",
+    since_day: Optional[str] = None,
+    until_day: Optional[str] = None,
+    base_uf: Optional[str] = None,
+) -> Dict[str, int]:
+    """Quantidade de requests por status de um sistema (dias no formato YYYY-MM-DD, inclusivos)."""
+    where, params = _counts_where(system, since_day, until_day, base_uf)
+    rows = _query_all(f"""
+        SELECT status, SUM(n) FROM request_status_counts WHERE {where} GROUP BY status ORDER BY 2 DESC
+    """, params)
+    return {r[0]: int(r[1]) for r in rows}
+
+
+def status_funnel(
+    since_day: Optional[str] = None,
+    until_day: Optional[str] = None,
+    base_uf: Optional[str] = None,
+) -> Dict[str, Dict[str, int]]:
+    """status_counts de todos os sistemas: {sistema: {status: n}}, na ordem de STATUS_SYSTEMS."""
+    where, params = _counts_where(None, since_day, until_day, base_uf)
+    out: Dict[str, Dict[str, int]] = {s: {} for s in STATUS_SYSTEMS}
+    for system, status, n in _query_all(f"""
+        SELECT system, status, SUM(n) FROM request_status_counts WHERE {where}
+        GROUP BY system, status ORDER BY system, 3 DESC
+    """, params):
+        out.setdefault(system, {})[status] = int(n)
+    return out
+
+
+def status_counts_by(
+    dimension: str,
+    system: str = "overall",
+    since_day: Optional[str] = None,
+    until_day: Optional[str] = None,
+    base_uf: Optional[str] = None,
+) -> Dict[str, Dict[str, int]]:
+    """{base_uf ou day: {status: n}} de um sistema (dimension = 'base_uf' | 'day')."""
+    if dimension not in ("base_uf", "day"):
+        raise ValueError(f"Dimensão inválida: {dimension}")
+    where, params = _counts_where(system, since_day, until_day, base_uf)
+    out: Dict[str, Dict[str, int]] = {}
+    for key, status, n in _query_all(f"""
+        SELECT {dimension}, status, SUM(n) FROM request_status_counts WHERE {where}
+        GROUP BY {dimension}, status ORDER BY {dimension}
+    """, params):
+        out.setdefault(key, {})[status] = int(n)
+    return out
+
+
+def rebuild_status_counts() -> None:
+    """Recalcula os contadores a partir de requests (reparo; as triggers mantêm no dia a dia)."""
+    _write(_rebuild_status_counts)
+
+
+# -------------------- ESPELHO BRASIL RISK --------------------
+# CPFs/placas já cadastrados no Brasil Risk, lidos das telas de listagem (br_mirror.py).
+
+def mirror_keys(kind: str) -> Set[str]:
+    return {r[0] for r in _query_all("SELECT key FROM br_mirror WHERE kind = ?", (kind,))}
+
+
+def mirror_add(kind: str, keys: Iterable[str]) -> int:
+    """Acrescenta chaves ao espelho; retorna quantas eram novas."""
+    now = _utc_now_iso()
+    rows = [(kind, k, now) for k in keys]
+    if not rows:
+        return 0
+
+    def _work(con: sqlite3.Connection) -> int:
+        before = con.total_changes
+        con.executemany("INSERT OR IGNORE INTO br_mirror (kind, key, seen_at) VALUES (?, ?, ?)", rows)
+        return con.total_changes - before
+
+    return _write(_work)
+
+
+def mirror_reconcile(kind: str, keys: Iterable[str]) -> Tuple[int, int]:
+    """Releitura completa: o espelho passa a ser exatamente keys. Retorna (novas, removidas).
+
+    Carimba seen_at de todas as chaves vistas e apaga, na mesma transação, as que não
+    apareceram nesta leitura (courier/veículo desativado ou excluído no Brasil Risk).
+    """
+    run_at = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+    rows = [(kind, k, run_at) for k in set(keys)]  # repetidas contariam como novas
+
+    def _work(con: sqlite3.Connection) -> Tuple[int, int]:
+        before = con.execute("SELECT COUNT(*) FROM br_mirror WHERE kind = ?", (kind,)).fetchone()[0]
+        con.executemany("""
+            INSERT INTO br_mirror (kind, key, seen_at) VALUES (?, ?, ?)
+            ON CONFLICT (kind, key) DO UPDATE SET seen_at = excluded.seen_at
+        """, rows)
+        removed = con.execute("DELETE FROM br_mirror WHERE kind = ? AND seen_at < ?", (kind, run_at)).rowcount
+        return len(rows) - (before - removed), removed
+
+    return _write(_work)
+
+
+def get_mirror_state(kind: str) -> Dict[str, Any]:
+    row = _query_one("SELECT * FROM br_mirror_state WHERE kind = ?", (kind,))
+    return dict(row) if row else {"kind": kind, "refreshed_at": None, "full_refreshed_at": None}
+
+
+def set_mirror_refreshed(kind: str, full: bool) -> None:
+    now = _utc_now_iso()
+    _write(lambda con: con.execute("""
+        INSERT INTO br_mirror_state (kind, refreshed_at, full_refreshed_at) VALUES (?, ?, ?)
+        ON CONFLICT(kind) DO UPDATE SET
+            refreshed_at = excluded.refreshed_at,
+            full_refreshed_at = COALESCE(excluded.full_refreshed_at, br_mirror_state.full_refreshed_at)
+    """, (kind, now, now if full else None)))
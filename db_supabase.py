@@ -1,19 +1,39 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
+from ids import normalize_protocol_query
+from pagination import Page, build_page, decode_cursor, project_columns
+from request_cache import get_request_cache
+from submissions import SubmitInput, SubmitItem, SubmitResult, as_submit_items, parse_results
 from supabase_client import get_public_client, get_admin_client
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 # -------------------- PORTAL (PUBLIC / ANON) --------------------
 
-def portal_submit_request(req: Dict[str, Any], veh: Optional[Dict[str, Any]]) -> str:
-    """
-    Submete a solicitação via RPC (atômico):
-    - Insere em public.requests
-    - Se 'veh' vier preenchido, insere em public.vehicles
-    Retorna o request_id.
-    """
+# PostgREST responde PGRST202 quando a função não existe no schema (ou a assinatura não bate)
+_MISSING_RPC_CODE = "PGRST202"
+# Depois de um PGRST202, recusa envios em lote sem perguntar de novo por este tempo (a
+# migração pode ser aplicada com o app no ar)
+_MISSING_RPC_RECHECK_S = 60.0
+_batch_rpc_missing_until = 0.0
+_MISSING_BATCH_RPC = (
+    "RPC portal_submit_requests não existe no projeto Supabase: aplique "
+    "supabase/migrations/20260601000000_portal_submit_requests.sql. Envios com "
+    "idempotency_key são recusados até lá (o RPC antigo não deduplica)."
+)
+
+
+def _is_missing_rpc(err: Any) -> bool:
+    code = err.get("code") if isinstance(err, dict) else getattr(err, "code", None)
+    return code == _MISSING_RPC_CODE or _MISSING_RPC_CODE in str(err)
+
+
+def _submit_one(req: Dict[str, Any], veh: Optional[Dict[str, Any]]) -> str:
     sb = get_public_client()
 
     resp = sb.rpc("portal_submit_request", {"req": req, "veh": veh}).execute()
@@ -40,6 +60,65 @@ def portal_submit_request(req: Dict[str, Any], veh: Optional[Dict[str, Any]]) ->
     return str(rid)
 
 
+def portal_submit_request(
+    req: Dict[str, Any],
+    veh: Optional[Dict[str, Any]],
+    idempotency_key: Optional[str] = None,
+) -> str:
+    """
+    Submete a solicitação via RPC (atômico):
+    - Insere em public.requests
+    - Se 'veh' vier preenchido, insere em public.vehicles
+    Retorna o request_id.
+
+    Com idempotency_key, vai pelo RPC em lote: repetir a chamada com a mesma chave
+    (duplo clique, retry após timeout) devolve o request_id original sem duplicar.
+    """
+    if idempotency_key:
+        res = portal_submit_requests([SubmitItem(req, veh, idempotency_key)])[0]
+        if not res.ok or not res.request_id:
+            raise RuntimeError(f"RPC portal_submit_requests recusou a solicitação: {res.error}")
+        return res.request_id
+    return _submit_one(req, veh)
+
+
+def _submit_batch(items: Sequence[SubmitItem]) -> List[SubmitResult]:
+    sb = get_public_client()
+    payload = [{"idempotency_key": it.idempotency_key, "req": it.req, "veh": it.veh} for it in items]
+
+    resp = sb.rpc("portal_submit_requests", {"items": payload}).execute()
+
+    err = getattr(resp, "error", None)
+    if err:
+        raise RuntimeError(f"RPC portal_submit_requests falhou: {err}")
+    return parse_results(items, resp.data)
+
+
+def portal_submit_requests(batch: Sequence[SubmitInput]) -> List[SubmitResult]:
+    """
+    Submete N envios numa única chamada RPC.
+    Cada item leva uma idempotency_key explícita; o RPC grava cada chave uma única vez e,
+    para chaves já vistas, devolve o request_id original com duplicate=true. Retorna um
+    SubmitResult por item, na ordem de entrada.
+
+    Se o projeto ainda não tem o RPC em lote (supabase/migrations), levanta RuntimeError:
+    cair para portal_submit_request ignoraria a chave e duplicaria requests nos retries.
+    """
+    global _batch_rpc_missing_until
+    items = as_submit_items(batch)
+    if not items:
+        return []
+    if time.monotonic() < _batch_rpc_missing_until:
+        raise RuntimeError(_MISSING_BATCH_RPC)
+    try:
+        return _submit_batch(items)
+    except Exception as e:  # supabase-py 2.x levanta APIError; versões antigas, resp.error
+        if not _is_missing_rpc(e):
+            raise
+        _batch_rpc_missing_until = time.monotonic() + _MISSING_RPC_RECHECK_S
+        raise RuntimeError(_MISSING_BATCH_RPC) from e
+
+
 def public_get_status(protocol: str, cpf_last4: str) -> List[Dict[str, Any]]:
     sb = get_public_client()
     resp = sb.rpc("public_get_status", {"protocol": protocol, "cpf_last4": cpf_last4}).execute()
@@ -60,8 +139,71 @@ def list_requests_admin(limit: int = 300) -> List[Dict[str, Any]]:
     return resp.data or []
 
 
+def list_requests_admin_page(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    columns: Optional[Sequence[str]] = None,
+) -> Page:
+    """
+    Página de requests (mais recentes primeiro) via keyset em (created_at, request_id),
+    sem o teto de 300 linhas de list_requests_admin.
+    Sem columns, os itens são RequestSummary (payload sob demanda via get_request_payload_admin).
+    """
+    cols = project_columns(columns)
+    sb = get_admin_client()
+    q = sb.table("requests").select(",".join(cols))
+    if cursor:
+        created_at, request_id = decode_cursor(cursor)
+        q = q.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",request_id.lt."{request_id}")'
+        )
+    resp = (
+        q.order("created_at", desc=True)
+        .order("request_id", desc=True)
+        .limit(int(limit) + 1)
+        .execute()
+    )
+    err = getattr(resp, "error", None)
+    if err:
+        raise RuntimeError(f"List requests admin (página) falhou: {err}")
+    return build_page(resp.data or [], int(limit), columns)
+
+
+def load_requests_frame_admin(page_size: int = 1000, max_rows: Optional[int] = None) -> "pd.DataFrame":
+    """Requests (mais recentes primeiro) como DataFrame colunar, paginando por keyset.
+
+    Sem payload_json; status e base como category. max_rows limita o total carregado.
+    """
+    from request_frame import FRAME_COLUMNS, frame_from_rows  # pandas só é carregado por quem usa
+
+    rows: List[Dict[str, Any]] = []
+    cursor: Optional[str] = None
+    while max_rows is None or len(rows) < max_rows:
+        limit = page_size if max_rows is None else min(page_size, max_rows - len(rows))
+        page = list_requests_admin_page(cursor=cursor, limit=limit, columns=FRAME_COLUMNS)
+        rows.extend(page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    return frame_from_rows(rows)
+
+
+def get_request_payload_admin(request_id: str) -> Dict[str, Any]:
+    def _load() -> Optional[Dict[str, Any]]:
+        sb = get_admin_client()
+        resp = sb.table("requests").select("payload_json").eq("request_id", request_id).limit(1).execute()
+        err = getattr(resp, "error", None)
+        if err:
+            raise RuntimeError(f"Get payload admin falhou: {err}")
+        data = resp.data or []
+        return (data[0].get("payload_json") or {}) if data else None
+
+    return get_request_cache().get_or_load("supabase", "payload", request_id, _load) or {}
+
+
 def search_requests_admin(query: str, limit: int = 300) -> List[Dict[str, Any]]:
-    q = (query or "").strip()
+    q = normalize_protocol_query(query)  # protocolo como exibido (com hífen) -> request_id
     if not q:
         return list_requests_admin(limit=limit)
 
@@ -69,7 +211,7 @@ def search_requests_admin(query: str, limit: int = 300) -> List[Dict[str, Any]]:
     resp = (
         sb.table("requests")
         .select("*")
-        .or_(f"cpf.ilike.%{q}%,nome.ilike.%{q}%,nome_padrao.ilike.%{q}%")
+        .or_(f"request_id.ilike.%{q}%,cpf.ilike.%{q}%,nome.ilike.%{q}%,nome_padrao.ilike.%{q}%")
         .order("created_at", desc=True)
         .limit(limit)
         .execute()
@@ -81,23 +223,29 @@ def search_requests_admin(query: str, limit: int = 300) -> List[Dict[str, Any]]:
 
 
 def get_request_admin(request_id: str) -> Optional[Dict[str, Any]]:
-    sb = get_admin_client()
-    resp = sb.table("requests").select("*").eq("request_id", request_id).limit(1).execute()
-    err = getattr(resp, "error", None)
-    if err:
-        raise RuntimeError(f"Get request admin falhou: {err}")
-    data = resp.data or []
-    return data[0] if data else None
+    def _load() -> Optional[Dict[str, Any]]:
+        sb = get_admin_client()
+        resp = sb.table("requests").select("*").eq("request_id", request_id).limit(1).execute()
+        err = getattr(resp, "error", None)
+        if err:
+            raise RuntimeError(f"Get request admin falhou: {err}")
+        data = resp.data or []
+        return data[0] if data else None
+
+    return get_request_cache().get_or_load("supabase", "request", request_id, _load)
 
 
 def get_vehicle_admin(request_id: str) -> Optional[Dict[str, Any]]:
-    sb = get_admin_client()
-    resp = sb.table("vehicles").select("*").eq("request_id", request_id).limit(1).execute()
-    err = getattr(resp, "error", None)
-    if err:
-        raise RuntimeError(f"Get vehicle admin falhou: {err}")
-    data = resp.data or []
-    return data[0] if data else None
+    def _load() -> Optional[Dict[str, Any]]:
+        sb = get_admin_client()
+        resp = sb.table("vehicles").select("*").eq("request_id", request_id).limit(1).execute()
+        err = getattr(resp, "error", None)
+        if err:
+            raise RuntimeError(f"Get vehicle admin falhou: {err}")
+        data = resp.data or []
+        return data[0] if data else None
+
+    return get_request_cache().get_or_load("supabase", "vehicle", request_id, _load)
 
 
 def list_events_admin(request_id: str, limit: int = 200) -> List[Dict[str, Any]]:
@@ -116,9 +264,32 @@ def list_events_admin(request_id: str, limit: int = 200) -> List[Dict[str, Any]]
     return resp.data or []
 
 
+def list_events_admin_since(request_id: str, after_id: Optional[int] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    """Eventos com id > after_id, em ordem crescente de id.
+
+    Com after_id None retorna os últimos `limit` (carga inicial do tail), também em ordem crescente.
+    Os ids vêm de uma sequence: um evento de id menor pode ficar visível depois de um de id
+    maior (transações concorrentes), por isso o EventTail relê uma janela de sobreposição.
+    """
+    sb = get_admin_client()
+    q = sb.table("events").select("*").eq("request_id", request_id)
+    if after_id is not None:
+        resp = q.gt("id", after_id).order("id").limit(limit).execute()
+    else:
+        resp = q.order("id", desc=True).limit(limit).execute()
+    err = getattr(resp, "error", None)
+    if err:
+        raise RuntimeError(f"List events admin (incremental) falhou: {err}")
+    rows = resp.data or []
+    return rows if after_id is not None else rows[::-1]
+
+
 def update_request_admin(request_id: str, patch: Dict[str, Any]) -> None:
     sb = get_admin_client()
-    resp = sb.table("requests").update(patch).eq("request_id", request_id).execute()
+    try:
+        resp = sb.table("requests").update(patch).eq("request_id", request_id).execute()
+    finally:
+        get_request_cache().invalidate("supabase", request_id)
     err = getattr(resp, "error", None)
     if err:
         raise RuntimeError(f"Update requests {request_id} falhou: {err}")
@@ -136,4 +307,55 @@ def insert_event_admin(
     resp = sb.table("events").insert(row).execute()
     err = getattr(resp, "error", None)
     if err:
-        raise RuntimeError(f"Insert events falhou: {err}")
\ No newline at end of file
+        raise RuntimeError(f"Insert events falhou: {err}")
+
+
+def insert_events_admin(rows: Sequence[Dict[str, Any]]) -> None:
+    """Insere vários eventos num único request (rows no formato de insert_event_admin)."""
+    if not rows:
+        return
+    sb = get_admin_client()
+    resp = sb.table("events").insert(list(rows)).execute()
+    err = getattr(resp, "error", None)
+    if err:
+        raise RuntimeError(f"Insert events (lote) falhou: {err}")
+
+
+# -------------------- PAINEL (CONTADORES) --------------------
+# request_status_counts no Supabase espelha a tabela local (mesmas colunas), mantida por
+# trigger em public.requests; o RPC request_status_totals agrega no banco e devolve uma
+# linha por (sistema, status). SQL em supabase/migrations/.
+
+def _status_totals(
+    system: Optional[str],
+    since_day: Optional[str],
+    until_day: Optional[str],
+    base_uf: Optional[str],
+) -> List[Dict[str, Any]]:
+    sb = get_admin_client()
+    params = {"p_system": system, "p_since_day": since_day, "p_until_day": until_day, "p_base_uf": base_uf}
+    resp = sb.rpc("request_status_totals", params).execute()
+    err = getattr(resp, "error", None)
+    if err:
+        raise RuntimeError(f"RPC request_status_totals falhou: {err}")
+    return resp.data or []
+
+
+def status_counts_admin(
+    system: str = "overall",
+    since_day: Optional[str] = None,
+    until_day: Optional[str] = None,
+    base_uf: Optional[str] = None,
+) -> Dict[str, int]:
+    return {r["status"]: int(r["n"]) for r in _status_totals(system, since_day, until_day, base_uf)}
+
+
+def status_funnel_admin(
+    since_day: Optional[str] = None,
+    until_day: Optional[str] = None,
+    base_uf: Optional[str] = None,
+) -> Dict[str, Dict[str, int]]:
+    out: Dict[str, Dict[str, int]] = {}
+    for r in _status_totals(None, since_day, until_day, base_uf):
+        out.setdefault(r["system"], {})[r["status"]] = int(r["n"])
+    return out
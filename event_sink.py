@@ -0,0 +1,397 @@
+"""
+Write-behind para o log de eventos.
+
+emit() só coloca o evento numa fila em memória; uma thread de fundo grava em lotes (um
+executemany / um insert em massa por lote), quando o lote enche ou a cada intervalo.
+Eventos ERROR/CRITICAL forçam a gravação imediata e emit() só retorna depois dela, para
+não perder o motivo de uma falha se o processo morrer em seguida. Com a fila cheia,
+emit() bloqueia (backpressure) em vez de descartar eventos. No encerramento do processo
+(atexit) tudo o que estiver pendente é gravado.
+
+Se a gravação falhar com um erro transitório (lock do SQLite, rede/timeout, 5xx/429 do
+PostgREST, conexão/concorrência do Postgres — ver is_transient), o lote fica pendente e é
+tentado de novo com backoff exponencial. Enquanto houver pendentes, a thread só tira da fila
+o que couber em CCR_EVENTS_MAX_QUEUE (pendentes + novos); passado isso a fila enche e emit()
+bloqueia, como no caso normal.
+
+Qualquer outro erro (constraint, meta que não serializa, 4xx) é permanente: o lote é
+dividido ao meio até isolar os eventos que falham sozinhos, que vão para a dead-letter
+(events-dead-<nome>.jsonl em settings.logs_dir(), um JSON por linha) sem segurar os
+seguintes. Um lote que segue falhando com erro transitório depois de CCR_EVENTS_MAX_ATTEMPTS
+tentativas também vai inteiro para a dead-letter. No encerramento, com o destino ainda fora
+do ar, os pendentes são descartados: contados em stats()["dropped"], gravados na dead-letter
+e copiados para o log do worker (job_logs), um registro por evento.
+
+Overrides por env var:
+  - CCR_EVENTS_BATCH: tamanho máximo do lote (padrão 200)
+  - CCR_EVENTS_FLUSH_S: intervalo máximo entre gravações (padrão 0.5 s)
+  - CCR_EVENTS_MAX_QUEUE: eventos pendentes antes de bloquear emit() (padrão 10000)
+  - CCR_EVENTS_RETRY_MAX_S: intervalo máximo entre novas tentativas (padrão 30 s)
+  - CCR_EVENTS_MAX_ATTEMPTS: tentativas de um lote com erro transitório (padrão 20)
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import db
+import settings
+from job_logs import get_job_logger
+
+try:  # vem com o supabase-py; sem ele, só o SQLite local grava eventos
+    import httpx
+
+    _TRANSPORT_ERRORS: Tuple[type, ...] = (httpx.TransportError,)
+except ImportError:  # pragma: no cover
+    _TRANSPORT_ERRORS = ()
+
+URGENT_LEVELS = frozenset({"ERROR", "CRITICAL"})
+
+
+class Event(NamedTuple):
+    request_id: str
+    ts: str
+    level: str
+    message: str
+    system: Optional[str] = None
+    meta: Optional[Dict[str, Any]] = None
+
+
+Writer = Callable[[Sequence[Event]], None]
+
+_STOP = object()
+
+_RETRY_BASE_S = 0.2
+
+# SQLSTATE de conexão (08), concorrência (40: serialização/deadlock), recursos (53) e
+# intervenção do operador (57P); PGRST000-003 são falhas do PostgREST ao falar com o banco
+_TRANSIENT_CODES = ("08", "40", "53", "57P", "PGRST00")
+
+
+def is_transient(e: BaseException) -> bool:
+    """True se vale tentar a gravação de novo (o mesmo lote pode passar mais tarde)."""
+    if isinstance(e, sqlite3.OperationalError):
+        msg = str(e).lower()
+        return "locked" in msg or "busy" in msg
+    if isinstance(e, (ConnectionError, TimeoutError) + _TRANSPORT_ERRORS):
+        return True
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status == 429
+    code = getattr(e, "code", None)  # postgrest.APIError
+    return isinstance(code, str) and code.startswith(_TRANSIENT_CODES)
+
+
+class EventSink:
+    def __init__(
+        self,
+        writer: Writer,
+        max_batch: Optional[int] = None,
+        flush_interval_s: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        name: str = "events",
+    ) -> None:
+        self.writer = writer
+        self.max_batch = max_batch or int(os.environ.get("CCR_EVENTS_BATCH", 200))
+        self.flush_interval_s = flush_interval_s or float(os.environ.get("CCR_EVENTS_FLUSH_S", 0.5))
+        self.capacity = max_queue or int(os.environ.get("CCR_EVENTS_MAX_QUEUE", 10000))
+        self.retry_max_s = float(os.environ.get("CCR_EVENTS_RETRY_MAX_S", 30))
+        self.max_attempts = int(os.environ.get("CCR_EVENTS_MAX_ATTEMPTS", 20))
+        self.name = name
+        self.dead_letter_path: Path = settings.logs_dir() / f"events-dead-{name}.jsonl"
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=self.capacity)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "emitted": 0, "written": 0, "batches": 0, "failures": 0, "pending": 0, "dropped": 0, "dead_letter": 0,
+            "backpressure_waits": 0, "max_queue_depth": 0, "flush_ms_total": 0.0, "flush_ms_max": 0.0,
+        }
+        self._closed = False
+        self._failing = False  # só a thread de gravação mexe (com _attempts)
+        self._attempts = 0  # falhas transitórias seguidas do primeiro lote pendente
+        self._thread = threading.Thread(target=self._run, name=f"event-sink-{name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- produtor ----
+
+    def _put(self, item: Any) -> None:
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["backpressure_waits"] += 1
+            self._q.put(item)
+
+    def emit(
+        self,
+        request_id: str,
+        level: str,
+        message: str,
+        system: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        lvl = level.upper()
+        event = Event(request_id, datetime.now(timezone.utc).isoformat(timespec="seconds"), lvl, message, system, meta)
+        if self._closed:  # depois do atexit: grava direto
+            self.writer([event])
+            return
+        self._put(event)
+        with self._stats_lock:
+            self._stats["emitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._q.qsize())
+        if lvl in URGENT_LEVELS:
+            self.flush()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Tenta gravar tudo o que foi emitido antes desta chamada.
+
+        False se estourar o timeout ou se a gravação falhou (os eventos seguem pendentes
+        para nova tentativa). Depois de close() retorna na hora: a thread de gravação já
+        terminou (ou está terminando) e não há quem responda; emit() passa a gravar direto.
+        """
+        if self._closed:
+            return not self._thread.is_alive()
+        done = threading.Event()
+        self._put(done)
+        if not done.wait(timeout):
+            return False
+        with self._stats_lock:
+            return self._stats["pending"] == 0
+
+    def close(self, timeout: float = 10) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Destino fora do ar com a fila no limite: o que sobrou morre com o processo
+            with self._stats_lock:
+                lost = self._stats["pending"] + self._q.qsize()
+                self._stats["dropped"] += lost
+            get_job_logger().log("ERROR", f"event_sink {self.name}: {lost:.0f} eventos não gravados no encerramento.")
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["queue_depth"] = self._q.qsize()
+        out["flush_ms_avg"] = out["flush_ms_total"] / out["batches"] if out["batches"] else 0.0
+        return out
+
+    # ---- thread de gravação ----
+
+    def _try(self, batch: Sequence[Event]) -> Optional[Exception]:
+        """Grava um lote; retorna o erro em vez de levantar."""
+        t0 = time.perf_counter()
+        try:
+            self.writer(batch)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["failures"] += 1
+            return e
+        ms = (time.perf_counter() - t0) * 1000
+        with self._stats_lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["flush_ms_total"] += ms
+            self._stats["flush_ms_max"] = max(self._stats["flush_ms_max"], ms)
+        return None
+
+    def _isolate(self, batch: List[Event], err: Exception) -> List[Event]:
+        """Lote com erro permanente: divide ao meio até isolar os eventos que falham sozinhos
+        (vão para a dead-letter). Retorna o que sobrou se um pedaço bater num erro transitório."""
+        if len(batch) == 1:
+            self._dead_letter(batch, err)
+            return []
+        mid = len(batch) // 2
+        halves = [batch[:mid], batch[mid:]]
+        for i, half in enumerate(halves):
+            e = self._try(half)
+            if e is None:
+                continue
+            rest = half if is_transient(e) else self._isolate(half, e)
+            if rest:
+                return rest + [ev for h in halves[i + 1:] for ev in h]
+        return []
+
+    def _write(self, pending: List[Event]) -> List[Event]:
+        """Grava pending em lotes de max_batch; retorna o que falta (a partir do lote que falhou
+        com erro transitório)."""
+        start = 0
+        while start < len(pending):
+            batch = pending[start:start + self.max_batch]
+            err = self._try(batch)
+            if err is None:
+                self._attempts = 0
+                start += len(batch)
+                continue
+            if is_transient(err):
+                self._attempts += 1
+                if self._attempts < self.max_attempts:
+                    rest = pending[start:]
+                    if not self._failing:
+                        self._failing = True
+                        get_job_logger().log(
+                            "WARNING", f"event_sink {self.name}: gravação falhou; eventos mantidos para nova tentativa: {err}",
+                            pending=len(rest),
+                        )
+                    return rest
+                self._dead_letter(batch, err)  # transitório que não passa: não segura o resto
+            else:
+                left = self._isolate(batch, err)
+                if left:
+                    return left + pending[start + len(batch):]
+            self._attempts = 0
+            start += len(batch)
+        if self._failing:
+            self._failing = False
+            get_job_logger().log("INFO", f"event_sink {self.name}: gravação normalizada.")
+        return []
+
+    def _append_dead_letter(self, events: Sequence[Event], reason: str) -> None:
+        try:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.dead_letter_path.open("a", encoding="utf-8") as fh:
+                for e in events:
+                    fh.write(json.dumps({**e._asdict(), "sink": self.name, "error": reason}, ensure_ascii=False, default=str) + "\n")
+        except OSError as oe:  # sem disco: fica só o registro no log do worker
+            get_job_logger().log("ERROR", f"event_sink {self.name}: dead-letter indisponível: {oe}")
+
+    def _dead_letter(self, events: Sequence[Event], err: Exception) -> None:
+        with self._stats_lock:
+            self._stats["dead_letter"] += len(events)
+        self._append_dead_letter(events, str(err))
+        get_job_logger().log(
+            "ERROR", f"event_sink {self.name}: {len(events)} eventos enviados para a dead-letter: {err}",
+            dead_letter=str(self.dead_letter_path),
+        )
+
+    def _drop(self, events: Sequence[Event]) -> None:
+        with self._stats_lock:
+            self._stats["dropped"] += len(events)
+        self._append_dead_letter(events, "descartado no encerramento")
+        logger = get_job_logger()
+        logger.log("ERROR", f"event_sink {self.name}: {len(events)} eventos descartados no encerramento.")
+        for e in events:
+            logger.log(e.level, e.message, request_id=e.request_id, event_ts=e.ts, system=e.system, dropped_event=True)
+
+    def _collect(self, item: Any, room: int) -> Tuple[List[Event], List[threading.Event], bool]:
+        """A partir de item, junta um lote (até max_batch, room ou flush_interval_s)."""
+        batch: List[Event] = []
+        waiters: List[threading.Event] = []
+        stop = False
+        limit = min(self.max_batch, room)
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                batch.append(item)
+            if stop or waiters or len(batch) >= limit:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._q.get(timeout=remaining)
+            except queue.Empty:
+                break
+        if stop:  # o que chegou junto com o encerramento também é gravado
+            while True:
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item is not _STOP:
+                    batch.append(item)
+        return batch, waiters, stop
+
+    def _run(self) -> None:
+        pending: List[Event] = []  # gravação falhou: aguardando nova tentativa
+        delay = 0.0
+        retry_at = 0.0
+        while True:
+            if not pending:
+                item: Any = self._q.get()
+            else:
+                timeout = max(retry_at - time.monotonic(), 0.0)
+                if len(pending) >= self.capacity:
+                    # Limite atingido: não lê mais nada; a fila enche e emit() bloqueia
+                    time.sleep(timeout)
+                    item = None
+                else:
+                    try:
+                        item = self._q.get(timeout=timeout)
+                    except queue.Empty:
+                        item = None
+            batch, waiters, stop = self._collect(item, max(self.capacity - len(pending), 1))
+            pending.extend(batch)
+            if pending and (stop or not delay or time.monotonic() >= retry_at):
+                pending = self._write(pending)
+                if pending:
+                    delay = min(delay * 2 or _RETRY_BASE_S, self.retry_max_s)
+                    retry_at = time.monotonic() + delay
+                else:
+                    delay = 0.0
+            if stop and pending:
+                self._drop(pending)
+                pending = []
+            with self._stats_lock:
+                self._stats["pending"] = len(pending)
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+
+def _write_local(batch: Sequence[Event]) -> None:
+    db.insert_events([(e.request_id, e.ts, e.level, e.message) for e in batch])
+
+
+def _write_supabase(batch: Sequence[Event]) -> None:
+    import db_supabase  # só quem usa o Supabase precisa do pacote
+
+    db_supabase.insert_events_admin([
+        {
+            "request_id": e.request_id, "level": e.level, "system": e.system or "",
+            "message": e.message, "meta": e.meta or {}, "created_at": e.ts,
+        }
+        for e in batch
+    ])
+
+
+_sinks: Dict[str, EventSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def _get(name: str, writer: Writer) -> EventSink:
+    with _sinks_lock:
+        sink = _sinks.get(name)
+        if sink is None or sink._closed:
+            sink = _sinks[name] = EventSink(writer, name=name)
+        return sink
+
+
+def get_local_sink() -> EventSink:
+    """Sink do SQLite local (db.events), compartilhado pelo processo."""
+    return _get("local", _write_local)
+
+
+def get_supabase_sink() -> EventSink:
+    """Sink da tabela events do Supabase, compartilhado pelo processo."""
+    return _get("supabase", _write_supabase)
@@ -0,0 +1,137 @@
+"""
+Tail incremental dos eventos de um request, para a tela de detalhe do admin.
+
+Cada request aberto tem um EventTail guardado no session_state: um buffer circular com os
+últimos eventos e o maior id já visto. A cada refresh são buscados os eventos a partir do
+cursor, via db.list_events_since ou db_supabase.list_events_admin_since.
+
+No Postgres, os ids vêm de uma sequence e não ficam visíveis na ordem: uma transação que
+pegou o id 100 pode commitar depois de outra com o 101. Por isso o cursor não é o maior id
+visto, e sim o maior id que já era visto há overlap_s segundos; a janela mais recente é
+relida a cada poll e os eventos repetidos são descartados pelo id.
+
+Uso numa página Streamlit:
+    tail = get_event_tail(st.session_state, request_id, backend="supabase")
+    tail.poll()
+    st.dataframe(tail.newest_first())
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, MutableMapping, Optional, Set, Tuple
+
+import db
+
+FetchSince = Callable[[str, Optional[int], int], List[Dict[str, Any]]]
+
+# Maior duração esperada de uma transação que grava eventos
+_OVERLAP_S = 10.0
+
+
+def _local_fetch(request_id: str, after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    return db.list_events_since(request_id, after_id, limit)
+
+
+def _supabase_fetch(request_id: str, after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    import db_supabase  # só quem usa o Supabase precisa do pacote
+
+    return db_supabase.list_events_admin_since(request_id, after_id, limit)
+
+
+BACKENDS: Dict[str, FetchSince] = {"local": _local_fetch, "supabase": _supabase_fetch}
+
+
+class EventTail:
+    def __init__(
+        self,
+        request_id: str,
+        fetch: FetchSince,
+        maxlen: int = 500,
+        page_size: int = 200,
+        overlap_s: float = _OVERLAP_S,
+    ) -> None:
+        self.request_id = request_id
+        self.fetch = fetch
+        self.page_size = page_size
+        self.overlap_s = overlap_s
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self.last_id = 0
+        self.stats: Dict[str, int] = {"polls": 0, "rows": 0, "duplicates": 0, "late": 0}
+        self._loaded = False
+        self._seen: Set[int] = set()
+        # (monotonic do poll, last_id ao fim dele), do mais antigo ao mais recente
+        self._marks: Deque[Tuple[float, int]] = deque()
+
+    def _cursor(self, now: float) -> int:
+        """Maior last_id de um poll feito há pelo menos overlap_s; antes disso, o início do buffer."""
+        while len(self._marks) > 1 and now - self._marks[1][0] >= self.overlap_s:
+            self._marks.popleft()
+        if self._marks and now - self._marks[0][0] >= self.overlap_s:
+            return self._marks[0][1]
+        return int(self.events[0]["id"]) - 1 if self.events else self.last_id
+
+    def _add(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        new: List[Dict[str, Any]] = []
+        late = False
+        for row in rows:
+            rid = int(row["id"])
+            if rid in self._seen:
+                self.stats["duplicates"] += 1
+                continue
+            full = len(self.events) == self.events.maxlen
+            if full and rid < int(self.events[0]["id"]):
+                continue  # mais antigo que todo o buffer: sairia na hora
+            if full:
+                self._seen.discard(int(self.events[0]["id"]))
+            late = late or rid < self.last_id
+            self.events.append(row)
+            self._seen.add(rid)
+            self.last_id = max(self.last_id, rid)
+            new.append(row)
+        if late:
+            # Commit fora de ordem: recoloca o buffer em ordem crescente de id
+            self.stats["late"] += 1
+            self.events = deque(sorted(self.events, key=lambda r: int(r["id"])), maxlen=self.events.maxlen)
+        return new
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Busca os eventos novos (relendo a janela de sobreposição), acrescenta ao buffer e
+        retorna os que ainda não estavam nele (ordem crescente de id)."""
+        self.stats["polls"] += 1
+        now = time.monotonic()
+        new: List[Dict[str, Any]] = []
+        if not self._loaded:
+            # Primeira carga: só o que cabe no buffer
+            new = self._add(self.fetch(self.request_id, None, self.events.maxlen or self.page_size))
+            self._loaded = True
+        else:
+            cursor = self._cursor(now)
+            while True:
+                batch = self.fetch(self.request_id, cursor, self.page_size)
+                new.extend(self._add(batch))
+                if batch:
+                    cursor = int(batch[-1]["id"])
+                if len(batch) < self.page_size:
+                    break
+        self._marks.append((now, self.last_id))
+        self.stats["rows"] += len(new)
+        return new
+
+    def newest_first(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.events))
+
+
+def get_event_tail(
+    state: MutableMapping[str, Any],
+    request_id: str,
+    backend: str = "local",
+    maxlen: int = 500,
+) -> EventTail:
+    """EventTail do request guardado em state (ex.: st.session_state), criado na primeira vez."""
+    key = f"event_tail:{backend}:{request_id}"
+    tail = state.get(key)
+    if not isinstance(tail, EventTail):
+        tail = EventTail(request_id, BACKENDS[backend], maxlen=maxlen)
+        state[key] = tail
+    return tail
@@ -0,0 +1,154 @@
+"""
+Preenchimento declarativo de formulários do Brasil Risk.
+
+O mapa de campos (caminho no payload -> seletor -> tradução, ver config.DRIVER_FORM_FIELDS)
+é compilado uma vez em FormSpec. Para cada payload, todas as traduções são resolvidas em
+Python e os campos comuns vão ao browser num único page.evaluate, que grava os valores e
+dispara input/change. Só os campos marcados como dependentes de eventos reais
+(config.DRIVER_FORM_NEEDS_EVENTS) são preenchidos um a um via Playwright.
+
+Com um OptionCatalog, selects por rótulo viram selects por value já resolvidos em Python
+(sem varrer as opções no browser); se a tela recusar um desses values, o catálogo é
+relido da página e os campos afetados são tentados de novo uma vez.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+import config
+from option_catalog import OptionCatalog
+
+# Um único round-trip: grava pelo setter nativo (não fura o value tracker de frameworks)
+# e dispara os eventos que máscaras/validações escutam. Retorna [seletor, problema] por falha.
+_BATCH_FILL_JS = """
+(ops) => {
+  const problems = [];
+  for (const [selector, kind, value] of ops) {
+    const el = document.querySelector(selector);
+    if (!el) { problems.push([selector, "campo não encontrado"]); continue; }
+    let v = value;
+    if (kind === "label") {
+      const opt = Array.from(el.options || []).find((o) => o.text.trim() === value);
+      if (!opt) { problems.push([selector, "opção '" + value + "' não existe"]); continue; }
+      v = opt.value;
+    }
+    const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), "value").set;
+    setter.call(el, v);
+    if (el.value !== v) { problems.push([selector, "valor '" + value + "' não aceito"]); continue; }
+    el.dispatchEvent(new Event("input", { bubbles: true }));
+    el.dispatchEvent(new Event("change", { bubbles: true }));
+  }
+  return problems;
+}
+"""
+
+Mapping = Union[None, str, Dict[str, str]]
+
+
+class FieldSpec(NamedTuple):
+    path: Tuple[str, ...]
+    selector: str
+    kind: str                     # "text" | "value" | "label"
+    table: Optional[Dict[str, str]]
+    needs_events: bool
+
+
+class FormFillError(RuntimeError):
+    pass
+
+
+def _lookup(payload: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    cur: Any = payload
+    for part in path:
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(part)
+    return cur
+
+
+class FormSpec:
+    """Mapa de campos compilado; reutilize a mesma instância para todos os jobs."""
+
+    def __init__(self, fields: Iterable[FieldSpec]) -> None:
+        self.fields: Tuple[FieldSpec, ...] = tuple(fields)
+        self.label_selectors: Tuple[str, ...] = tuple(f.selector for f in self.fields if f.kind == "label")
+
+    def plan(
+        self,
+        payload: Dict[str, Any],
+        catalog: Optional[OptionCatalog] = None,
+        only: Optional[Set[str]] = None,
+    ) -> Tuple[List[List[str]], List[Tuple[str, str, str]]]:
+        """Resolve o payload em (ops do lote, ações campo a campo), sem tocar no browser."""
+        batch: List[List[str]] = []
+        single: List[Tuple[str, str, str]] = []
+        for f in self.fields:
+            if only is not None and f.selector not in only:
+                continue
+            raw = _lookup(payload, f.path)
+            if raw is None or raw == "":
+                continue
+            value = str(raw)
+            if f.table is not None:
+                if value not in f.table:
+                    raise FormFillError(f"{'.'.join(f.path)}: valor '{value}' sem tradução para {f.selector}")
+                value = f.table[value]
+            kind = f.kind
+            if kind == "label" and catalog is not None:
+                resolved = catalog.resolve(f.selector, value)
+                if resolved is not None:
+                    kind, value = "value", resolved
+            if f.needs_events:
+                single.append((f.selector, kind, value))
+            else:
+                batch.append([f.selector, kind, value])
+        return batch, single
+
+    async def fill(self, page: Any, payload: Dict[str, Any], catalog: Optional[OptionCatalog] = None) -> None:
+        if catalog is not None:
+            await catalog.ensure(page, self.label_selectors)
+        batch, single = self.plan(payload, catalog)
+        problems: List[List[str]] = await page.evaluate(_BATCH_FILL_JS, batch) if batch else []
+
+        stale = {sel for sel, _ in problems if sel in self.label_selectors}
+        if catalog is not None and stale:
+            # Value do catálogo recusado: o tenant mudou as opções; relê e tenta de novo
+            catalog.invalidate()
+            await catalog.ensure(page, self.label_selectors)
+            retry, _ = self.plan(payload, catalog, only=stale)
+            problems = [p for p in problems if p[0] not in stale]
+            problems += await page.evaluate(_BATCH_FILL_JS, retry) if retry else []
+
+        for selector, kind, value in single:
+            field = page.locator(selector)
+            if kind == "label":
+                await field.select_option(label=value)
+            elif kind == "value":
+                await field.select_option(value=value)
+            else:
+                await field.fill(value)
+                await field.press("Tab")
+        if problems:
+            raise FormFillError("Falha ao preencher: " + " | ".join(f"{sel}: {msg}" for sel, msg in problems))
+
+
+def compile_form(
+    fields: Iterable[Tuple[str, str, Mapping]],
+    needs_events: FrozenSet[str] = frozenset(),
+) -> FormSpec:
+    """Compila tuplas (caminho, seletor, tradução) no formato de config.DRIVER_FORM_FIELDS."""
+    out: List[FieldSpec] = []
+    for path, selector, mapping in fields:
+        if mapping is None:
+            kind, table = "text", None
+        elif mapping == "label":
+            kind, table = "label", None
+        elif isinstance(mapping, dict):
+            kind, table = "value", dict(mapping)
+        else:
+            raise ValueError(f"Tradução desconhecida para {selector}: {mapping!r}")
+        out.append(FieldSpec(tuple(path.split(".")), selector, kind, table, selector in needs_events))
+    return FormSpec(out)
+
+
+DRIVER_FORM = compile_form(config.DRIVER_FORM_FIELDS, config.DRIVER_FORM_NEEDS_EVENTS)
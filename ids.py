@@ -0,0 +1,122 @@
+"""
+Request IDs ordenáveis por tempo, com dígito verificador.
+
+Formato (15 caracteres, alfabeto Crockford base32, sem I/L/O/U):
+    TTTTTTT RRRRRRR C
+    - T: segundos desde 2024-01-01 UTC (35 bits, ~1000 anos)
+    - R: 35 bits aleatórios, sorteados de novo para cada ID (IDs do mesmo segundo não são
+      vizinhos: quem tem um protocolo não deduz o dos outros)
+    - C: dígito verificador Luhn mod 32 (pega qualquer caractere trocado e a maioria das
+      transposições de vizinhos)
+
+Como o alfabeto está em ordem ASCII e a largura é fixa, a ordem lexicográfica do
+request_id segue created_at (com resolução de segundos; dentro do mesmo segundo a ordem
+é aleatória, e o cursor de paginação desempata por request_id): inserts caem no fim do
+índice da PK e "mais recentes primeiro" é uma varredura reversa.
+
+Para o courier, o protocolo é exibido em dois blocos (format_protocol) e a entrada
+digitada é normalizada/validada por parse_protocol antes de qualquer consulta ao banco.
+IDs antigos (8 hex, uuid4 truncado) continuam aceitos por parse_protocol.
+"""
+from __future__ import annotations
+
+import re
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_INDEX = {ch: i for i, ch in enumerate(_ALPHABET)}
+_BASE = len(_ALPHABET)
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_EPOCH_S = int(_EPOCH.timestamp())
+
+_TIME_CHARS = 7
+_RAND_CHARS = 7
+_RAND_MAX = _BASE ** _RAND_CHARS
+ID_LENGTH = _TIME_CHARS + _RAND_CHARS + 1
+
+# Confusões comuns ao digitar (Crockford)
+_TYPO_MAP = str.maketrans({"I": "1", "L": "1", "O": "0"})
+_RE_SEPARATORS = re.compile(r"[\s\-.]+")
+_RE_LEGACY = re.compile(r"^[0-9A-F]{8}$")
+
+
+def _encode(value: int, width: int) -> str:
+    out = []
+    for _ in range(width):
+        value, r = divmod(value, _BASE)
+        out.append(_ALPHABET[r])
+    return "".join(reversed(out))
+
+
+def _decode(text: str) -> int:
+    value = 0
+    for ch in text:
+        value = value * _BASE + _INDEX[ch]
+    return value
+
+
+def _luhn_sum(text: str, double_first: bool) -> int:
+    total = 0
+    double = double_first
+    for ch in reversed(text):
+        addend = _INDEX[ch] * (2 if double else 1)
+        total += addend // _BASE + addend % _BASE
+        double = not double
+    return total
+
+
+def check_char(body: str) -> str:
+    """Dígito verificador Luhn mod 32 de body."""
+    return _ALPHABET[(-_luhn_sum(body, double_first=True)) % _BASE]
+
+
+def new_request_id() -> str:
+    now_s = max(int(time.time()) - _EPOCH_S, 0)
+    body = _encode(now_s, _TIME_CHARS) + _encode(secrets.randbelow(_RAND_MAX), _RAND_CHARS)
+    return body + check_char(body)
+
+
+def is_valid_request_id(request_id: str) -> bool:
+    rid = request_id or ""
+    if len(rid) != ID_LENGTH or any(ch not in _INDEX for ch in rid):
+        return False
+    return _luhn_sum(rid, double_first=False) % _BASE == 0
+
+
+def format_protocol(request_id: str) -> str:
+    """Exibição para o courier: 'TTTTTTT-RRRRRRRC'. IDs de 8 hex são exibidos como estão."""
+    if len(request_id) != ID_LENGTH:
+        return request_id
+    return f"{request_id[:_TIME_CHARS]}-{request_id[_TIME_CHARS:]}"
+
+
+def parse_protocol(text: str) -> str:
+    """Normaliza o protocolo digitado e valida o dígito verificador.
+
+    Aceita minúsculas, hífens/espaços e confusões I/L->1, O->0. Levanta ValueError se inválido.
+    """
+    raw = _RE_SEPARATORS.sub("", (text or "").strip().upper())
+    if _RE_LEGACY.match(raw):
+        return raw
+    rid = raw.translate(_TYPO_MAP)
+    if not is_valid_request_id(rid):
+        raise ValueError("Protocolo inválido. Confira se foi digitado exatamente como recebido.")
+    return rid
+
+
+def normalize_protocol_query(text: str) -> str:
+    """Para buscas: se text é um protocolo válido (como exibido, com hífen, minúsculas ou
+    confusões de digitação), retorna o request_id; senão text sem espaços nas pontas."""
+    q = (text or "").strip()
+    try:
+        return parse_protocol(q)
+    except ValueError:
+        return q
+
+
+def request_id_created_at(request_id: str) -> datetime:
+    """Instante (UTC, precisão de segundos) embutido no request_id."""
+    return _EPOCH + timedelta(seconds=_decode(request_id[:_TIME_CHARS]))
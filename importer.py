@@ -0,0 +1,453 @@
+"""
+Importação em lote de couriers a partir de planilhas dos parceiros (CSV ou XLSX).
+
+As linhas são lidas em streaming (sem carregar o arquivo inteiro), validadas pelos
+modelos de models.py e submetidas em blocos via RPC em lote. Memória fica limitada
+ao bloco corrente + o relatório de erros (com teto).
+
+Layout das colunas (cabeçalho na primeira linha):
+- dados do courier: mesmos nomes dos campos de DriverData (nome, cpf, data_nascimento, ...)
+- base: base_estado, base_nome, base_uf, sigla_base_cielo, sigla_base_geral, modalidade
+- veículo (opcional): campos de VehicleData com prefixo "veiculo_" (veiculo_placa, ...)
+- proprietário: prefixo "proprietario_" + proprietario_tipo (Fisica | Juridica)
+- requester_name, requester_org (opcionais)
+
+Datas podem vir como dd/mm/aaaa ou aaaa-mm-dd.
+
+Cada linha é enviada com uma chave de idempotência de CPF + função + dia da importação,
+escopada pelo parceiro (--parceiro ou a coluna requester_org): reimportar o arquivo, ou
+reenviar a planilha corrigida no mesmo dia, não duplica as linhas que não mudaram; o mesmo
+courier em outro dia é um novo cadastro. --dia fixa o dia da chave (reenvio corrigido de
+uma importação anterior); --force envia de novo mesmo as linhas já importadas.
+
+Uso:
+    python importer.py parceiros.xlsx [--parceiro NOME] [--dia AAAA-MM-DD] [--chunk-size 200] [--dry-run] [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+import batch_validators as bv
+import validators as v
+from ids import new_request_id
+from models import CourierRequest, DriverData, VehicleData
+from submissions import (
+    SubmitItem, SubmitResult, build_request_row, build_vehicle_row, import_idempotency_key,
+)
+
+Submission = Tuple[Dict[str, Any], Optional[Dict[str, Any]]]
+SubmitFn = Callable[[Sequence[SubmitItem]], List[SubmitResult]]
+
+VEHICLE_PREFIX = "veiculo_"
+OWNER_PREFIX = "proprietario_"
+META_COLUMNS = (
+    "base_estado", "base_nome", "base_uf", "sigla_base_cielo", "sigla_base_geral", "modalidade",
+    "requester_name", "requester_org",
+)
+DATE_FIELDS = {"data_nascimento", "data_emissao", "cnh_validade", "data_licenciamento"}
+# Documentos conferidos em lote (dígitos verificadores) antes dos modelos; vazio fica para o pydantic
+DOCUMENT_CHECKS = {"cpf": "cpf", OWNER_PREFIX + "cpf": "cpf", OWNER_PREFIX + "cnpj": "cnpj"}
+
+_DATE_FMT_BR = "%d/%m/%Y"
+_OWNER_TYPES = {"fisica": "Fisica", "física": "Fisica", "juridica": "Juridica", "jurídica": "Juridica"}
+
+
+class RowError(NamedTuple):
+    line: int          # linha na planilha (1 = cabeçalho)
+    cpf: str
+    message: str
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    valid: int = 0
+    invalid: int = 0
+    submitted: int = 0
+    submit_failed: int = 0
+    duplicates: int = 0         # mesmo CPF/função/dia do parceiro já enviado antes
+    elapsed_s: float = 0.0
+    errors: List[RowError] = field(default_factory=list)
+    errors_truncated: int = 0   # erros além de max_errors (contados, não guardados)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.total / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def add_error(self, err: RowError, max_errors: int) -> None:
+        if len(self.errors) < max_errors:
+            self.errors.append(err)
+        else:
+            self.errors_truncated += 1
+
+    def summary(self) -> str:
+        return (
+            f"{self.total} linhas em {self.elapsed_s:.1f}s ({self.rows_per_s:.0f} linhas/s): "
+            f"{self.valid} válidas, {self.invalid} inválidas, "
+            f"{self.submitted} submetidas ({self.duplicates} já existentes), "
+            f"{self.submit_failed} recusadas na submissão"
+        )
+
+
+# -------------------- LEITURA (STREAMING) --------------------
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel transforma CPF/telefone em número
+    return str(value).strip()
+
+
+def _iter_csv(path: Path) -> Iterator[Dict[str, str]]:
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.DictReader(f, dialect=dialect):
+            yield {(k or "").strip(): _cell(val) for k, val in row.items()}
+
+
+def _iter_xlsx(path: Path) -> Iterator[Dict[str, str]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Leitura de XLSX requer openpyxl (pip install openpyxl).")
+
+    wb = load_workbook(str(path), read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [_cell(h) for h in next(rows, ())]
+        for values in rows:
+            yield {h: _cell(val) for h, val in zip(header, values) if h}
+    finally:
+        wb.close()
+
+
+def iter_rows(path: Path) -> Iterator[Dict[str, str]]:
+    """Itera as linhas da planilha como dicts coluna -> texto, uma de cada vez."""
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return _iter_csv(path)
+    if suffix in (".xlsx", ".xlsm"):
+        return _iter_xlsx(path)
+    raise ValueError(f"Formato não suportado: {path.suffix} (use .csv ou .xlsx)")
+
+
+# -------------------- VALIDAÇÃO --------------------
+
+def _parse_value(key: str, value: str) -> Any:
+    if key in DATE_FIELDS and "/" in value:
+        try:
+            return datetime.strptime(value, _DATE_FMT_BR).date()
+        except ValueError:
+            return value  # deixa o pydantic reportar o erro
+    return value
+
+
+def _pick(row: Dict[str, str], prefix: str = "") -> Dict[str, Any]:
+    """Campos não vazios com o prefixo (removido); sem prefixo, só os que não têm prefixo."""
+    out: Dict[str, Any] = {}
+    for k, val in row.items():
+        if not val:
+            continue
+        if prefix:
+            if not k.startswith(prefix):
+                continue
+            k = k[len(prefix):]
+        elif k.startswith((VEHICLE_PREFIX, OWNER_PREFIX)):
+            continue
+        out[k] = _parse_value(k, val)
+    return out
+
+
+def parse_row(row: Dict[str, str]) -> CourierRequest:
+    """Valida uma linha da planilha. Levanta ValidationError/ValueError se inválida."""
+    driver = _pick(row)
+    vehicle = _pick(row, VEHICLE_PREFIX)
+    with_vehicle = bool(vehicle.get("placa"))
+    if with_vehicle:
+        owner = _pick(row, OWNER_PREFIX)
+        tipo = str(owner.pop("tipo", "Fisica")).strip().lower()
+        owner["owner_type"] = _OWNER_TYPES.get(tipo, tipo)
+        vehicle["proprietario"] = owner
+    return CourierRequest(
+        with_vehicle=with_vehicle,
+        driver=DriverData(**{k: val for k, val in driver.items() if k not in META_COLUMNS}),
+        vehicle=VehicleData(**vehicle) if with_vehicle else None,
+    )
+
+
+def document_errors(block: Sequence[Dict[str, str]]) -> List[str]:
+    """Erros de CPF/CNPJ (mod 11) de um bloco de linhas, vetorizado; "" para linhas ok."""
+    columns = {
+        col: [row.get(col, "") if col == "cpf" or row.get(VEHICLE_PREFIX + "placa") else "" for row in block]
+        for col in DOCUMENT_CHECKS
+    }
+    masks = bv.error_masks(columns, DOCUMENT_CHECKS, optional=tuple(DOCUMENT_CHECKS))
+    out = [""] * len(block)
+    for col, mask in masks.items():
+        msg = f"{col}: {bv.ERROR_MESSAGES[DOCUMENT_CHECKS[col]]}"
+        for i in mask.nonzero()[0]:
+            out[i] = f"{out[i]}; {msg}" if out[i] else msg
+    return out
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        parts = []
+        for err in e.errors():
+            loc = ".".join(str(x) for x in err.get("loc", ()))
+            parts.append(f"{loc}: {err.get('msg')}")
+        return "; ".join(parts)
+    return str(e)
+
+
+# -------------------- MONTAGEM (MESMO FORMATO DO PORTAL) --------------------
+
+def _br_date(d: Optional[date]) -> str:
+    return d.strftime(_DATE_FMT_BR) if d else ""
+
+
+def build_submission(cr: CourierRequest, row: Dict[str, str], request_id: str, created_at: str) -> Submission:
+    """Monta (request_row, vehicle_row) no mesmo formato que o portal envia (linhas pelos
+    builders compartilhados de submissions)."""
+    d = cr.driver
+    is_motorista = d.funcao == "Motorista"
+    meta = {k: row.get(k, "") for k in META_COLUMNS}
+    sigla_cielo = meta["sigla_base_cielo"].upper()
+
+    payload = {
+        "request_id": request_id,
+        "tipo_solicitacao": "CADASTRO",
+        "origem": "IMPORTACAO",
+        "role": "MOTORISTA" if is_motorista else "AJUDANTE",
+        "has_vehicle": cr.with_vehicle,
+
+        "base_nome": meta["base_nome"],
+        "base_uf": meta["base_uf"],
+        "sigla_base_cielo": sigla_cielo,
+        "sigla_base_geral": meta["sigla_base_geral"].upper(),
+        "modalidade": meta["modalidade"],
+
+        "dados_pessoais": {
+            "nome": d.nome,
+            "genero": d.genero,
+            "data_nascimento": _br_date(d.data_nascimento),
+            "cpf": d.cpf,
+            "rg": d.rg,
+            "orgao_exp": d.orgao_exp.strip().upper(),
+            "data_emissao": _br_date(d.data_emissao),
+            "nome_pai": d.nome_pai or "Não Informado",
+            "nome_mae": d.nome_mae,
+            "funcao": d.funcao,
+            "perfil": d.perfil,
+        },
+        "endereco": {
+            "cep": d.cep,
+            "uf": d.uf,
+            "cidade": v.normalize_name(d.cidade),
+            "bairro": v.normalize_name(d.bairro),
+            "logradouro": d.logradouro.strip(),
+            "numero": d.numero,
+            "complemento": (d.complemento or "").strip(),
+        },
+        "contato": {
+            "telefone": d.telefone or "",
+            "celular": d.celular,
+            "telefone_comercial": d.telefone_comercial or "",
+            "email": (d.email or "").strip(),
+        },
+        "habilitacao": {
+            "numero_registro": d.cnh_registro,
+            "cnh_no": d.cnh_numero,
+            "categoria": d.cnh_categoria,
+            "validade": _br_date(d.cnh_validade),
+            "uf_cnh": d.cnh_uf,
+        } if is_motorista else None,
+        "centro_custos": {
+            "empresa_centro_custo": d.empresa_centro_custo,
+            "responsavel_faturamento": d.responsavel_faturamento,
+        },
+    }
+
+    request_row = build_request_row(
+        payload, created_at, meta["base_estado"],
+        requester_name=meta["requester_name"], requester_org=meta["requester_org"],
+    )
+
+    if not cr.vehicle:
+        return request_row, None
+
+    veh = cr.vehicle
+    own = veh.proprietario
+    fisica = own.owner_type == "Fisica"
+    aluguel = veh.categoria == "Aluguel"
+    rntrc = (veh.rntrc or "") if aluguel else ""
+    validade_rntrc = (veh.rntrc_validade or "") if aluguel else ""
+    vehicle_payload = {
+        "placa": veh.placa,
+        "tipo_veiculo": veh.tipo_veiculo,
+        "chassi": veh.chassi,
+        "ano_fabricacao": veh.ano_fabricacao,
+        "marca": veh.marca.strip(),
+        "modelo": veh.modelo.strip(),
+        "cor": veh.cor.strip(),
+        "renavam": veh.renavam,
+        "uf_veiculo": veh.uf,
+        "cidade_veiculo": v.normalize_name(veh.cidade),
+        "categoria_veiculo": veh.categoria,
+        "rntrc": rntrc,
+        "validade_rntrc": validade_rntrc,
+        "proprietario_tipo": "Física" if fisica else "Jurídica",
+        "proprietario_doc": own.cpf if fisica else own.cnpj,
+        "proprietario_rg_ie": own.rg if fisica else own.inscricao_estadual,
+        "proprietario_uf": own.uf,
+        "proprietario_nome": own.nome if fisica else own.razao_social,
+        "proprietario_mae": own.nome_mae if fisica else "",
+        "proprietario_celular": own.celular if fisica else "",
+        "proprietario_nascimento": _br_date(own.data_nascimento) if fisica else "",
+        "data_licenciamento": _br_date(veh.data_licenciamento),
+    }
+    return request_row, build_vehicle_row(request_id, vehicle_payload)
+
+
+# -------------------- IMPORTAÇÃO --------------------
+
+def _default_submit(batch: Sequence[SubmitItem]) -> List[SubmitResult]:
+    import db_supabase
+    return db_supabase.portal_submit_requests(batch)
+
+
+def import_rows(
+    rows: Iterator[Dict[str, str]],
+    submit: Optional[SubmitFn] = None,
+    chunk_size: int = 200,
+    dry_run: bool = False,
+    max_errors: int = 1000,
+    partner: Optional[str] = None,
+    day: Optional[str] = None,
+    force: bool = False,
+) -> ImportReport:
+    """Valida e submete as linhas em blocos de chunk_size. dry_run só valida.
+
+    As chaves de idempotência são CPF + função + day (padrão: hoje), escopadas por partner
+    ou, sem ele, pela coluna requester_org da linha. force=True torna o dia único: reenvia
+    mesmo as linhas já importadas.
+    """
+    submit = submit or _default_submit
+    day = day or date.today().isoformat()
+    if force:
+        day = f"{day}:{uuid.uuid4().hex}"
+    report = ImportReport()
+    chunk: List[SubmitItem] = []
+    chunk_lines: List[Tuple[int, str]] = []
+    t0 = time.perf_counter()
+
+    def _flush() -> None:
+        if not chunk:
+            return
+        try:
+            results = submit(chunk)
+        except Exception as e:
+            results = [SubmitResult(it.idempotency_key, False, error=str(e)) for it in chunk]
+        for (line, cpf), res in zip(chunk_lines, results):
+            if res.ok:
+                report.submitted += 1
+                report.duplicates += int(res.duplicate)
+            else:
+                report.submit_failed += 1
+                report.add_error(RowError(line, cpf, f"Submissão: {res.error}"), max_errors)
+        chunk.clear()
+        chunk_lines.clear()
+
+    rows = iter(rows)
+    line = 1
+    while True:
+        block = list(itertools.islice(rows, chunk_size))
+        if not block:
+            break
+        for row, doc_error in zip(block, document_errors(block)):
+            line += 1
+            report.total += 1
+            try:
+                if doc_error:
+                    raise ValueError(doc_error)
+                cr = parse_row(row)
+            except (ValidationError, ValueError) as e:
+                report.invalid += 1
+                report.add_error(RowError(line, row.get("cpf", ""), _error_message(e)), max_errors)
+                continue
+
+            report.valid += 1
+            if dry_run:
+                continue
+            created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            req, veh = build_submission(cr, row, new_request_id(), created_at)
+            key = import_idempotency_key(
+                partner or row.get("requester_org") or "", cr.driver.cpf, cr.driver.funcao, day,
+            )
+            chunk.append(SubmitItem(req, veh, key))
+            chunk_lines.append((line, cr.driver.cpf))
+            if len(chunk) >= chunk_size:
+                _flush()
+
+    _flush()
+    report.elapsed_s = time.perf_counter() - t0
+    return report
+
+
+def import_file(path: Path, **kwargs: Any) -> ImportReport:
+    """Importa o arquivo; kwargs vão para import_rows (partner, day, force, ...)."""
+    return import_rows(iter_rows(Path(path)), **kwargs)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Importa couriers em lote a partir de CSV/XLSX.")
+    ap.add_argument("arquivo", type=Path)
+    ap.add_argument("--chunk-size", type=int, default=200)
+    ap.add_argument("--dry-run", action="store_true", help="só valida, não submete")
+    ap.add_argument("--errors-csv", type=Path, help="grava os erros por linha neste CSV")
+    ap.add_argument("--parceiro", help="escopo das chaves de idempotência (padrão: coluna requester_org)")
+    ap.add_argument("--dia", help="dia das chaves, AAAA-MM-DD (padrão: hoje); use o da importação original ao reenviar")
+    ap.add_argument("--force", action="store_true", help="reenvia mesmo as linhas já importadas")
+    args = ap.parse_args(argv)
+
+    report = import_file(
+        args.arquivo, partner=args.parceiro, day=args.dia, force=args.force,
+        chunk_size=args.chunk_size, dry_run=args.dry_run,
+    )
+    print(report.summary())
+
+    if args.errors_csv and report.errors:
+        with args.errors_csv.open("w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(["linha", "cpf", "erro"])
+            w.writerows(report.errors)
+    elif report.errors:
+        for err in report.errors[:20]:
+            print(f"  linha {err.line} (CPF {err.cpf or '—'}): {err.message}")
+    if report.errors_truncated:
+        print(f"  ... e mais {report.errors_truncated} erros não listados")
+    return 0 if report.invalid == 0 and report.submit_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
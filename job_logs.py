@@ -0,0 +1,257 @@
+"""
+Logs estruturados (JSON lines) dos jobs, em settings.logs_dir().
+
+- logs/worker.jsonl: stream global, rotacionado por tamanho/tempo para
+  worker-<aaaammddThhmmss>.jsonl.gz (mantém os últimos CCR_LOG_BACKUPS).
+- logs/jobs/job-<id>.jsonl: um stream por job, compactado (.gz) quando o job termina e
+  descompactado de volta se o job rodar de novo.
+
+Quem loga só enfileira o registro; uma thread de fundo agrupa, grava e faz a rotação, então
+a automação nunca espera disco. A coluna jobs.log guarda só um ponteiro
+"jobs/job-<id>.jsonl#<offset>" para o início da tentativa atual (ver read_job_log).
+
+Overrides por env var:
+  - CCR_LOG_MAX_BYTES: tamanho para rotacionar o stream global (padrão 10 MB)
+  - CCR_LOG_ROTATE_S: idade para rotacionar o stream global (padrão 24h)
+  - CCR_LOG_BACKUPS: arquivos rotacionados mantidos (padrão 14)
+"""
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+import settings
+
+GLOBAL_STREAM = "worker.jsonl"
+_MAX_OPEN_JOB_FILES = 64
+
+
+def _job_rel(job_id: int) -> str:
+    return f"jobs/job-{int(job_id)}.jsonl"
+
+
+def _gzip_file(src: Path, dst: Path) -> None:
+    with open(src, "rb") as fin, gzip.open(dst, "wb") as fout:
+        shutil.copyfileobj(fin, fout)
+    src.unlink()
+
+
+def _gunzip_file(src: Path, dst: Path) -> None:
+    with gzip.open(src, "rb") as fin, open(dst, "wb") as fout:
+        shutil.copyfileobj(fin, fout)
+    src.unlink()
+
+
+class JobLogger:
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.root = root or settings.logs_dir()
+        self.max_bytes = int(os.environ.get("CCR_LOG_MAX_BYTES", 10 * 1024 * 1024))
+        self.rotate_s = float(os.environ.get("CCR_LOG_ROTATE_S", 24 * 3600))
+        self.backups = int(os.environ.get("CCR_LOG_BACKUPS", 14))
+        self._q: "queue.Queue[Any]" = queue.Queue()
+        self._files: Dict[str, IO[str]] = {}      # rel -> handle (ordem de uso)
+        self._global_opened_at = 0.0
+        self.stats: Dict[str, int] = {"records": 0, "batches": 0, "rotations": 0, "errors": 0}
+        (self.root / "jobs").mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="job-logs", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- API (não bloqueia, exceto start_job/flush) ----
+
+    def log(
+        self,
+        level: str,
+        message: str,
+        job_id: Optional[int] = None,
+        request_id: Optional[str] = None,
+        **fields: Any,
+    ) -> None:
+        rec: Dict[str, Any] = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level.upper(),
+            "msg": message,
+        }
+        if job_id is not None:
+            rec["job_id"] = job_id
+        if request_id is not None:
+            rec["request_id"] = request_id
+        rec.update(fields)
+        self._q.put(("rec", job_id, rec))
+
+    def start_job(self, job_id: int) -> str:
+        """Marca o início de uma tentativa e retorna o ponteiro para jobs.log."""
+        fut: "Future[str]" = Future()
+        self._q.put(("start", job_id, fut))
+        return fut.result()
+
+    def finish_job(self, job_id: int) -> None:
+        """Fecha e compacta o stream do job."""
+        self._q.put(("finish", job_id, None))
+
+    def flush(self) -> None:
+        fut: "Future[str]" = Future()
+        self._q.put(("flush", None, fut))
+        fut.result()
+
+    def close(self) -> None:
+        if not self._thread.is_alive():
+            return
+        self._q.put(("stop", None, None))
+        self._thread.join(10)
+
+    # ---- thread de gravação ----
+
+    def _open(self, rel: str) -> IO[str]:
+        fh = self._files.pop(rel, None)
+        if fh is None:
+            path = self.root / rel
+            gz = path.with_name(path.name + ".gz")
+            if not path.exists() and gz.exists():
+                _gunzip_file(gz, path)  # job rodando de novo: os offsets antigos continuam valendo
+            fh = open(path, "a", encoding="utf-8")
+            if rel == GLOBAL_STREAM:
+                self._global_opened_at = time.time()
+            while len(self._files) >= _MAX_OPEN_JOB_FILES:
+                self._files.pop(next(iter(self._files))).close()
+        self._files[rel] = fh  # reinsere no fim: mais recente
+        return fh
+
+    def _close(self, rel: str) -> None:
+        fh = self._files.pop(rel, None)
+        if fh is not None:
+            fh.close()
+
+    def _maybe_rotate_global(self) -> None:
+        path = self.root / GLOBAL_STREAM
+        fh = self._files.get(GLOBAL_STREAM)
+        size = fh.tell() if fh is not None else (path.stat().st_size if path.exists() else 0)
+        if size == 0:
+            return
+        too_old = fh is not None and time.time() - self._global_opened_at >= self.rotate_s
+        if size < self.max_bytes and not too_old:
+            return
+        self._close(GLOBAL_STREAM)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        rotated = self.root / f"worker-{stamp}.jsonl"
+        n = 1
+        while rotated.exists() or rotated.with_name(rotated.name + ".gz").exists():
+            rotated = self.root / f"worker-{stamp}-{n}.jsonl"
+            n += 1
+        os.replace(path, rotated)
+        _gzip_file(rotated, rotated.with_name(rotated.name + ".gz"))
+        self.stats["rotations"] += 1
+        for old in sorted(self.root.glob("worker-*.jsonl.gz"), key=lambda p: p.stat().st_mtime)[: -self.backups or None]:
+            old.unlink()
+
+    def _write_batch(self, lines: Dict[str, List[str]]) -> None:
+        for rel, chunk in lines.items():
+            fh = self._open(rel)
+            fh.write("".join(chunk))
+            fh.flush()
+        self.stats["batches"] += 1
+
+    def _handle_control(self, kind: str, job_id: Optional[int], fut: Any) -> None:
+        if kind == "start":
+            rel = _job_rel(job_id)  # type: ignore[arg-type]
+            fh = self._open(rel)
+            fut.set_result(f"{rel}#{fh.tell()}")
+        elif kind == "finish":
+            rel = _job_rel(job_id)  # type: ignore[arg-type]
+            self._close(rel)
+            path = self.root / rel
+            if path.exists():
+                _gzip_file(path, path.with_name(path.name + ".gz"))
+        elif kind == "flush":
+            fut.set_result("")
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            items = [self._q.get()]
+            while True:
+                try:
+                    items.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            lines: Dict[str, List[str]] = {}
+            try:
+                self._maybe_rotate_global()
+                for kind, job_id, payload in items:
+                    if kind == "rec":
+                        line = json.dumps(payload, ensure_ascii=False, default=str) + "\n"
+                        lines.setdefault(GLOBAL_STREAM, []).append(line)
+                        if job_id is not None:
+                            lines.setdefault(_job_rel(job_id), []).append(line)
+                        self.stats["records"] += 1
+                        continue
+                    # Controles respeitam a ordem: grava o que veio antes deles
+                    self._write_batch(lines)
+                    lines = {}
+                    if kind == "stop":
+                        stop = True
+                    else:
+                        self._handle_control(kind, job_id, payload)
+                self._write_batch(lines)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[job_logs] falha ao gravar logs: {e}", file=sys.stderr)
+                for kind, _, payload in items:
+                    if isinstance(payload, Future) and not payload.done():
+                        payload.set_exception(e)
+        for rel in list(self._files):
+            self._close(rel)
+
+
+def _split_pointer(pointer: str) -> Tuple[str, int]:
+    rel, _, offset = (pointer or "").partition("#")
+    return rel, int(offset or 0)
+
+
+def read_job_log(pointer: str, root: Optional[Path] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Registros da tentativa apontada por jobs.log (do offset até o fim do arquivo)."""
+    rel, offset = _split_pointer(pointer)
+    if not rel:
+        return []
+    path = (root or settings.logs_dir()) / rel
+    gz = path.with_name(path.name + ".gz")
+    if path.exists():
+        fh: IO[bytes] = open(path, "rb")
+    elif gz.exists():
+        fh = gzip.open(gz, "rb")
+    else:
+        return []
+    out: List[Dict[str, Any]] = []
+    with fh:
+        fh.seek(offset)
+        for raw in fh:
+            try:
+                out.append(json.loads(raw))
+            except ValueError:
+                continue  # linha parcial (ainda sendo gravada)
+            if limit is not None and len(out) >= limit:
+                break
+    return out
+
+
+_logger: Optional[JobLogger] = None
+_logger_lock = threading.Lock()
+
+
+def get_job_logger() -> JobLogger:
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = JobLogger()
+        return _logger
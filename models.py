@@ -5,7 +5,7 @@ from typing import Literal, Optional, Union
 
 from pydantic import BaseModel, Field, field_validator
 
-from Cadastro_Brasil_Risk.validators import normalize_name, normalize_cpf, normalize_cep, normalize_phone, only_digits
+from validators import normalize_name, normalize_cpf, normalize_cep, normalize_phone, only_digits
 
 Genero = Literal["Masculino", "Feminino", "Outros"]
 Funcao = Literal["Motorista", "Ajudante"]
@@ -214,9 +214,16 @@ class CourierRequest(BaseModel):
 
 class Job(BaseModel):
     id: int
-    request_id: int
+    request_id: str
     job_type: Literal["STEP1_DRIVER", "STEP2_VEHICLE"]
     status: Literal["PENDING", "QUEUED", "RUNNING", "DONE", "FAILED", "BLOCKED"]
+    priority: int = 100
     attempts: int = 0
+    max_attempts: int = 3
+    available_at: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[str] = None
     last_error: Optional[str] = None
-    log: str = ""
+    log: str = ""  # ponteiro "jobs/job-<id>.jsonl#<offset>" (job_logs.read_job_log)
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
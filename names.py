@@ -0,0 +1,80 @@
+"""
+Normalização de nomes próprios (pessoas, cidades, bairros) para exibição e para busca.
+
+- normalize_name: "MARIA  DA conceição-silva" -> "Maria da Conceição-Silva" (NFC, espaços
+  colapsados, partículas em minúsculas, cada parte de nome composto com inicial maiúscula).
+- name_key: chave sem acento/caixa para busca e deduplicação ("Conceição" == "CONCEICAO").
+
+Nomes se repetem muito (Maria, Silva, cidades), então os resultados ficam num cache LRU
+limitado (CCR_NAME_CACHE_SIZE, padrão 4096 por função).
+Para medir: python benchmarks/bench_names.py
+"""
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+LOWER_PARTS = frozenset({"da", "das", "de", "do", "dos", "e"})
+
+_CACHE_SIZE = int(os.environ.get("CCR_NAME_CACHE_SIZE", 4096))
+
+# Separadores dentro de um nome composto (mantidos): hífen e apóstrofos (D'Ávila)
+_RE_JOINERS = re.compile(r"([-'’])")
+_RE_KEY_SEPARATORS = re.compile(r"[\s\-'’.]+")
+
+
+def _nfc(s: str) -> str:
+    # Caminho rápido: texto digitado quase sempre já está em NFC (e ASCII sempre está)
+    if s.isascii() or unicodedata.is_normalized("NFC", s):
+        return s
+    return unicodedata.normalize("NFC", s)
+
+
+def _capitalize(part: str) -> str:
+    return part[:1].upper() + part[1:]
+
+
+def _normalize_word(word: str) -> str:
+    w = word.lower()
+    if w in LOWER_PARTS:
+        return w
+    if "-" in w or "'" in w or "’" in w:
+        return "".join([_capitalize(p) for p in _RE_JOINERS.split(w)])
+    return w[:1].upper() + w[1:]
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_name(s: str) -> str:
+    return " ".join([_normalize_word(w) for w in _nfc(s).split()])
+
+
+def normalize_name(name: str) -> str:
+    """Nome para exibição: "JOSÉ DOS SANTOS" -> "José dos Santos"."""
+    if not name:
+        return ""
+    return _normalize_name(name)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _name_key(s: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", s)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return " ".join(_RE_KEY_SEPARATORS.split(folded)).strip()
+
+
+def name_key(name: str) -> str:
+    """Chave de busca/deduplicação: sem acentos, sem caixa, hífens/apóstrofos viram espaço."""
+    if not name:
+        return ""
+    return _name_key(name)
+
+
+def cache_info() -> dict:
+    return {"normalize_name": _normalize_name.cache_info(), "name_key": _name_key.cache_info()}
+
+
+def cache_clear() -> None:
+    _normalize_name.cache_clear()
+    _name_key.cache_clear()
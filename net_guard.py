@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
 import streamlit as st
 
 def _is_ssl_error(msg: str) -> bool:
@@ -26,35 +30,120 @@ def _ssl_help_message() -> str:
         "Depois feche e reabra o terminal e rode o app novamente."
     )
 
+class _ProbeState:
+    """Último resultado conhecido de um probe, compartilhado por todas as sessões."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.ok_at: Optional[float] = None      # monotonic do último sucesso
+        self.error: Optional[BaseException] = None
+        self.refreshing = False
+
+
+_PROBES: Dict[str, _ProbeState] = {}
+_PROBES_LOCK = threading.Lock()
+
+
+def _ttl_s() -> float:
+    """Por quanto tempo um probe bem-sucedido é considerado fresco. Override: CCR_HEALTH_TTL_S."""
+    return float(os.environ.get("CCR_HEALTH_TTL_S", "60"))
+
+
+def _stale_s() -> float:
+    """Idade máxima para ainda confiar no último sucesso enquanto re-testa em background.
+    Override: CCR_HEALTH_STALE_S."""
+    return float(os.environ.get("CCR_HEALTH_STALE_S", "600"))
+
+
+def _state(name: str) -> _ProbeState:
+    with _PROBES_LOCK:
+        s = _PROBES.get(name)
+        if s is None:
+            s = _PROBES[name] = _ProbeState()
+        return s
+
+
+def _run_probe(state: _ProbeState, probe: Callable[[], Any]) -> None:
+    try:
+        probe()
+    except Exception as e:
+        with state.lock:
+            state.error = e
+            state.ok_at = None
+        raise
+    with state.lock:
+        state.error = None
+        state.ok_at = time.monotonic()
+
+
+def _refresh_in_background(state: _ProbeState, probe: Callable[[], Any]) -> None:
+    def _target() -> None:
+        try:
+            _run_probe(state, probe)
+        except Exception:
+            pass  # fica registrado em state.error; o próximo rerun re-testa bloqueando
+        finally:
+            with state.lock:
+                state.refreshing = False
+
+    threading.Thread(target=_target, name="net-guard-probe", daemon=True).start()
+
+
+def _check(name: str, probe: Callable[[], Any]) -> None:
+    """
+    Executa o probe apenas quando necessário:
+    - sucesso há menos de TTL: não faz nada;
+    - sucesso mais antigo (até o limite de stale): segue renderizando e re-testa em background;
+    - nunca testado, falhou ou stale demais: testa de forma bloqueante (propaga o erro).
+    """
+    state = _state(name)
+    now = time.monotonic()
+    with state.lock:
+        age = None if state.ok_at is None else now - state.ok_at
+        if age is not None and age < _ttl_s():
+            return
+        if age is not None and age < _stale_s():
+            if not state.refreshing:
+                state.refreshing = True
+                _refresh_in_background(state, probe)
+            return
+    _run_probe(state, probe)
+
+
+def reset_health_cache() -> None:
+    """Esquece os resultados em cache (o próximo require_* testa de novo)."""
+    with _PROBES_LOCK:
+        _PROBES.clear()
+
+
+def _handle_failure(e: Exception, who: str) -> None:
+    msg = str(e)
+    if _is_ssl_error(msg):
+        st.error(f"Falha de SSL ao conectar no Supabase ({who}).")
+        st.info(_ssl_help_message())
+        st.caption(f"SSL_CERT_FILE atual: {os.environ.get('SSL_CERT_FILE') or 'NÃO DEFINIDO'}")
+        st.stop()
+    raise e
+
+
 def require_supabase_portal_ok(db_module) -> None:
     """
     Valida que o Portal (ANON/public client) consegue falar com o Supabase via HTTPS.
+    O resultado fica em cache por CCR_HEALTH_TTL_S, então reruns não repetem o PING.
     """
     try:
         # Não precisa existir; o objetivo é só abrir conexão com o Supabase
-        db_module.public_get_status(protocol="PING", cpf_last4="0000")
-        return
+        _check("portal", lambda: db_module.public_get_status(protocol="PING", cpf_last4="0000"))
     except Exception as e:
-        msg = str(e)
-        if _is_ssl_error(msg):
-            st.error("Falha de SSL ao conectar no Supabase (Portal).")
-            st.info(_ssl_help_message())
-            st.caption(f"SSL_CERT_FILE atual: {os.environ.get('SSL_CERT_FILE') or 'NÃO DEFINIDO'}")
-            st.stop()
-        raise
+        _handle_failure(e, "Portal")
+
 
 def require_supabase_admin_ok(db_module) -> None:
     """
     Valida que o Admin (SERVICE ROLE) consegue falar com o Supabase via HTTPS.
+    O resultado fica em cache por CCR_HEALTH_TTL_S, então reruns não repetem o probe.
     """
     try:
-        db_module.list_requests_admin(limit=1)
-        return
+        _check("admin", lambda: db_module.list_requests_admin(limit=1))
     except Exception as e:
-        msg = str(e)
-        if _is_ssl_error(msg):
-            st.error("Falha de SSL ao conectar no Supabase (Admin).")
-            st.info(_ssl_help_message())
-            st.caption(f"SSL_CERT_FILE atual: {os.environ.get('SSL_CERT_FILE') or 'NÃO DEFINIDO'}")
-            st.stop()
-        raise
+        _handle_failure(e, "Admin")
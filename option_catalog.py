@@ -0,0 +1,104 @@
+"""
+Catálogo por tenant de <option> rótulo -> value dos selects do Brasil Risk.
+
+Centro de custo e responsável pelo faturamento têm values diferentes em cada tenant e são
+escolhidos pelo rótulo (config.DEFAULT_CC_EMPRESA / DEFAULT_RESP_FATURAMENTO). Em vez de
+varrer as opções do select a cada preenchimento, o catálogo lê todas de uma vez (um
+evaluate), guarda em runtime_dir()/option_catalog/<tenant>.json com TTL e resolve o rótulo
+num dict. Se um value do catálogo for recusado pela tela, o catálogo é invalidado e relido.
+
+Override por env var:
+  - CCR_BR_OPTIONS_TTL_S: validade do catálogo em disco (padrão 24h)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import settings
+
+_SCRAPE_JS = """
+(selectors) => {
+  const out = {};
+  for (const selector of selectors) {
+    const el = document.querySelector(selector);
+    if (!el || !el.options) continue;
+    out[selector] = Array.from(el.options)
+      .filter((o) => o.value !== "")
+      .map((o) => [o.text.trim(), o.value]);
+  }
+  return out;
+}
+"""
+
+
+def catalog_dir() -> Path:
+    return settings.runtime_dir() / "option_catalog"
+
+
+class OptionCatalog:
+    def __init__(self, tenant: Optional[str] = None, ttl_s: Optional[float] = None) -> None:
+        self.tenant = tenant or os.environ.get("CCR_BR_TENANT", "default")
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.environ.get("CCR_BR_OPTIONS_TTL_S", 24 * 3600))
+        self._lock = asyncio.Lock()
+        self._scraped_at = 0.0
+        self._options: Dict[str, Dict[str, str]] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "scrapes": 0, "invalidations": 0}
+        self._load()
+
+    @property
+    def path(self) -> Path:
+        return catalog_dir() / f"{self.tenant}.json"
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self._scraped_at = float(data.get("scraped_at", 0))
+        self._options = {sel: dict(pairs) for sel, pairs in (data.get("selects") or {}).items()}
+
+    def _save(self) -> None:
+        catalog_dir().mkdir(parents=True, exist_ok=True)
+        data = {"tenant": self.tenant, "scraped_at": self._scraped_at, "selects": self._options}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def is_fresh(self, selectors: Iterable[str]) -> bool:
+        if time.time() - self._scraped_at > self.ttl_s:
+            return False
+        return all(sel in self._options for sel in selectors)
+
+    async def ensure(self, page: Any, selectors: Iterable[str]) -> None:
+        """Lê as opções da página aberta se o catálogo estiver vencido ou incompleto."""
+        selectors = tuple(selectors)
+        if not selectors or self.is_fresh(selectors):
+            return
+        async with self._lock:
+            if self.is_fresh(selectors):
+                return
+            scraped: Dict[str, Any] = await page.evaluate(_SCRAPE_JS, list(selectors))
+            self.stats["scrapes"] += 1
+            # Rótulos repetidos: fica o primeiro, como o select_option(label=) do Playwright
+            self._options = {sel: dict(reversed(pairs)) for sel, pairs in scraped.items()}
+            self._scraped_at = time.time()
+            self._save()
+
+    def resolve(self, selector: str, label: str) -> Optional[str]:
+        value = self._options.get(selector, {}).get(label)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def invalidate(self) -> None:
+        self.stats["invalidations"] += 1
+        self._scraped_at = 0.0
+        self._options = {}
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import base64
+import json
+import re
+from typing import Any, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# Colunas das listagens (sem payload_json, que só é carregado sob demanda)
+SUMMARY_COLUMNS: Tuple[str, ...] = (
+    "request_id",
+    "created_at",
+    "request_type",
+    "role",
+    "nome",
+    "nome_padrao",
+    "cpf",
+    "status_overall",
+    "status_brasil_risk",
+    "status_rlog_cielo",
+    "status_rlog_geral",
+    "status_bringg",
+)
+
+# Colunas usadas na chave do cursor; sempre presentes numa projeção
+KEY_COLUMNS: Tuple[str, ...] = ("created_at", "request_id")
+
+_RE_COLUMN = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class RequestSummary(NamedTuple):
+    """Linha leve de requests para telas de listagem."""
+
+    request_id: str
+    created_at: str
+    request_type: str
+    role: str
+    nome: str
+    nome_padrao: Optional[str]
+    cpf: str
+    status_overall: str
+    status_brasil_risk: str
+    status_rlog_cielo: str
+    status_rlog_geral: str
+    status_bringg: str
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "RequestSummary":
+        return cls(*(row[c] for c in SUMMARY_COLUMNS))
+
+
+class Page(NamedTuple):
+    """Uma página de resultados. next_cursor é None na última página."""
+
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def project_columns(columns: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Valida a projeção pedida e garante as colunas da chave do cursor."""
+    if columns is None:
+        return SUMMARY_COLUMNS
+    out: List[str] = []
+    for c in list(KEY_COLUMNS) + list(columns):
+        if not _RE_COLUMN.match(c or ""):
+            raise ValueError(f"Coluna inválida: {c!r}")
+        if c not in out:
+            out.append(c)
+    return tuple(out)
+
+
+def encode_cursor(created_at: str, request_id: str) -> str:
+    raw = json.dumps([created_at, request_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        created_at, request_id = json.loads(base64.urlsafe_b64decode(cursor + pad))
+        return str(created_at), str(request_id)
+    except Exception:
+        raise ValueError("Cursor de paginação inválido.")
+
+
+def build_page(rows: Sequence[Mapping[str, Any]], limit: int, columns: Optional[Sequence[str]]) -> Page:
+    """Monta a Page a partir de até limit+1 linhas (a linha extra só indica que há mais)."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if columns is None:
+        items: List[Any] = [RequestSummary.from_row(r) for r in rows]
+    else:
+        items = [dict(r) for r in rows]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last["created_at"], last["request_id"])
+    return Page(items=items, next_cursor=next_cursor)
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 import streamlit as st
 
 import validators as v
-import bases
+from base_catalog import CATALOG as BASES
 import db_supabase as db
+from ids import format_protocol, new_request_id, parse_protocol
 from net_guard import require_supabase_portal_ok
+from submissions import build_request_row, build_vehicle_row, new_idempotency_key
 
 
 st.set_page_config(page_title="Cadastro Courier - Portal", layout="wide")
@@ -48,8 +49,13 @@ def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 
-def new_request_id() -> str:
-    return str(uuid.uuid4())[:8].upper()
+def draft_idempotency_key(slot: str = "draft_idem_key") -> str:
+    # Uma chave por rascunho: duplo clique ou retry reenviam a mesma e não duplicam a solicitação
+    key = st.session_state.get(slot)
+    if not key:
+        key = new_idempotency_key()
+        st.session_state[slot] = key
+    return key
 
 
 def status_badge(status: str) -> str:
@@ -87,7 +93,7 @@ def portal_acompanhar_view() -> None:
 
     c1, c2 = st.columns(2)
     with c1:
-        protocol = st.text_input("Request ID (Protocolo)", value="", placeholder="Ex.: 1A2B3C4D")
+        protocol = st.text_input("Request ID (Protocolo)", value="", placeholder="Ex.: 02M37FQ-417VAT3")
     with c2:
         last4 = st.text_input("Últimos 4 dígitos do CPF", value="", placeholder="Ex.: 8901", max_chars=4)
 
@@ -97,8 +103,10 @@ def portal_acompanhar_view() -> None:
                 raise ValueError("Informe o Request ID.")
             if not last4.strip().isdigit() or len(last4.strip()) != 4:
                 raise ValueError("Informe os últimos 4 dígitos do CPF (4 números).")
+            # Rejeita erro de digitação (dígito verificador) antes de consultar o Supabase
+            request_id = parse_protocol(protocol)
 
-            rows = db.public_get_status(protocol.strip(), last4.strip())
+            rows = db.public_get_status(request_id, last4.strip())
             if not rows:
                 st.warning("Nada encontrado. Verifique Request ID e os últimos 4 dígitos do CPF.")
                 return
@@ -175,9 +183,12 @@ def portal_descredenciamento_form() -> None:
                 "payload_json": payload,
             }
 
-            db.portal_submit_request(request_row, None)
+            request_id = db.portal_submit_request(
+                request_row, None, idempotency_key=draft_idempotency_key("descred_idem_key")
+            )
+            st.session_state.pop("descred_idem_key", None)
 
-            st.success(f"Solicitação registrada com sucesso. Request ID: {request_id}")
+            st.success(f"Solicitação registrada com sucesso. Request ID: {format_protocol(request_id)}")
             st.info("Use o Request ID + últimos 4 dígitos do CPF para acompanhar o status.")
         except Exception as e:
             st.error(str(e))
@@ -272,39 +283,7 @@ def build_payload_from_session(request_id: str) -> Dict[str, Any]:
 
 def build_request_row_from_session(request_id: str, cnh_ack: bool) -> Dict[str, Any]:
     payload = build_payload_from_session(request_id=request_id)
-
-    return {
-        "request_id": request_id,
-        "created_at": utc_now_iso(),
-        "request_type": "CADASTRO",
-        "role": "Motorista" if is_motorista() else "Ajudante",
-        "has_vehicle": bool(st.session_state.get("portal_has_vehicle")),
-
-        "nome": st.session_state.get("draft_nome"),
-        "nome_padrao": st.session_state.get("draft_nome_padrao"),
-        "cpf": st.session_state.get("draft_cpf"),
-
-        "base_estado": st.session_state.get("draft_estado"),
-        "base_nome": st.session_state.get("draft_base_nome"),
-        "base_uf": st.session_state.get("draft_base_uf"),
-        "sigla_cielo": st.session_state.get("draft_sigla_cielo"),
-        "sigla_geral": st.session_state.get("draft_sigla_geral"),
-        "modalidade": st.session_state.get("draft_modalidade"),
-
-        "requester_name": None,
-        "requester_org": None,
-
-        "cnh_ack": bool(cnh_ack) if is_motorista() else False,
-        "cnh_received": False,
-
-        "status_overall": "Aguardando",
-        "status_brasil_risk": "Aguardando",
-        "status_rlog_cielo": "Aguardando",
-        "status_rlog_geral": "Aguardando",
-        "status_bringg": "Aguardando",
-
-        "payload_json": payload,
-    }
+    return build_request_row(payload, utc_now_iso(), st.session_state.get("draft_estado"), cnh_ack=cnh_ack)
 
 
 def cadastro_form_step1() -> None:
@@ -318,22 +297,31 @@ def cadastro_form_step1() -> None:
     if "ui_modalidade" not in st.session_state:
         st.session_state["ui_modalidade"] = st.session_state.get("draft_modalidade", MODALIDADES[0])
 
+    # Siglas conhecidas no catálogo da base escolhida (rerun anterior) preenchem o padrão
+    base_sel = BASES.get(st.session_state.get("ui_base_nome", ""))
+
     b1, b2, b3, b4 = st.columns([3, 1, 2, 2])
     with b1:
-        estados = [""] + list(bases.BASES_POR_ESTADO.keys())
-        estado = st.selectbox("Estado *", estados, key="ui_estado")
+        estado = st.selectbox("Estado *", BASES.estado_options, key="ui_estado")
     with b2:
-        uf_base = bases.ESTADO_PARA_UF.get(estado, "")
+        uf_base = BASES.uf(estado)
         st.text_input("UF (auto)", value=uf_base, disabled=True)
     with b3:
-        sigla_cielo = st.text_input("Sigla da Base (Cielo) *", value=st.session_state.get("draft_sigla_cielo", ""), placeholder="Ex.: CJR")
+        sigla_cielo = st.text_input(
+            "Sigla da Base (Cielo) *",
+            value=st.session_state.get("draft_sigla_cielo") or (base_sel.sigla_cielo if base_sel else ""),
+            placeholder="Ex.: CJR",
+        )
     with b4:
-        sigla_geral = st.text_input("Sigla da Base (Geral) *", value=st.session_state.get("draft_sigla_geral", ""), placeholder="Ex.: CJR")
+        sigla_geral = st.text_input(
+            "Sigla da Base (Geral) *",
+            value=st.session_state.get("draft_sigla_geral") or (base_sel.sigla_geral if base_sel else ""),
+            placeholder="Ex.: CJR",
+        )
 
     b5, b6 = st.columns([4, 3])
     with b5:
-        bases_list = bases.BASES_POR_ESTADO.get(estado, [])
-        base_nome = st.selectbox("Nome da Base *", [""] + bases_list, key="ui_base_nome")
+        base_nome = st.selectbox("Nome da Base *", BASES.base_options(estado), key="ui_base_nome")
     with b6:
         modalidade = st.selectbox("Modalidade do Courier?", MODALIDADES, key="ui_modalidade")
 
@@ -449,7 +437,7 @@ def cadastro_form_step1() -> None:
                 estado_v = st.session_state.get("ui_estado", "")
                 base_nome_v = st.session_state.get("ui_base_nome", "")
                 modalidade_v = st.session_state.get("ui_modalidade", "")
-                uf_base_v = bases.ESTADO_PARA_UF.get(estado_v, "")
+                uf_base_v = BASES.uf(estado_v)
 
                 nome_n = v.normalize_name(nome)
                 cpf = v.validate_exact_digits("CPF", cpf_in, 11)
@@ -478,6 +466,8 @@ def cadastro_form_step1() -> None:
                     raise ValueError("Estado é obrigatório.")
                 if not base_nome_v:
                     raise ValueError("Nome da Base é obrigatório.")
+                if not BASES.is_base_in_estado(base_nome_v, estado_v):
+                    raise ValueError("A base escolhida não pertence ao estado selecionado.")
                 if not uf_base_v:
                     raise ValueError("UF da Base não pôde ser inferida. Verifique o mapeamento.")
                 if not sigla_cielo.strip() or not sigla_geral.strip():
@@ -728,38 +718,16 @@ def cadastro_form_step2_vehicle() -> None:
                     "data_licenciamento": data_lic.strip(),
                 }
 
-                vehicle_row = {
-                    "request_id": request_id,
-                    "placa": placa.strip().upper(),
-                    "tipo_veiculo": tipo,
-                    "chassi": chassi.strip(),
-                    "ano_fabricacao": int(v.only_digits(ano)),
-                    "marca": marca.strip(),
-                    "modelo": modelo.strip(),
-                    "cor": cor.strip(),
-                    "renavam": v.only_digits(renavam),
-                    "uf": uf_veic,
-                    "cidade": v.normalize_name(cidade_veic),
-                    "categoria": categoria,
-                    "rntrc": rntrc.strip() if categoria == "Aluguel" else "",
-                    "validade_rntrc": validade_rntrc.strip() if categoria == "Aluguel" else "",
-                    "proprietario_tipo": pt,
-                    "proprietario_doc": v.only_digits(doc),
-                    "proprietario_rg_ie": v.only_digits(rg_prop),
-                    "proprietario_uf": uf_prop,
-                    "proprietario_nome": v.normalize_name(nome_prop) if pt == "Física" else nome_prop.strip(),
-                    "proprietario_nasc": nasc_prop.strip() if pt == "Física" else "",
-                    "proprietario_mae": v.normalize_name(mae_prop) if pt == "Física" else "",
-                    "proprietario_celular": v.only_digits(cel_prop),
-                    "payload_json": vehicle_payload,
-                }
+                vehicle_row = build_vehicle_row(request_id, vehicle_payload)
 
-                db.portal_submit_request(request_row, vehicle_row)
+                request_id = db.portal_submit_request(
+                    request_row, vehicle_row, idempotency_key=draft_idempotency_key()
+                )
 
-                st.success(f"Solicitação registrada. Request ID: {request_id}")
+                st.success(f"Solicitação registrada. Request ID: {format_protocol(request_id)}")
                 st.info(
                     "Envie a CNH por canal corporativo e informe no assunto:\n"
-                    f"CNH - RequestID {request_id} - CPF {request_row['cpf']}"
+                    f"CNH - RequestID {format_protocol(request_id)} - CPF {request_row['cpf']}"
                 )
 
                 clear_draft()
@@ -796,9 +764,11 @@ def cadastro_review_no_vehicle() -> None:
                 request_id = new_request_id()
                 request_row = build_request_row_from_session(request_id=request_id, cnh_ack=False)
 
-                db.portal_submit_request(request_row, None)
+                request_id = db.portal_submit_request(
+                    request_row, None, idempotency_key=draft_idempotency_key()
+                )
 
-                st.success(f"Solicitação registrada. Request ID: {request_id}")
+                st.success(f"Solicitação registrada. Request ID: {format_protocol(request_id)}")
                 st.info("Use o Request ID + últimos 4 dígitos do CPF para acompanhar o status.")
                 clear_draft()
                 st.session_state["portal_mode"] = "HOME"
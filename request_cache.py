@@ -0,0 +1,98 @@
+"""
+Cache read-through (LRU) de requests/payloads/veículos já decodificados, por request_id.
+
+Usado por db.py e db_supabase.py (namespaces "local" e "supabase"). Cada request_id tem um
+contador de versão: toda escrita (update_request_fields / update_request_admin) incrementa
+a versão, e uma leitura que começou antes da escrita não consegue gravar no cache um valor
+que já nasceu velho. Linhas inexistentes não são guardadas.
+
+Cada chamada devolve uma cópia profunda do valor guardado: quem chama pode alterar o
+payload à vontade sem corromper o cache para os outros leitores.
+
+Overrides por env var:
+  - CCR_REQUEST_CACHE_SIZE: entradas mantidas (padrão 512)
+  - CCR_REQUEST_CACHE_TTL_S: idade máxima de uma entrada (padrão 30 s; limita o atraso de
+    escritas feitas por outro processo, que não invalidam este cache)
+"""
+from __future__ import annotations
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_Key = Tuple[str, str, str]  # (namespace, tipo, request_id)
+
+
+class RequestCache:
+    def __init__(self, maxsize: Optional[int] = None, ttl_s: Optional[float] = None) -> None:
+        self.maxsize = maxsize if maxsize is not None else int(os.environ.get("CCR_REQUEST_CACHE_SIZE", 512))
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.environ.get("CCR_REQUEST_CACHE_TTL_S", 30))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[_Key, Tuple[int, float, Any]]" = OrderedDict()
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "invalidations": 0}
+
+    def get_or_load(self, namespace: str, kind: str, request_id: str, loader: Callable[[], Optional[T]]) -> Optional[T]:
+        key = (namespace, kind, request_id)
+        now = time.monotonic()
+        hit: Optional[T] = None
+        with self._lock:
+            version = self._versions.get((namespace, request_id), 0)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version and now - entry[1] < self.ttl_s:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    hit = entry[2]
+                else:
+                    del self._entries[key]
+                    self._stats["stale"] += 1
+            if hit is None:
+                self._stats["misses"] += 1
+        if hit is not None:
+            return copy.deepcopy(hit)  # fora do lock; o valor guardado nunca é alterado
+
+        value = loader()  # fora do lock: I/O
+        if value is None:
+            return None
+
+        with self._lock:
+            if self._versions.get((namespace, request_id), 0) == version:
+                self._entries[key] = (version, now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return copy.deepcopy(value)
+
+    def invalidate(self, namespace: str, request_id: str) -> None:
+        with self._lock:
+            self._versions[(namespace, request_id)] = self._versions.get((namespace, request_id), 0) + 1
+            for kind in [k for ns, k, rid in self._entries if ns == namespace and rid == request_id]:
+                del self._entries[(namespace, kind, request_id)]
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._stats)
+            out["size"] = len(self._entries)
+        lookups = out["hits"] + out["misses"]
+        out["hit_ratio"] = out["hits"] / lookups if lookups else 0.0
+        return out
+
+
+_cache = RequestCache()
+
+
+def get_request_cache() -> RequestCache:
+    return _cache
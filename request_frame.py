@@ -0,0 +1,66 @@
+"""
+Carga colunar de requests direto para um pandas.DataFrame (telas de listagem do admin).
+
+Em vez de um dict por linha (com payload_json inteiro), as linhas do cursor são lidas em
+blocos para uma lista por coluna, e as colunas de baixa cardinalidade (status, tipo, função,
+base) viram dtype category: cada valor distinto é guardado uma vez e as linhas guardam só
+um código inteiro.
+
+Para comparar a memória das representações: python benchmarks/bench_request_rows.py
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+import pandas as pd
+
+from pagination import SUMMARY_COLUMNS
+
+# Colunas do DataFrame: as da listagem mais a base (do payload no SQLite, colunas no Supabase)
+FRAME_COLUMNS: Tuple[str, ...] = SUMMARY_COLUMNS + ("base_nome", "base_uf")
+
+CATEGORY_COLUMNS: Tuple[str, ...] = (
+    "request_type",
+    "role",
+    "status_overall",
+    "status_brasil_risk",
+    "status_rlog_cielo",
+    "status_rlog_geral",
+    "status_bringg",
+    "base_nome",
+    "base_uf",
+)
+
+_FETCH_SIZE = 2000
+
+
+def _to_frame(names: Sequence[str], data: Dict[str, List[Any]]) -> pd.DataFrame:
+    cols: Dict[str, Any] = {}
+    for name in names:
+        values = data[name]
+        cols[name] = pd.Categorical(values) if name in CATEGORY_COLUMNS else values
+    return pd.DataFrame(cols, columns=list(names))
+
+
+def frame_from_cursor(cursor: Any, fetch_size: int = _FETCH_SIZE) -> pd.DataFrame:
+    """DataFrame a partir de um cursor DB-API já executado (lido em blocos de fetch_size)."""
+    names = [d[0] for d in cursor.description]
+    data: Dict[str, List[Any]] = {n: [] for n in names}
+    columns = [data[n] for n in names]
+    while True:
+        chunk = cursor.fetchmany(fetch_size)
+        if not chunk:
+            break
+        for row in chunk:
+            for col, value in zip(columns, row):
+                col.append(value)
+    return _to_frame(names, data)
+
+
+def frame_from_rows(rows: Iterable[Mapping[str, Any]], columns: Sequence[str] = FRAME_COLUMNS) -> pd.DataFrame:
+    """DataFrame a partir de dicts (ex.: respostas do Supabase); colunas ausentes viram None."""
+    data: Dict[str, List[Any]] = {c: [] for c in columns}
+    for row in rows:
+        for c in columns:
+            data[c].append(row.get(c))
+    return _to_frame(columns, data)
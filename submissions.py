@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import validators as v
+
+# Campos que mudam a cada tentativa e não fazem parte da identidade do envio
+_VOLATILE_KEYS = frozenset({"request_id", "created_at"})
+
+
+class SubmitItem(NamedTuple):
+    """Um envio do portal: linha de requests, linha de vehicles (opcional) e chave de idempotência."""
+
+    req: Dict[str, Any]
+    veh: Optional[Dict[str, Any]]
+    idempotency_key: str
+
+
+class SubmitResult(NamedTuple):
+    idempotency_key: str
+    ok: bool
+    request_id: Optional[str] = None
+    duplicate: bool = False   # a chave já tinha sido usada: request_id é o do envio original
+    error: Optional[str] = None
+
+
+def new_idempotency_key() -> str:
+    """Chave aleatória; gere uma por rascunho e reutilize em todos os cliques/retries dele."""
+    return uuid.uuid4().hex
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def content_idempotency_key(scope: str, req: Dict[str, Any], veh: Optional[Dict[str, Any]]) -> str:
+    """Chave determinística pelo conteúdo (ignora request_id/created_at), válida só dentro
+    de scope (ex.: lote, parceiro + dia).
+
+    Sem escopo, um recadastro legítimo com os mesmos dados, meses depois, seria tratado
+    como duplicado e receberia o request_id antigo.
+    """
+    if not scope:
+        raise ValueError("content_idempotency_key exige um escopo (lote, dia...).")
+    canonical = json.dumps(
+        [scope, _strip_volatile(req), _strip_volatile(veh)],
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def import_idempotency_key(partner: str, cpf: str, funcao: str, day: str) -> str:
+    """Chave de uma linha de importação: CPF + função + dia, escopada pelo parceiro.
+
+    Não depende dos bytes do arquivo nem do número da linha: o parceiro que reenvia a
+    planilha corrigida no mesmo dia não duplica as linhas que não mudaram. O mesmo courier
+    em outro dia (recadastro) ou por outro parceiro gera outra chave.
+    """
+    scope = " ".join((partner or "").split()).casefold()
+    return hashlib.sha256(f"import:{scope}:{cpf}:{funcao}:{day}".encode("utf-8")).hexdigest()
+
+
+SubmitInput = Union[SubmitItem, Sequence[Any]]
+
+
+def as_submit_items(batch: Sequence[SubmitInput]) -> List[SubmitItem]:
+    """Aceita SubmitItem ou tuplas (req, veh, idempotency_key); a chave é obrigatória."""
+    out: List[SubmitItem] = []
+    for i, item in enumerate(batch):
+        key = item[2] if len(item) > 2 else None
+        if not key:
+            raise ValueError(f"Item {i} sem idempotency_key: gere uma por envio (new_idempotency_key).")
+        out.append(item if isinstance(item, SubmitItem) else SubmitItem(item[0], item[1], str(key)))
+    return out
+
+
+def parse_results(items: Sequence[SubmitItem], data: Any) -> List[SubmitResult]:
+    """Converte a resposta do RPC em um SubmitResult por item, na ordem de items."""
+    if isinstance(data, dict):
+        data = data.get("results")
+    if not isinstance(data, list):
+        raise RuntimeError(f"RPC portal_submit_requests retornou formato inesperado: {data}")
+
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for row in data:
+        if isinstance(row, dict) and row.get("idempotency_key"):
+            by_key[str(row["idempotency_key"])] = row
+
+    out: List[SubmitResult] = []
+    for it in items:
+        row = by_key.get(it.idempotency_key)
+        if row is None:
+            out.append(SubmitResult(it.idempotency_key, False, error="Item ausente na resposta do RPC."))
+            continue
+        rid = row.get("request_id")
+        out.append(SubmitResult(
+            idempotency_key=it.idempotency_key,
+            ok=bool(row.get("ok")),
+            request_id=str(rid) if rid else None,
+            duplicate=bool(row.get("duplicate")),
+            error=row.get("error"),
+        ))
+    return out
+
+
+# -------------------- MONTAGEM (PORTAL E IMPORTADOR) --------------------
+# O portal (a partir do session_state) e o importador (a partir dos modelos) montam cada um o
+# payload_json; as linhas de requests/vehicles saem sempre daqui, a partir dele.
+
+_VEHICLE_ROW_FIELDS = (
+    "placa", "tipo_veiculo", "chassi", "marca", "modelo", "cor", "renavam", "rntrc", "validade_rntrc",
+    "proprietario_tipo", "proprietario_doc", "proprietario_rg_ie", "proprietario_uf",
+    "proprietario_nome", "proprietario_mae", "proprietario_celular",
+)
+
+
+def build_request_row(
+    payload: Dict[str, Any],
+    created_at: str,
+    base_estado: Optional[str],
+    requester_name: Optional[str] = None,
+    requester_org: Optional[str] = None,
+    cnh_ack: bool = False,
+) -> Dict[str, Any]:
+    """Linha de requests de um cadastro, a partir do payload_json (que leva o request_id)."""
+    d = payload["dados_pessoais"]
+    is_motorista = str(payload.get("role") or "").upper() == "MOTORISTA"
+    return {
+        "request_id": payload["request_id"],
+        "created_at": created_at,
+        "request_type": "CADASTRO",
+        "role": "Motorista" if is_motorista else "Ajudante",
+        "has_vehicle": bool(payload.get("has_vehicle")),
+
+        "nome": d.get("nome"),
+        "nome_padrao": v.make_nome_padrao(payload.get("sigla_base_cielo") or "", d.get("nome") or "", payload.get("modalidade") or ""),
+        "cpf": d.get("cpf"),
+
+        "base_estado": base_estado,
+        "base_nome": payload.get("base_nome"),
+        "base_uf": payload.get("base_uf"),
+        "sigla_cielo": payload.get("sigla_base_cielo"),
+        "sigla_geral": payload.get("sigla_base_geral"),
+        "modalidade": payload.get("modalidade"),
+
+        "requester_name": requester_name or None,
+        "requester_org": requester_org or None,
+
+        "cnh_ack": bool(cnh_ack) and is_motorista,
+        "cnh_received": False,
+
+        "status_overall": "Aguardando",
+        "status_brasil_risk": "Aguardando",
+        "status_rlog_cielo": "Aguardando",
+        "status_rlog_geral": "Aguardando",
+        "status_bringg": "Aguardando",
+
+        "payload_json": payload,
+    }
+
+
+def build_vehicle_row(request_id: str, vehicle_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de vehicles a partir do payload do veículo (mesmos nomes, exceto uf/cidade/categoria)."""
+    row: Dict[str, Any] = {"request_id": request_id}
+    row.update({k: vehicle_payload.get(k, "") for k in _VEHICLE_ROW_FIELDS})
+    row.update({
+        "ano_fabricacao": int(vehicle_payload["ano_fabricacao"]),
+        "uf": vehicle_payload.get("uf_veiculo"),
+        "cidade": vehicle_payload.get("cidade_veiculo"),
+        "categoria": vehicle_payload.get("categoria_veiculo"),
+        "proprietario_nasc": vehicle_payload.get("proprietario_nascimento", ""),
+        "payload_json": vehicle_payload,
+    })
+    return row
@@ -0,0 +1,90 @@
+-- Envio em lote idempotente do portal (db_supabase.portal_submit_requests).
+--
+-- Cada item é {idempotency_key, req, veh}. A chave é gravada uma única vez junto com o
+-- request_id criado; repetir a chave (duplo clique, retry após timeout, reimportação)
+-- devolve o request_id original com duplicate=true, sem inserir de novo.
+-- A inserção em si reaproveita public.portal_submit_request(req, veh), que devolve
+-- jsonb {ok, request_id}.
+--
+-- Resposta: array jsonb com um objeto por item, na ordem de entrada:
+--   {idempotency_key, ok, request_id, duplicate, error}
+-- Um item com erro não derruba os demais (cada um roda num bloco com EXCEPTION próprio).
+
+create table if not exists public.idempotency_keys (
+    idempotency_key text primary key,
+    request_id text not null references public.requests (request_id) on delete cascade,
+    created_at timestamptz not null default now()
+);
+
+-- Sem policies: anon/authenticated só chegam à tabela pelo RPC (security definer)
+alter table public.idempotency_keys enable row level security;
+revoke all on public.idempotency_keys from anon, authenticated;
+
+
+create or replace function public.portal_submit_requests(items jsonb)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    item jsonb;
+    k text;
+    rid text;
+    res jsonb;
+    results jsonb := '[]'::jsonb;
+begin
+    if jsonb_typeof(items) is distinct from 'array' then
+        raise exception 'portal_submit_requests: items deve ser um array jsonb';
+    end if;
+
+    for item in select value from jsonb_array_elements(items) loop
+        k := nullif(item ->> 'idempotency_key', '');
+        if k is null then
+            results := results || jsonb_build_array(jsonb_build_object(
+                'idempotency_key', k, 'ok', false, 'request_id', null,
+                'duplicate', false, 'error', 'idempotency_key ausente'));
+            continue;
+        end if;
+
+        -- Serializa envios concorrentes da mesma chave até o fim da transação:
+        -- o segundo espera o primeiro e então enxerga a chave já gravada
+        perform pg_advisory_xact_lock(hashtextextended('portal_submit:' || k, 0));
+
+        select ik.request_id into rid from public.idempotency_keys ik where ik.idempotency_key = k;
+        if found then
+            results := results || jsonb_build_array(jsonb_build_object(
+                'idempotency_key', k, 'ok', true, 'request_id', rid,
+                'duplicate', true, 'error', null));
+            continue;
+        end if;
+
+        begin
+            res := public.portal_submit_request(item -> 'req', item -> 'veh');
+            if jsonb_typeof(res) = 'array' then
+                res := res -> 0;
+            end if;
+            rid := res ->> 'request_id';
+            if not coalesce((res ->> 'ok')::boolean, false) or rid is null then
+                raise exception 'portal_submit_request recusou a solicitação: %', res;
+            end if;
+
+            insert into public.idempotency_keys (idempotency_key, request_id) values (k, rid);
+
+            results := results || jsonb_build_array(jsonb_build_object(
+                'idempotency_key', k, 'ok', true, 'request_id', rid,
+                'duplicate', false, 'error', null));
+        exception when others then
+            -- Desfaz só este item (request, vehicle e chave)
+            results := results || jsonb_build_array(jsonb_build_object(
+                'idempotency_key', k, 'ok', false, 'request_id', null,
+                'duplicate', false, 'error', sqlerrm));
+        end;
+    end loop;
+
+    return results;
+end;
+$$;
+
+revoke all on function public.portal_submit_requests(jsonb) from public;
+grant execute on function public.portal_submit_requests(jsonb) to anon, authenticated, service_role;
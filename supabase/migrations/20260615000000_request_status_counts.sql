@@ -0,0 +1,129 @@
+-- Contadores do painel (db_supabase.status_counts_admin / status_funnel_admin).
+--
+-- request_status_counts espelha a tabela local do SQLite (db._migration_0008_request_status_counts):
+-- uma linha por (sistema, status, UF da base, dia de criação em UTC), mantida por trigger em
+-- public.requests. O painel chama request_status_totals, que já devolve uma linha por
+-- (sistema, status), em vez de baixar as linhas por dia e somar no cliente.
+
+create table if not exists public.request_status_counts (
+    system text not null,
+    status text not null,
+    base_uf text not null,
+    day date not null,
+    n integer not null,
+    primary key (system, status, base_uf, day)
+);
+
+-- Leitura só pelo service role (admin); sem policies para anon/authenticated
+alter table public.request_status_counts enable row level security;
+revoke all on public.request_status_counts from anon, authenticated;
+
+
+-- Chaves de contagem de uma linha de requests: uma por sistema (mesmos nomes de db.STATUS_SYSTEMS)
+create or replace function public.request_status_count_keys(r public.requests)
+returns table (system text, status text, base_uf text, day date)
+language sql
+immutable
+as $$
+    select s.system, coalesce(s.status, ''), coalesce(r.base_uf, ''), (r.created_at at time zone 'utc')::date
+    from (values
+        ('overall', r.status_overall),
+        ('brasil_risk', r.status_brasil_risk),
+        ('rlog_cielo', r.status_rlog_cielo),
+        ('rlog_geral', r.status_rlog_geral),
+        ('bringg', r.status_bringg)
+    ) as s (system, status)
+    where r.request_id is not null  -- old em INSERT / new em DELETE: nenhuma chave
+$$;
+
+
+create or replace function public.requests_status_counts_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        update public.request_status_counts c
+        set n = c.n - 1
+        from (
+            select * from public.request_status_count_keys(old)
+            except
+            select * from public.request_status_count_keys(new)
+        ) k
+        where (c.system, c.status, c.base_uf, c.day) = (k.system, k.status, k.base_uf, k.day);
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into public.request_status_counts (system, status, base_uf, day, n)
+        select k.system, k.status, k.base_uf, k.day, 1
+        from (
+            select * from public.request_status_count_keys(new)
+            except
+            select * from public.request_status_count_keys(old)
+        ) k
+        on conflict (system, status, base_uf, day) do update set n = public.request_status_counts.n + 1;
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists requests_status_counts on public.requests;
+create trigger requests_status_counts
+after insert or delete
+or update of status_overall, status_brasil_risk, status_rlog_cielo, status_rlog_geral, status_bringg, base_uf, created_at
+on public.requests
+for each row execute function public.requests_status_counts_trg();
+
+
+-- Recalcula os contadores a partir de requests (carga inicial e reparo)
+create or replace function public.rebuild_request_status_counts()
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    lock table public.requests in share mode;  -- sem escritas concorrentes durante a recontagem
+    delete from public.request_status_counts;
+    insert into public.request_status_counts (system, status, base_uf, day, n)
+    select k.system, k.status, k.base_uf, k.day, count(*)
+    from public.requests r
+    cross join lateral public.request_status_count_keys(r) k
+    group by 1, 2, 3, 4;
+end;
+$$;
+
+select public.rebuild_request_status_counts();
+
+
+-- Totais por (sistema, status); filtros nulos não restringem. Dias inclusivos.
+create or replace function public.request_status_totals(
+    p_system text default null,
+    p_since_day date default null,
+    p_until_day date default null,
+    p_base_uf text default null
+)
+returns table (system text, status text, n bigint)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select c.system, c.status, sum(c.n)::bigint
+    from public.request_status_counts c
+    where c.n > 0
+      and (p_system is null or c.system = p_system)
+      and (p_since_day is null or c.day >= p_since_day)
+      and (p_until_day is null or c.day <= p_until_day)
+      and (p_base_uf is null or c.base_uf = p_base_uf)
+    group by c.system, c.status
+    order by c.system, 3 desc
+$$;
+
+revoke all on function public.request_status_totals(text, date, date, text) from public, anon, authenticated;
+revoke all on function public.rebuild_request_status_counts() from public, anon, authenticated;
+grant execute on function public.request_status_totals(text, date, date, text) to service_role;
+grant execute on function public.rebuild_request_status_counts() to service_role;
@@ -1,8 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+
 import streamlit as st
 from supabase import create_client, Client
 
+# Registro de clients por papel ("public" / "admin"), compartilhado pelo processo
+# inteiro (todas as sessões do Streamlit). Cada client mantém sua própria sessão
+# HTTP keep-alive, então reutilizá-lo evita um novo handshake TLS a cada chamada.
+_LOCK = threading.Lock()
+_CLIENTS: Dict[str, Tuple[str, Client]] = {}
+_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "rebuilds": 0}
+
+
+def _fingerprint(url: str, key: str) -> str:
+    """Identifica a configuração de um client (secrets + CA bundle) sem guardar a chave em claro."""
+    raw = "\n".join([url, key, os.environ.get("SSL_CERT_FILE") or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get_client(role: str, key_name: str) -> Client:
+    url = st.secrets["SUPABASE_URL"]
+    key = st.secrets[key_name]
+    fp = _fingerprint(url, key)
+
+    with _LOCK:
+        cached = _CLIENTS.get(role)
+        if cached is not None and cached[0] == fp:
+            _STATS["hits"] += 1
+            return cached[1]
+
+        # Secrets ou SSL_CERT_FILE mudaram (ou primeiro uso): recria o client.
+        if cached is not None:
+            _STATS["rebuilds"] += 1
+        _STATS["misses"] += 1
+        client = create_client(url, key)
+        _CLIENTS[role] = (fp, client)
+        return client
+
+
 def get_public_client() -> Client:
-    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_ANON_KEY"])
+    return _get_client("public", "SUPABASE_ANON_KEY")
+
 
 def get_admin_client() -> Client:
-    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_SERVICE_ROLE_KEY"])
+    return _get_client("admin", "SUPABASE_SERVICE_ROLE_KEY")
+
+
+def reset_clients() -> None:
+    """Descarta os clients em cache (o próximo get_* recria)."""
+    with _LOCK:
+        _CLIENTS.clear()
+
+
+def client_stats() -> Dict[str, int]:
+    """
+    Contadores do registro de clients:
+    - hits: chamadas que reutilizaram um client (e sua conexão keep-alive) já existente
+    - misses: chamadas que tiveram de criar um client novo
+    - rebuilds: recriações causadas por mudança de secrets/SSL_CERT_FILE
+    - cached: clients vivos no registro
+    """
+    with _LOCK:
+        out = dict(_STATS)
+        out["cached"] = len(_CLIENTS)
+        return out
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def runtime(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Runtime, logs e SQLite isolados em tmp_path: nada é gravado no runtime real."""
+    monkeypatch.setenv("CCR_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setenv("CCR_LOGS_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("CCR_DB_PATH", str(tmp_path / "app.db"))
+    import db
+    from request_cache import get_request_cache
+
+    get_request_cache().clear()  # o cache é do processo; cada teste tem um banco novo
+    db.init_db()
+    yield tmp_path
+    db.close_connection()
+
+
+def _request_row(request_id: str, cpf: str = "52998224725", **fields: Any) -> Dict[str, Any]:
+    row: Dict[str, Any] = {
+        "request_id": request_id,
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "request_type": "CADASTRO",
+        "role": "Motorista",
+        "has_vehicle": False,
+        "nome": "Maria da Silva",
+        "cpf": cpf,
+        "status_overall": "Aguardando",
+        "status_brasil_risk": "Aguardando",
+        "status_rlog_cielo": "Aguardando",
+        "status_rlog_geral": "Aguardando",
+        "status_bringg": "Aguardando",
+        "payload_json": {"base_uf": "SP", "dados_pessoais": {"nome": "Maria da Silva", "cpf": cpf}},
+    }
+    row.update(fields)
+    return row
+
+
+@pytest.fixture
+def request_row() -> Callable[..., Dict[str, Any]]:
+    """Fábrica de linhas de requests no formato enviado pelo portal (payload em payload_json)."""
+    return _request_row
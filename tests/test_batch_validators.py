@@ -0,0 +1,85 @@
+"""Dígitos verificadores de CPF/CNPJ em lote (batch_validators)."""
+from __future__ import annotations
+
+import random
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+import batch_validators as bv
+
+VALID_CPFS = ["529.982.247-25", "11144477735", "168.995.350-09"]
+INVALID_CPFS = [
+    "529.982.247-24",   # segundo dígito verificador errado
+    "529.982.247-15",   # primeiro dígito verificador errado
+    "111.111.111-11",   # repetido: passa no mod 11, mas não existe
+    "00000000000",
+    "5299822472",       # 10 dígitos
+    "529982247250",     # 12 dígitos
+    "abc",
+]
+VALID_CNPJS = ["11.222.333/0001-81", "06990590000123", "33.000.167/0001-01"]
+INVALID_CNPJS = ["11.222.333/0001-82", "11.222.333/0001-71", "00000000000000", "1122233300018"]
+
+
+def _cpf_dv(digits: List[int]) -> int:
+    return sum(d * w for d, w in zip(digits, range(len(digits) + 1, 1, -1))) * 10 % 11 % 10
+
+
+def _cnpj_dv(digits: List[int]) -> int:
+    weights = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2][-len(digits):]
+    r = sum(d * w for d, w in zip(digits, weights)) % 11
+    return 0 if r < 2 else 11 - r
+
+
+def test_cpf_known_values() -> None:
+    check = bv.check_cpf(VALID_CPFS + INVALID_CPFS)
+    assert check.invalid.tolist() == [False] * len(VALID_CPFS) + [True] * len(INVALID_CPFS)
+    assert check.values[: len(VALID_CPFS)].tolist() == ["52998224725", "11144477735", "16899535009"]
+    assert set(check.values[len(VALID_CPFS):].tolist()) == {""}
+
+
+def test_cnpj_known_values() -> None:
+    check = bv.check_cnpj(VALID_CNPJS + INVALID_CNPJS)
+    assert check.invalid.tolist() == [False] * len(VALID_CNPJS) + [True] * len(INVALID_CNPJS)
+    assert check.values[0] == "11222333000181"
+
+
+def test_cpf_matches_scalar_reference() -> None:
+    rng = random.Random(7)
+    valid = []
+    for _ in range(500):
+        d = [rng.randrange(10) for _ in range(9)]
+        d.append(_cpf_dv(d))
+        d.append(_cpf_dv(d))
+        valid.append("".join(map(str, d)))
+    valid = [v for v in valid if len(set(v)) > 1]
+    wrong = [v[:10] + str((int(v[10]) + 1) % 10) for v in valid]
+
+    assert not bv.check_cpf(valid).invalid.any()
+    assert bv.check_cpf(wrong).invalid.all()
+
+
+def test_cnpj_matches_scalar_reference() -> None:
+    rng = random.Random(7)
+    valid = []
+    for _ in range(500):
+        d = [rng.randrange(10) for _ in range(12)]
+        d.append(_cnpj_dv(d))
+        d.append(_cnpj_dv(d))
+        valid.append("".join(map(str, d)))
+    valid = [v for v in valid if len(set(v)) > 1]
+    wrong = [v[:13] + str((int(v[13]) + 1) % 10) for v in valid]
+
+    assert not bv.check_cnpj(valid).invalid.any()
+    assert bv.check_cnpj(wrong).invalid.all()
+
+
+def test_empty_and_column_types() -> None:
+    values = ["", None, "529.982.247-25"]
+    assert bv.check_cpf(values).invalid.tolist() == [True, True, False]
+    assert bv.check_cpf(values, allow_empty=True).invalid.tolist() == [False, False, False]
+    # Series e arrays dão o mesmo resultado que listas
+    series = pd.Series(VALID_CPFS + INVALID_CPFS)
+    assert np.array_equal(bv.check_cpf(series).invalid, bv.check_cpf(np.array(series, dtype=object)).invalid)
@@ -0,0 +1,92 @@
+"""br_mirror: reconciliação só com sinal positivo de fim da lista."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import config
+import db
+from br_mirror import BrMirror
+
+CPFS = ["529.982.247-25", "111.444.777-35", "168.995.350-09"]
+
+
+class _Locator:
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    async def count(self) -> int:
+        return self.n
+
+
+class _Page:
+    """Listagem falsa: pages[n] = (CPFs da página, tem próxima) ou None (página de erro)."""
+
+    def __init__(self, pages: Dict[int, Optional[tuple]]) -> None:
+        self.pages = pages
+        self.url = ""
+        self.current: Optional[tuple] = None
+
+    async def goto(self, url: str) -> None:
+        self.url = url
+        self.current = self.pages.get(int(url.rsplit("=", 1)[1]), ([], False))
+
+    async def inner_text(self, selector: str) -> str:
+        return "Erro ao carregar" if self.current is None else " ".join(self.current[0])
+
+    def locator(self, selector: str) -> _Locator:
+        if self.current is None:
+            return _Locator(0)
+        rows, has_next = self.current
+        counts = {config.LIST_TABLE: 1, config.LIST_ROWS: len(rows), config.LIST_NEXT_PAGE: int(has_next)}
+        return _Locator(counts[selector])
+
+    async def close(self) -> None:
+        pass
+
+
+class _Context:
+    def __init__(self, pages: Dict[int, Optional[tuple]]) -> None:
+        self.pages = pages
+
+    async def new_page(self) -> _Page:
+        return _Page(self.pages)
+
+
+def _full(mirror: BrMirror, pages: Dict[int, Optional[tuple]]) -> int:
+    return asyncio.run(mirror.refresh(_Context(pages), "cpf", full=True))
+
+
+def _seed(keys: List[str]) -> BrMirror:
+    db.mirror_add("cpf", keys)
+    mirror = BrMirror()
+    mirror.load()
+    return mirror
+
+
+def test_last_page_reconciles(runtime: Path) -> None:
+    mirror = _seed(["52998224725", "99999999999"])
+    _full(mirror, {1: (CPFS[:2], True), 2: (CPFS[2:], False)})
+    assert db.mirror_keys("cpf") == {"52998224725", "11144477735", "16899535009"}
+    assert mirror.stats["removed"] == 1 and db.get_mirror_state("cpf")["full_refreshed_at"]
+
+
+def test_empty_table_past_last_page_reconciles(runtime: Path) -> None:
+    mirror = _seed(["99999999999"])
+    _full(mirror, {1: (CPFS, True), 2: ([], False)})
+    assert "99999999999" not in db.mirror_keys("cpf")
+
+
+def test_error_page_mid_listing_does_not_reconcile(runtime: Path) -> None:
+    mirror = _seed(["99999999999"])
+    added = _full(mirror, {1: (CPFS[:1], True), 2: None, 3: (CPFS[1:], False)})
+    assert added == 1
+    assert db.mirror_keys("cpf") == {"99999999999", "52998224725"}
+    assert mirror.stats["incomplete"] == 1 and mirror.stats["removed"] == 0
+    assert db.get_mirror_state("cpf")["full_refreshed_at"] is None
+
+
+def test_reconcile_counts_duplicates_once(runtime: Path) -> None:
+    db.mirror_add("cpf", ["52998224725"])
+    assert db.mirror_reconcile("cpf", ["52998224725", "11144477735", "11144477735"]) == (1, 0)
@@ -0,0 +1,179 @@
+"""EventSink: lotes que falham ficam pendentes, com backoff e backpressure."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pytest
+
+import event_sink
+from event_sink import Event, EventSink
+
+
+class _Writer:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.calls = 0
+        self.written: List[str] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, batch: Sequence[Event]) -> None:
+        with self.lock:
+            self.calls += 1
+            if self.failures != 0:
+                self.failures -= 1
+                raise ConnectionError("destino fora do ar")
+            self.written.extend(e.message for e in batch)
+
+
+class _Logger:
+    def __init__(self) -> None:
+        self.records: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    def log(self, level: str, message: str, **fields: Any) -> None:
+        self.records.append((level, message, fields))
+
+
+@pytest.fixture
+def logger(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> _Logger:
+    monkeypatch.setenv("CCR_LOGS_DIR", str(tmp_path))  # dead-letter fora do runtime real
+    fake = _Logger()
+    monkeypatch.setattr(event_sink, "get_job_logger", lambda: fake)
+    monkeypatch.setattr(event_sink, "_RETRY_BASE_S", 0.01)
+    return fake
+
+
+def _sink(writer: _Writer, max_queue: int = 100) -> EventSink:
+    sink = EventSink(writer, max_batch=4, flush_interval_s=0.01, max_queue=max_queue, name="teste")
+    sink.retry_max_s = 0.05
+    return sink
+
+
+def _wait(cond: Any, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_failed_batches_are_retried_in_order(logger: _Logger) -> None:
+    writer = _Writer(failures=3)
+    sink = _sink(writer)
+    for i in range(10):
+        sink.emit("R", "INFO", f"e{i}")
+
+    assert _wait(lambda: len(writer.written) == 10)
+    sink.close()
+    st = sink.stats()
+    assert writer.written == [f"e{i}" for i in range(10)]
+    assert st["failures"] == 3 and st["dropped"] == 0 and st["pending"] == 0
+    assert [lvl for lvl, _, _ in logger.records] == ["WARNING", "INFO"]  # uma vez por sequência de falhas
+
+
+def test_urgent_emit_returns_while_destination_is_down(logger: _Logger) -> None:
+    writer = _Writer(failures=-1)
+    sink = _sink(writer)
+    sink.emit("R", "ERROR", "falhou")  # não pode travar o worker
+    assert not sink.flush(timeout=2)
+    assert sink.stats()["pending"] == 1
+    writer.failures = 0
+    assert _wait(lambda: writer.written == ["falhou"])
+    sink.close()
+
+
+def test_pending_is_bounded_by_backpressure(logger: _Logger) -> None:
+    writer = _Writer(failures=-1)
+    sink = _sink(writer, max_queue=8)
+    done = threading.Event()
+
+    def _produce() -> None:
+        for i in range(40):
+            sink.emit("R", "INFO", f"e{i}")
+        done.set()
+
+    threading.Thread(target=_produce, daemon=True).start()
+    assert not done.wait(0.5)  # pendentes + fila no limite: emit() bloqueia
+    assert sink.stats()["backpressure_waits"] >= 1
+
+    writer.failures = 0
+    assert done.wait(5)
+    assert _wait(lambda: len(writer.written) == 40)
+    sink.close()
+    assert writer.written == [f"e{i}" for i in range(40)] and sink.stats()["dropped"] == 0
+
+
+def test_close_drops_and_logs_what_could_not_be_written(logger: _Logger) -> None:
+    writer = _Writer(failures=-1)
+    sink = _sink(writer)
+    for i in range(3):
+        sink.emit("R", "INFO", f"e{i}")
+    sink.close()
+
+    assert sink.stats()["dropped"] == 3
+    dropped = [(msg, fields["request_id"]) for _, msg, fields in logger.records if fields.get("dropped_event")]
+    assert dropped == [("e0", "R"), ("e1", "R"), ("e2", "R")]
+
+
+def test_flush_after_close_returns(logger: _Logger) -> None:
+    writer = _Writer()
+    sink = _sink(writer)
+    sink.emit("R", "INFO", "antes")
+    sink.close()
+    assert sink.flush()  # sem timeout: não pode ficar esperando a thread que já saiu
+    sink.emit("R", "INFO", "depois")
+    assert writer.written == ["antes", "depois"]
+
+
+def _dead_letters(sink: EventSink) -> List[str]:
+    lines = sink.dead_letter_path.read_text(encoding="utf-8").splitlines()
+    return [json.loads(line)["message"] for line in lines]
+
+
+def test_permanent_error_isolates_bad_event(logger: _Logger) -> None:
+    written: List[str] = []
+
+    def _writer(batch: Sequence[Event]) -> None:
+        if any(e.message == "ruim" for e in batch):
+            raise ValueError("meta não serializa")
+        written.extend(e.message for e in batch)
+
+    sink = _sink(_writer)  # type: ignore[arg-type]
+    for msg in ["e0", "e1", "ruim", "e3", "e4", "e5"]:
+        sink.emit("R", "INFO", msg)
+    assert sink.flush(timeout=5)
+    sink.close()
+
+    assert sorted(written) == ["e0", "e1", "e3", "e4", "e5"]
+    assert sink.stats()["dead_letter"] == 1 and sink.stats()["pending"] == 0
+    assert _dead_letters(sink) == ["ruim"]
+
+
+def test_transient_error_goes_to_dead_letter_after_max_attempts(logger: _Logger) -> None:
+    writer = _Writer(failures=-1)
+    sink = _sink(writer)
+    sink.max_attempts = 3
+    sink.emit("R", "INFO", "e0")
+    assert _wait(lambda: sink.stats()["dead_letter"] == 1)
+    assert writer.calls == 3
+    writer.failures = 0
+    sink.emit("R", "INFO", "e1")  # os seguintes não ficam presos atrás do lote perdido
+    assert sink.flush(timeout=5)
+    sink.close()
+    assert writer.written == ["e1"] and _dead_letters(sink) == ["e0"]
+
+
+@pytest.mark.parametrize("exc, transient", [
+    (sqlite3.OperationalError("database is locked"), True),
+    (sqlite3.IntegrityError("FOREIGN KEY constraint failed"), False),
+    (TimeoutError(), True),
+    (TypeError("Object of type set is not JSON serializable"), False),
+    (RuntimeError("Insert events (lote) falhou"), False),
+])
+def test_is_transient(exc: Exception, transient: bool) -> None:
+    assert event_sink.is_transient(exc) is transient
@@ -0,0 +1,97 @@
+"""EventTail: janela de sobreposição e deduplicação por id."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+import db
+import event_tail
+from event_tail import EventTail
+
+
+class _FakeEvents:
+    """Tabela de eventos em que cada id só fica visível quando "commita"."""
+
+    def __init__(self) -> None:
+        self.visible: Dict[int, Dict[str, Any]] = {}
+
+    def commit(self, *ids: int) -> None:
+        for i in ids:
+            self.visible[i] = {"id": i, "message": f"evento {i}"}
+
+    def fetch(self, request_id: str, after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        ids = sorted(self.visible)
+        if after_id is None:
+            return [self.visible[i] for i in ids[-limit:]]
+        return [self.visible[i] for i in ids if i > after_id][:limit]
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    now = [1000.0]
+    monkeypatch.setattr(event_tail.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _ids(rows: List[Dict[str, Any]]) -> List[int]:
+    return [int(r["id"]) for r in rows]
+
+
+def test_late_commit_inside_overlap_is_picked_up(clock: List[float]) -> None:
+    events = _FakeEvents()
+    events.commit(1, 2)
+    tail = EventTail("R", events.fetch, page_size=2, overlap_s=10)
+    assert _ids(tail.poll()) == [1, 2]
+
+    events.commit(4)          # o 3 pegou o id antes, mas commita depois
+    clock[0] += 2
+    assert _ids(tail.poll()) == [4]
+    events.commit(3, 5)
+    clock[0] += 2
+    assert _ids(tail.poll()) == [3, 5]
+
+    assert _ids(tail.newest_first()) == [5, 4, 3, 2, 1]
+    assert tail.stats["late"] == 1 and tail.stats["duplicates"] > 0
+
+
+def test_cursor_advances_after_overlap(clock: List[float]) -> None:
+    events = _FakeEvents()
+    events.commit(*range(1, 11))
+    calls: List[Optional[int]] = []
+
+    def fetch(request_id: str, after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        calls.append(after_id)
+        return events.fetch(request_id, after_id, limit)
+
+    tail = EventTail("R", fetch, overlap_s=5)
+    tail.poll()
+    clock[0] += 1
+    tail.poll()
+    clock[0] += 5
+    events.commit(11)
+    assert _ids(tail.poll()) == [11]
+    # Dentro da janela relê o buffer; depois parte do last_id de um poll de >= 5 s atrás
+    assert calls == [None, 0, 10]
+
+
+def test_buffer_keeps_maxlen_without_duplicates(clock: List[float]) -> None:
+    events = _FakeEvents()
+    events.commit(*range(1, 31))
+    tail = EventTail("R", events.fetch, maxlen=10, page_size=4, overlap_s=0)
+    assert _ids(tail.poll()) == list(range(21, 31))
+    events.commit(*range(31, 41))
+    clock[0] += 1
+    assert _ids(tail.poll()) == list(range(31, 41))
+    assert _ids(tail.newest_first()) == list(range(40, 30, -1))
+    assert len(tail._seen) == 10
+
+
+def test_local_backend(runtime: Path, request_row: Any) -> None:
+    db.portal_submit_request(request_row("REQ-A"), None)
+    tail = event_tail.get_event_tail({}, "REQ-A")
+    assert len(tail.poll()) == 1  # evento de criação
+    db.insert_event("REQ-A", "INFO", "job reclamado")
+    assert [r["message"] for r in tail.poll()] == ["job reclamado"]
+    assert tail.poll() == []
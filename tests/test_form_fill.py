@@ -0,0 +1,177 @@
+"""form_fill e worker_pool contra fixtures/motorista_criar.html.
+
+O plano (resolução do payload em ops) roda sempre; o preenchimento no browser e o pool
+completo precisam do Playwright com o Chromium instalado e são pulados sem eles.
+"""
+from __future__ import annotations
+
+import asyncio
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+import config
+from form_fill import DRIVER_FORM, FormFillError
+
+FIXTURE = Path(__file__).resolve().parent.parent / "fixtures" / "motorista_criar.html"
+
+PAYLOAD: Dict[str, Any] = {
+    "dados_pessoais": {
+        "nome": "Maria da Silva", "genero": "Feminino", "data_nascimento": "01/02/1990",
+        "cpf": "52998224725", "rg": "123456789", "data_emissao": "10/10/2010", "orgao_exp": "SSP",
+        "nome_pai": "José da Silva", "nome_mae": "Ana da Silva",
+        "funcao": "Motorista", "perfil": "Agregado",
+    },
+    "centro_custos": {"empresa_centro_custo": "FEDEX", "responsavel_faturamento": "FEDEX BRASIL"},
+    "endereco": {
+        "cep": "01001000", "uf": "SP", "cidade": "São Paulo", "bairro": "Sé",
+        "logradouro": "Praça da Sé", "numero": "100", "complemento": "Sala 1",
+    },
+    "contato": {
+        "telefone": "1133334444", "celular": "11999998888", "telefone_comercial": "1144445555",
+        "email": "maria@example.com",
+    },
+    "habilitacao": {
+        "numero_registro": "01234567890", "cnh_no": "987654321", "categoria": "B",
+        "validade": "01/01/2030", "uf_cnh": "SP",
+    },
+}
+
+
+class _FormFields(HTMLParser):
+    """name= de cada campo e, nos selects, {value: rótulo} das opções."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fields: Dict[str, Optional[Dict[str, str]]] = {}
+        self._select: Optional[str] = None
+        self._option: Optional[str] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        a = dict(attrs)
+        if tag == "input" and a.get("name"):
+            self.fields[a["name"] or ""] = None
+        elif tag == "select":
+            self._select = a.get("name") or ""
+            self.fields[self._select] = {}
+        elif tag == "option" and self._select is not None:
+            self._option = a.get("value") or ""
+
+    def handle_data(self, data: str) -> None:
+        if self._select is not None and self._option is not None and data.strip():
+            options = self.fields[self._select]
+            assert options is not None
+            options[self._option] = data.strip()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "option":
+            self._option = None
+        elif tag == "select":
+            self._select = None
+
+
+def _fixture_fields() -> Dict[str, Optional[Dict[str, str]]]:
+    parser = _FormFields()
+    parser.feed(FIXTURE.read_text(encoding="utf-8"))
+    return parser.fields
+
+
+def _name(selector: str) -> str:
+    return selector.split('"')[1]  # '[name="X"]' -> 'X'
+
+
+def test_plan_covers_every_fixture_field() -> None:
+    fields = _fixture_fields()
+    batch, single = DRIVER_FORM.plan(PAYLOAD)
+    ops = [tuple(op) for op in batch] + list(single)
+
+    assert {_name(sel) for sel, _, _ in ops} == set(fields)
+    assert [sel for sel, _, _ in single] == sorted(config.DRIVER_FORM_NEEDS_EVENTS)
+    for selector, kind, value in ops:
+        options = fields[_name(selector)]
+        if kind == "text":
+            assert options is None, selector
+        elif kind == "value":
+            assert options is not None and value in options, (selector, value)
+        else:
+            assert options is not None and value in options.values(), (selector, value)
+
+
+def test_plan_rejects_value_without_translation() -> None:
+    payload = {**PAYLOAD, "dados_pessoais": {**PAYLOAD["dados_pessoais"], "genero": "Desconhecido"}}
+    with pytest.raises(FormFillError):
+        DRIVER_FORM.plan(payload)
+
+
+# -------------------- com browser --------------------
+
+def _require_chromium() -> Any:
+    async_api = pytest.importorskip("playwright.async_api")
+
+    async def _probe() -> Optional[str]:
+        async with async_api.async_playwright() as pw:
+            try:
+                browser = await pw.chromium.launch()
+            except Exception as e:  # Chromium não instalado (playwright install chromium)
+                return str(e)
+            await browser.close()
+        return None
+
+    err = asyncio.run(_probe())
+    if err:
+        pytest.skip(f"Chromium indisponível: {err.splitlines()[0]}")
+    return async_api
+
+
+def test_fill_submits_fixture(runtime: Path) -> None:
+    async_api = _require_chromium()
+    from option_catalog import OptionCatalog
+
+    async def _run(catalog: Optional[OptionCatalog]) -> Tuple[bool, List[str]]:
+        async with async_api.async_playwright() as pw:
+            browser = await pw.chromium.launch()
+            try:
+                page = await browser.new_page()
+                await page.goto(FIXTURE.as_uri())
+                await DRIVER_FORM.fill(page, PAYLOAD, catalog)
+                await page.locator(config.DRIVER_FORM_SUBMIT).first.click()
+                errors = await page.locator(config.DRIVER_FORM_ERRORS).all_inner_texts()
+                return await page.locator("#resultado").is_visible(), errors
+            finally:
+                await browser.close()
+
+    assert asyncio.run(_run(None)) == (True, [])
+    assert asyncio.run(_run(OptionCatalog("test-fixture"))) == (True, [])
+
+
+def test_pool_completes_job_against_fixture(runtime: Path) -> None:
+    _require_chromium()
+    import db
+    from worker_pool import DRIVER_CREATED, FIXTURE_DRIVER_CREATE, WorkerPool
+
+    meta = {
+        "request_id": "TESTPOOL0001",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "request_type": "CADASTRO",
+        "role": "Motorista",
+        "has_vehicle": False,
+        "nome": PAYLOAD["dados_pessoais"]["nome"],
+        "cpf": PAYLOAD["dados_pessoais"]["cpf"],
+        "status_overall": "Aguardando",
+        "status_brasil_risk": "Aguardando",
+        "status_rlog_cielo": "Aguardando",
+        "status_rlog_geral": "Aguardando",
+        "status_bringg": "Aguardando",
+    }
+    db.create_request(meta, PAYLOAD)
+    job_id = db.enqueue_job(meta["request_id"], "STEP1_DRIVER")
+
+    pool = WorkerPool(size=2, create_url=FIXTURE_DRIVER_CREATE.as_uri(), poll_s=0.1)
+    stats = asyncio.run(pool.run(once=True))
+
+    assert stats["done"] == 1 and stats["failed"] == 0
+    job = db.get_job(job_id)
+    assert job is not None and job["status"] == "DONE"
+    assert db.get_request(meta["request_id"])["status_brasil_risk"] == DRIVER_CREATED  # type: ignore[index]
@@ -0,0 +1,78 @@
+"""Request IDs: dígito verificador, formato do protocolo e aleatoriedade."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+
+import ids
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def _samples() -> List[str]:
+    out = [ids.new_request_id() for _ in range(20)]
+    body = "0Z0Z0Z0ABCDEFG"  # força o par 0/Z, o único que Luhn mod 32 não distingue
+    return out + [body + ids.check_char(body)]
+
+
+def test_new_ids_are_valid_and_distinct() -> None:
+    batch = [ids.new_request_id() for _ in range(2000)]
+    assert len(set(batch)) == len(batch)
+    assert all(len(rid) == ids.ID_LENGTH and ids.is_valid_request_id(rid) for rid in batch)
+
+
+def test_ids_in_same_second_are_not_neighbours() -> None:
+    # Dentro do mesmo segundo, a parte aleatória não pode ser sequencial
+    batch = [ids.new_request_id() for _ in range(50)]
+    rand = sorted(ids._decode(rid[ids._TIME_CHARS:-1]) for rid in batch)
+    assert min(b - a for a, b in zip(rand, rand[1:])) > 1
+
+
+def test_every_single_substitution_is_rejected() -> None:
+    for rid in _samples():
+        for i, original in enumerate(rid):
+            for ch in ALPHABET:
+                if ch != original:
+                    typo = rid[:i] + ch + rid[i + 1:]
+                    assert not ids.is_valid_request_id(typo), (rid, typo)
+
+
+def test_adjacent_transpositions_are_rejected() -> None:
+    for rid in _samples():
+        for i in range(len(rid) - 1):
+            a, b = rid[i], rid[i + 1]
+            if a == b or {a, b} == {"0", "Z"}:
+                continue
+            swapped = rid[:i] + b + a + rid[i + 2:]
+            assert not ids.is_valid_request_id(swapped), (rid, swapped)
+
+
+def test_protocol_round_trip_and_typos() -> None:
+    rid = ids.new_request_id()
+    shown = ids.format_protocol(rid)
+    assert shown.replace("-", "") == rid
+    assert ids.parse_protocol(f" {shown.lower()} ") == rid
+
+    body = "01ABCDE10101XY"
+    rid = body + ids.check_char(body)
+    assert ids.parse_protocol("01abcde-1O1OlXY" + rid[-1]) == rid  # O -> 0, l -> 1
+
+    with pytest.raises(ValueError):
+        ids.parse_protocol(rid[:-1] + ("0" if rid[-1] != "0" else "1"))
+
+
+def test_legacy_ids_still_accepted() -> None:
+    assert ids.parse_protocol("a1b2c3d4") == "A1B2C3D4"
+    assert ids.format_protocol("A1B2C3D4") == "A1B2C3D4"
+    short = "01ABCDE123456"
+    short += ids.check_char(short)  # 14 caracteres: nunca foi emitido
+    with pytest.raises(ValueError):
+        ids.parse_protocol(short)
+
+
+def test_created_at_is_embedded() -> None:
+    before = datetime.now(timezone.utc).replace(microsecond=0)
+    rid = ids.new_request_id()
+    assert before <= ids.request_id_created_at(rid) <= before + timedelta(seconds=2)
@@ -0,0 +1,93 @@
+"""Importação em lote: chaves de idempotência por CPF/função/dia, escopadas pelo parceiro."""
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Any, Dict, List
+
+import db
+import importer
+
+ROW: Dict[str, str] = {
+    "nome": "Maria da Silva", "genero": "Feminino", "data_nascimento": "01/02/1990",
+    "cpf": "529.982.247-25", "rg": "123456789", "data_emissao": "10/10/2010", "orgao_exp": "SSP",
+    "nome_mae": "Ana da Silva", "funcao": "Motorista",
+    "cep": "01001-000", "uf": "SP", "cidade": "São Paulo", "bairro": "Sé",
+    "logradouro": "Praça da Sé", "numero": "100", "celular": "(11) 99999-8888",
+    "cnh_registro": "01234567890", "cnh_numero": "987654321", "cnh_categoria": "B",
+    "cnh_validade": "01/01/2030", "cnh_uf": "SP",
+    "base_estado": "São Paulo", "base_nome": "SAO PAULO - SP", "base_uf": "SP",
+    "sigla_base_cielo": "SPO", "sigla_base_geral": "SPO", "modalidade": "Agregado",
+}
+
+
+def _write_csv(path: Path, rows: List[Dict[str, str]]) -> Path:
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]), delimiter=";")
+        w.writeheader()
+        w.writerows(rows)
+    return path
+
+
+def _count_requests() -> int:
+    return int(db.get_connection().execute("SELECT COUNT(*) FROM requests").fetchone()[0])
+
+
+def _import(path: Path, **kwargs: Any) -> importer.ImportReport:
+    return importer.import_file(path, submit=db.portal_submit_requests, partner="Parceiro X", day="2026-06-01", **kwargs)
+
+
+def test_reimporting_same_file_does_not_duplicate(runtime: Path) -> None:
+    path = _write_csv(runtime / "lote.csv", [ROW, {**ROW, "cpf": "111.444.777-35"}])
+
+    first = _import(path)
+    again = _import(path)
+
+    assert (first.submitted, first.duplicates) == (2, 0)
+    assert (again.submitted, again.duplicates) == (2, 2)
+    assert _count_requests() == 2
+
+
+def test_corrected_file_only_adds_new_rows(runtime: Path) -> None:
+    _import(_write_csv(runtime / "lote.csv", [ROW, {**ROW, "cpf": "111.444.777-35"}]))
+    # Planilha corrigida: outro arquivo (hash diferente), linhas reordenadas, uma linha nova
+    corrected = _import(_write_csv(runtime / "lote_corrigido.csv", [
+        {**ROW, "cpf": "390.533.447-05"},
+        {**ROW, "cpf": "111.444.777-35", "numero": "200"},
+        ROW,
+    ]))
+    assert (corrected.submitted, corrected.duplicates) == (3, 2)
+    assert _count_requests() == 3
+
+
+def test_other_day_or_partner_is_a_new_request(runtime: Path) -> None:
+    path = _write_csv(runtime / "lote.csv", [ROW])
+    _import(path)
+
+    later = importer.import_file(path, submit=db.portal_submit_requests, partner="Parceiro X", day="2026-12-01")
+    other = importer.import_file(path, submit=db.portal_submit_requests, partner="Parceiro Y", day="2026-06-01")
+    assert (later.duplicates, other.duplicates) == (0, 0)
+    assert _count_requests() == 3
+
+
+def test_partner_defaults_to_requester_org(runtime: Path) -> None:
+    row = {**ROW, "requester_org": "Parceiro X"}
+    _import(_write_csv(runtime / "a.csv", [row]))
+    again = importer.import_file(_write_csv(runtime / "b.csv", [row]), submit=db.portal_submit_requests, day="2026-06-01")
+    assert again.duplicates == 1
+
+
+def test_force_resubmits_imported_file(runtime: Path) -> None:
+    path = _write_csv(runtime / "lote.csv", [ROW])
+    _import(path)
+
+    forced = _import(path, force=True)
+    assert (forced.submitted, forced.duplicates) == (1, 0)
+    assert _count_requests() == 2
+
+
+def test_invalid_document_is_reported(runtime: Path) -> None:
+    path = _write_csv(runtime / "lote.csv", [ROW, {**ROW, "cpf": "529.982.247-24"}])
+    report = _import(path)
+    assert (report.valid, report.invalid) == (1, 1)
+    assert report.errors[0].line == 3
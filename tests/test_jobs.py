@@ -0,0 +1,92 @@
+"""Fila de jobs no SQLite: claim atômico entre conexões e leases vencidos."""
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import db
+
+RowFactory = Callable[..., Dict[str, Any]]
+
+
+def _enqueue(request_row: RowFactory, n: int) -> List[int]:
+    ids = []
+    for i in range(n):
+        rid = f"REQ-{i:04d}"
+        db.portal_submit_request(request_row(rid), None)
+        ids.append(db.enqueue_job(rid, "STEP1_DRIVER"))
+    return ids
+
+
+def test_enqueue_is_idempotent_while_active(runtime: Path, request_row: RowFactory) -> None:
+    job_id = _enqueue(request_row, 1)[0]
+    assert db.enqueue_job("REQ-0000", "STEP1_DRIVER") == job_id
+
+
+def test_two_connections_never_claim_same_job(runtime: Path, request_row: RowFactory) -> None:
+    job_ids = _enqueue(request_row, 40)
+    claimed: Dict[str, List[int]] = {"w1": [], "w2": []}
+    start = threading.Barrier(2)
+
+    def _drain(worker: str) -> None:
+        # Cada thread usa a própria conexão (db.get_connection é por thread)
+        start.wait()
+        try:
+            while True:
+                job = db.claim_job(worker, ("STEP1_DRIVER",))
+                if job is None:
+                    return
+                assert job["lease_owner"] == worker and job["status"] == "RUNNING"
+                claimed[worker].append(job["id"])
+        finally:
+            db.close_connection()
+
+    threads = [threading.Thread(target=_drain, args=(w,)) for w in claimed]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    together = claimed["w1"] + claimed["w2"]
+    assert sorted(together) == job_ids  # todos reclamados, nenhum duas vezes
+
+
+def test_expired_lease_is_requeued(runtime: Path, request_row: RowFactory) -> None:
+    job_id = _enqueue(request_row, 1)[0]
+    first = db.claim_job("w1", lease_s=-1)  # lease já vencido: o worker "morreu"
+    assert first is not None and first["id"] == job_id
+
+    second = db.claim_job("w2", lease_s=60)
+    assert second is not None and second["id"] == job_id
+    assert second["lease_owner"] == "w2" and second["attempts"] == 2
+
+    # O worker antigo perdeu o job: não renova nem conclui
+    assert not db.heartbeat_job(job_id, "w1")
+    assert not db.complete_job(job_id, "w1")
+    assert db.complete_job(job_id, "w2")
+    job = db.get_job(job_id)
+    assert job is not None and job["status"] == "DONE"
+
+
+def test_expired_lease_without_attempts_left_fails(runtime: Path, request_row: RowFactory) -> None:
+    db.portal_submit_request(request_row("REQ-X"), None)
+    job_id = db.enqueue_job("REQ-X", "STEP1_DRIVER", max_attempts=1)
+    assert db.claim_job("w1", lease_s=-1) is not None
+
+    assert db.claim_job("w2") is None
+    job = db.get_job(job_id)
+    assert job is not None and job["status"] == "FAILED"
+
+
+def test_fail_job_backs_off_then_dead_letters(runtime: Path, request_row: RowFactory) -> None:
+    db.portal_submit_request(request_row("REQ-X"), None)
+    job_id = db.enqueue_job("REQ-X", "STEP1_DRIVER", max_attempts=2)
+
+    assert db.claim_job("w1") is not None
+    assert db.fail_job(job_id, "w1", "erro 1") == "QUEUED"
+    assert db.claim_job("w1") is None  # ainda no backoff
+
+    db.get_connection().execute("UPDATE jobs SET available_at = '2000-01-01T00:00:00+00:00' WHERE id = ?", (job_id,))
+    assert db.claim_job("w1") is not None
+    assert db.fail_job(job_id, "w1", "erro 2") == "FAILED"
@@ -0,0 +1,39 @@
+"""search_requests: FTS e busca pelo protocolo como exibido ao courier."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import db
+from ids import format_protocol, new_request_id
+
+RowFactory = Callable[..., Dict[str, Any]]
+
+
+def test_search_by_displayed_protocol(runtime: Path, request_row: RowFactory) -> None:
+    rid = new_request_id()
+    db.portal_submit_request(request_row(rid), None)
+    db.portal_submit_request(request_row(new_request_id(), cpf="11144477735", nome="João Souza"), None)
+
+    for query in (rid, format_protocol(rid), format_protocol(rid).lower(), f" {rid[:7]} {rid[7:]} "):
+        assert [r["request_id"] for r in db.search_requests(query)] == [rid], query
+
+
+def test_search_by_name_ignores_accents(runtime: Path, request_row: RowFactory) -> None:
+    rid = new_request_id()
+    db.portal_submit_request(request_row(rid, nome="Maria Conceição"), None)
+    assert [r["request_id"] for r in db.search_requests("conceicao")] == [rid]
+
+
+def test_index_follows_request_id_through_updates_and_vacuum(runtime: Path, request_row: RowFactory) -> None:
+    rids = [new_request_id() for _ in range(3)]
+    for i, rid in enumerate(rids):
+        db.portal_submit_request(request_row(rid, nome=f"Courier{i} Silva"), None)
+    db.get_connection().execute("DELETE FROM requests WHERE request_id = ?", (rids[0],))
+    db.update_request_fields(rids[1], {"nome": "Renomeado Souza"})
+    db.get_connection().execute("VACUUM")  # pode renumerar o rowid implícito de requests
+
+    assert db.search_requests("Courier0") == []
+    assert db.search_requests("Courier1") == []
+    assert [r["request_id"] for r in db.search_requests("renomeado")] == [rids[1]]
+    assert [r["request_id"] for r in db.search_requests("Courier2")] == [rids[2]]
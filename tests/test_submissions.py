@@ -0,0 +1,84 @@
+"""Envio idempotente do portal pelo stand-in local (db.portal_submit_requests)."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+
+import db
+from submissions import SubmitItem, content_idempotency_key, new_idempotency_key
+
+RowFactory = Callable[..., Dict[str, Any]]
+
+
+def _count(table: str) -> int:
+    return int(db.get_connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+
+def test_same_key_returns_original_request_id(runtime: Path, request_row: RowFactory) -> None:
+    key = new_idempotency_key()
+    first = db.portal_submit_requests([SubmitItem(request_row("REQ-A"), None, key)])[0]
+    # Retry do mesmo rascunho: o portal gera outro request_id, mas a chave é a mesma
+    again = db.portal_submit_requests([SubmitItem(request_row("REQ-B"), None, key)])[0]
+
+    assert first.ok and not first.duplicate and first.request_id == "REQ-A"
+    assert again.ok and again.duplicate and again.request_id == "REQ-A"
+    assert db.get_request("REQ-B") is None
+    assert _count("requests") == 1
+
+
+def test_portal_submit_request_is_idempotent(runtime: Path, request_row: RowFactory) -> None:
+    key = new_idempotency_key()
+    veh = {"request_id": "REQ-A", "placa": "ABC1D23"}
+    assert db.portal_submit_request(request_row("REQ-A", has_vehicle=True), veh, idempotency_key=key) == "REQ-A"
+    assert db.portal_submit_request(request_row("REQ-B", has_vehicle=True), veh, idempotency_key=key) == "REQ-A"
+    assert _count("requests") == 1 and _count("vehicles") == 1
+
+
+def test_distinct_keys_create_distinct_requests(runtime: Path, request_row: RowFactory) -> None:
+    results = db.portal_submit_requests([
+        SubmitItem(request_row("REQ-A"), None, new_idempotency_key()),
+        SubmitItem(request_row("REQ-B"), None, new_idempotency_key()),
+    ])
+    assert [(r.ok, r.request_id, r.duplicate) for r in results] == [(True, "REQ-A", False), (True, "REQ-B", False)]
+
+
+def test_bad_item_does_not_abort_batch(runtime: Path, request_row: RowFactory) -> None:
+    bad = request_row("REQ-BAD")
+    del bad["cpf"]
+    results = db.portal_submit_requests([
+        SubmitItem(request_row("REQ-A"), None, "k1"),
+        SubmitItem(bad, None, "k2"),
+        SubmitItem(request_row("REQ-A"), None, "k3"),  # request_id repetido com outra chave
+        SubmitItem(request_row("REQ-C"), None, "k4"),
+    ])
+    assert [r.ok for r in results] == [True, False, False, True]
+    assert results[1].error and results[2].error
+    assert _count("requests") == 2 and _count("idempotency_keys") == 2
+
+    # Chaves de itens recusados não ficam gravadas: o reenvio corrigido passa
+    retry = db.portal_submit_requests([SubmitItem(request_row("REQ-BAD"), None, "k2")])[0]
+    assert retry.ok and not retry.duplicate and retry.request_id == "REQ-BAD"
+
+
+def test_content_key_ignores_volatile_fields(request_row: RowFactory) -> None:
+    a = request_row("REQ-A", created_at="2026-01-01T00:00:00+00:00")
+    b = request_row("REQ-B", created_at="2026-02-01T00:00:00+00:00")
+    assert content_idempotency_key("lote-1", a, None) == content_idempotency_key("lote-1", b, None)
+    assert content_idempotency_key("lote-1", a, None) != content_idempotency_key("lote-2", a, None)
+    other = request_row("REQ-A", cpf="11144477735")
+    assert content_idempotency_key("lote-1", a, None) != content_idempotency_key("lote-1", other, None)
+    with pytest.raises(ValueError):
+        content_idempotency_key("", a, None)
+
+
+def test_items_without_key_are_rejected(runtime: Path, request_row: RowFactory) -> None:
+    with pytest.raises(ValueError):
+        db.portal_submit_requests([(request_row("REQ-A"), None)])
+    with pytest.raises(ValueError):
+        db.portal_submit_requests([SubmitItem(request_row("REQ-A"), None, "")])
+    assert _count("requests") == 0
+
+    res = db.portal_submit_requests([(request_row("REQ-A"), None, "k1")])[0]
+    assert res.ok and res.request_id == "REQ-A"
@@ -0,0 +1,69 @@
+"""worker_pool sem browser: conclusão pelo espelho, lease perdido e falha do log em disco."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import db
+from worker_pool import WorkerPool
+
+RowFactory = Callable[..., Dict[str, Any]]
+
+
+class _Mirror:
+    """Espelho com todo CPF/placa já cadastrado."""
+
+    def has_cpf(self, cpf: str) -> bool:
+        return True
+
+    def has_plate(self, plate: str) -> bool:
+        return True
+
+
+def _claim(pool: WorkerPool, request_row: RowFactory, lease_s: float = 60) -> Dict[str, Any]:
+    db.portal_submit_request(request_row("REQ-0001"), None)
+    db.enqueue_job("REQ-0001", "STEP1_DRIVER")
+    job = db.claim_job(pool.owner, ("STEP1_DRIVER",), lease_s)
+    assert job is not None
+    return job
+
+
+def test_mirror_hit_completes_and_sets_status(runtime: Path, request_row: RowFactory) -> None:
+    pool = WorkerPool(mirror=_Mirror())  # type: ignore[arg-type]
+    job = _claim(pool, request_row)
+    asyncio.run(pool._run_job(job))
+
+    assert pool.stats["already_registered"] == 1 and pool.stats["lease_lost"] == 0
+    assert db.get_job(job["id"])["status"] == "DONE"  # type: ignore[index]
+    assert db.get_request("REQ-0001")["status_brasil_risk"] == "Motorista já cadastrado"  # type: ignore[index]
+
+
+def test_lost_lease_skips_success_path(runtime: Path, request_row: RowFactory) -> None:
+    pool = WorkerPool(mirror=_Mirror())  # type: ignore[arg-type]
+    job = _claim(pool, request_row, lease_s=-1)
+    assert db.claim_job("outro", ("STEP1_DRIVER",)) is not None  # outro worker tomou o job
+    asyncio.run(pool._run_job(job))
+
+    assert pool.stats["lease_lost"] == 1
+    after = db.get_job(job["id"])
+    assert after is not None and after["status"] == "RUNNING" and after["lease_owner"] == "outro"
+    assert db.get_request("REQ-0001")["status_brasil_risk"] == "Aguardando"  # type: ignore[index]
+
+
+def test_job_runs_when_log_start_fails(runtime: Path, request_row: RowFactory, monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = WorkerPool(mirror=_Mirror())  # type: ignore[arg-type]
+
+    def _broken(job_id: int) -> str:
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(pool.logs, "start_job", _broken)
+    job = _claim(pool, request_row)
+    asyncio.run(pool._run_job(job))
+
+    after = db.get_job(job["id"])
+    assert after is not None and after["status"] == "DONE" and not after["log"]
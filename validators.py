@@ -3,15 +3,24 @@ import re
 from datetime import datetime
 from typing import Optional
 
+from names import LOWER_PARTS, normalize_name  # noqa: F401 (reexportados)
+
 _RE_DIGITS = re.compile(r"\D+")
 _RE_MODAL_SIGLA = re.compile(r"\(([^)]+)\)")
 
-LOWER_PARTS = {"da", "das", "de", "do", "dos", "e"}
-
 
 def only_digits(value: str) -> str:
     return re.sub(_RE_DIGITS, "", value or "")
 
+def normalize_cpf(value: str) -> str:
+    return only_digits(value)
+
+def normalize_cep(value: str) -> str:
+    return only_digits(value)
+
+def normalize_phone(value: str) -> str:
+    return only_digits(value)
+
 def validate_exact_digits(label: str, value: str, n: int) -> str:
     d = only_digits(value)
     if len(d) != n:
@@ -33,20 +42,6 @@ def validate_phone(label: str, value: str) -> str:
         raise ValueError(f"{label} inválido. Informe DDD + número (10 ou 11 dígitos).")
     return d
 
-def normalize_name(name: str) -> str:
-    s = (name or "").strip()
-    if not s:
-        return s
-    parts = [p for p in re.split(r"\s+", s) if p]
-    out = []
-    for p in parts:
-        pl = p.lower()
-        if pl in LOWER_PARTS:
-            out.append(pl)
-        else:
-            out.append(pl[:1].upper() + pl[1:])
-    return " ".join(out)
-
 def make_nome_padrao(sigla_base_cielo: str, nome: str, modalidade: str) -> str:
     sigla = (sigla_base_cielo or "").strip().upper()
     n = (nome or "").strip().upper()
@@ -0,0 +1,336 @@
+"""
+Pool de workers Playwright para a Etapa 1 (Motorista/Criar) do Brasil Risk.
+
+Um único browser com N contextos isolados (um novo por job), todos partindo da mesma sessão
+autenticada mantida por br_session.SessionManager. Um scheduler
+asyncio reclama jobs da fila (db.claim_job) só quando há worker livre, e cada worker
+renova o lease do seu job enquanto preenche o formulário.
+
+Antes de abrir o browser para um job, o CPF (Etapa 1) ou a placa (Etapa 2) é conferido
+no espelho local do Brasil Risk (br_mirror): se já estiver cadastrado, o job é concluído
+direto (na Etapa 1 o status_brasil_risk é atualizado; na Etapa 2 fica só o evento).
+
+Se um job cair em OKTA/SAML/captcha, a sessão é renovada (pedindo login humano só se a
+renovação silenciosa falhar) e o job é tentado de novo uma vez; persistindo, vai para
+BLOCKED e aguarda o admin reenfileirar — nada é burlado.
+
+Uso:
+    python worker_pool.py --workers 4
+    python worker_pool.py --workers 4 --fixture --once   # contra fixtures/motorista_criar.html
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import os
+import socket
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from playwright.async_api import Browser, Page, async_playwright
+
+import config
+import db
+from event_sink import get_local_sink
+from br_mirror import BrMirror
+from br_session import SessionManager, SessionRefreshFailed, is_auth_url
+from form_fill import DRIVER_FORM
+from job_logs import get_job_logger
+from option_catalog import OptionCatalog
+
+FIXTURE_DRIVER_CREATE = Path(__file__).resolve().parent / "fixtures" / "motorista_criar.html"
+
+# status_brasil_risk depois que a Etapa 1 envia o formulário
+DRIVER_CREATED = "Motorista cadastrado"
+
+JobHandler = Callable[[Page, Dict[str, Any], Dict[str, Any], str], Awaitable[None]]
+
+
+class NeedsHumanAction(Exception):
+    """A navegação caiu em OKTA/SAML/captcha: precisa de alguém no browser."""
+
+
+async def fill_driver_form(
+    page: Page,
+    job: Dict[str, Any],
+    payload: Dict[str, Any],
+    create_url: str,
+    catalog: Optional[OptionCatalog] = None,
+) -> None:
+    """Handler padrão: preenche Motorista/Criar (lote único via form_fill) e envia."""
+    await page.goto(create_url)
+    if is_auth_url(page.url):
+        raise NeedsHumanAction(f"Redirecionado para login: {page.url}")
+
+    await DRIVER_FORM.fill(page, payload, catalog)
+
+    await page.locator(config.DRIVER_FORM_SUBMIT).first.click()
+    await page.wait_for_load_state()
+    if is_auth_url(page.url):
+        raise NeedsHumanAction(f"Sessão expirou durante o envio: {page.url}")
+    errors = [t.strip() for t in await page.locator(config.DRIVER_FORM_ERRORS).all_inner_texts() if t.strip()]
+    if errors:
+        raise RuntimeError("Brasil Risk recusou o formulário: " + " | ".join(errors))
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        size: int = 2,
+        handler: Optional[JobHandler] = None,
+        job_types: Sequence[str] = ("STEP1_DRIVER",),
+        create_url: str = config.DRIVER_CREATE_URL,
+        session: Optional[SessionManager] = None,
+        mirror: Optional[BrMirror] = None,
+        headless: bool = True,
+        poll_s: float = 2.0,
+        lease_s: float = 300,
+    ) -> None:
+        self.size = size
+        if handler is None:
+            # Catálogo de opções por tenant; a fixture tem values próprios
+            tenant = session.tenant if session is not None else "fixture"
+            handler = functools.partial(fill_driver_form, catalog=OptionCatalog(tenant))
+        self.handler = handler
+        self.job_types = tuple(job_types)
+        self.create_url = create_url
+        self.session = session
+        self.mirror = mirror
+        self.events = get_local_sink()
+        self.logs = get_job_logger()
+        self._pw: Any = None
+        self._browser: Optional[Browser] = None
+        self.headless = headless
+        self.poll_s = poll_s
+        self.lease_s = lease_s
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.stats: Dict[str, int] = {
+            "claimed": 0, "done": 0, "failed": 0, "blocked": 0, "already_registered": 0, "lease_lost": 0,
+        }
+
+    async def _schedule(self, jobs: "asyncio.Queue[Optional[Dict[str, Any]]]", idle: asyncio.Semaphore, once: bool) -> None:
+        """Reclama um job por worker livre; com once=True para quando a fila esvaziar."""
+        while True:
+            await idle.acquire()
+            job = await asyncio.to_thread(db.claim_job, self.owner, self.job_types, self.lease_s)
+            if job is None:
+                idle.release()
+                if once:
+                    break
+                await asyncio.sleep(self.poll_s)
+                continue
+            self.stats["claimed"] += 1
+            await jobs.put(job)
+        for _ in range(self.size):
+            await jobs.put(None)
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            if not await asyncio.to_thread(db.heartbeat_job, job_id, self.owner, self.lease_s):
+                raise RuntimeError(f"Lease do job {job_id} perdido.")
+
+    async def _storage_state(self) -> Optional[str]:
+        if self.session is None:
+            return None
+        return str(await self.session.ensure(self._pw, self._browser))
+
+    async def _attempt(self, job: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        """Roda o handler num contexto novo (sessão atual) enquanto renova o lease."""
+        assert self._browser is not None
+        context = await self._browser.new_context(storage_state=await self._storage_state())
+        try:
+            page = await context.new_page()
+            hb = asyncio.create_task(self._heartbeat(job["id"]))
+            work = asyncio.create_task(self.handler(page, job, payload, self.create_url))
+            try:
+                done, _ = await asyncio.wait({hb, work}, return_when=asyncio.FIRST_COMPLETED)
+                if hb in done:
+                    work.cancel()
+                    hb.result()  # propaga "lease perdido"
+                work.result()
+            finally:
+                hb.cancel()
+        finally:
+            await context.close()
+
+    async def _log(self, job: Dict[str, Any], level: str, message: str) -> None:
+        request_id = job["request_id"]
+        self.logs.log(level, message, job_id=job["id"], request_id=request_id, job_type=job["job_type"], worker=self.owner)
+        # Sempre fora do event loop: ERROR espera a gravação e, com a fila cheia (destino fora
+        # do ar), qualquer emit bloqueia — no loop, isso pararia os heartbeats de todos os jobs
+        await asyncio.to_thread(self.events.emit, request_id, level, message)
+
+    async def _refresh_mirror(self) -> None:
+        assert self.mirror is not None and self._browser is not None
+        context = await self._browser.new_context(storage_state=await self._storage_state())
+        try:
+            await self.mirror.refresh_due(context)
+        finally:
+            await context.close()
+
+    async def _safe_refresh_mirror(self) -> None:
+        try:
+            await self._refresh_mirror()
+        except Exception as e:  # espelho desatualizado não para a fila
+            self.logs.log("WARNING", f"atualização do espelho falhou: {e}", worker=self.owner)
+
+    async def _mirror_loop(self) -> None:
+        while True:
+            await asyncio.sleep(60)
+            await self._safe_refresh_mirror()
+
+    def _already_registered(self, job: Dict[str, Any], payload: Dict[str, Any], vehicle: Dict[str, Any]) -> Optional[str]:
+        if self.mirror is None:
+            return None
+        if job["job_type"] == "STEP1_DRIVER":
+            cpf = (payload.get("dados_pessoais") or {}).get("cpf") or ""
+            return "Motorista já cadastrado" if self.mirror.has_cpf(cpf) else None
+        if job["job_type"] == "STEP2_VEHICLE":
+            return "Veículo já cadastrado" if self.mirror.has_plate(vehicle.get("placa") or "") else None
+        return None
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id, rid = job["id"], job["request_id"]
+        try:
+            pointer: Optional[str] = await asyncio.to_thread(self.logs.start_job, job_id)
+        except Exception as e:  # log em disco indisponível: o job roda mesmo assim, sem ponteiro
+            pointer = None
+            self.logs.log("WARNING", f"start_job falhou: {e}", job_id=job_id, request_id=rid, worker=self.owner)
+        self.logs.log("INFO", "job reclamado", job_id=job_id, request_id=rid, attempt=job.get("attempts"), worker=self.owner)
+        try:
+            # Qualquer falha (inclusive ao ler o payload/gravar o ponteiro do log) vai para
+            # fail_job: não pode escapar do worker e derrubar o pool com o job em RUNNING
+            try:
+                if pointer is not None:
+                    await asyncio.to_thread(db.set_job_log, job_id, pointer)
+                await self._run_job_attempt(job)
+            except Exception as e:
+                await self._fail(job, e)
+        finally:
+            self.logs.finish_job(job_id)
+
+    async def _fail(self, job: Dict[str, Any], e: Exception) -> None:
+        self.stats["failed"] += 1
+        try:
+            status = await asyncio.to_thread(db.fail_job, job["id"], self.owner, str(e))
+        except Exception as fe:  # sem banco: o lease vence e o job volta para a fila
+            self.logs.log("ERROR", f"fail_job falhou: {fe}", job_id=job["id"], request_id=job["request_id"], worker=self.owner)
+            return
+        await self._log(job, "ERROR", f"{job['job_type']} falhou ({status}): {e}")
+
+    async def _run_job_attempt(self, job: Dict[str, Any]) -> None:
+        job_id, rid = job["id"], job["request_id"]
+        payload = await asyncio.to_thread(db.get_payload, rid)
+        vehicle = await asyncio.to_thread(db.get_vehicle_payload, rid) if job["job_type"] == "STEP2_VEHICLE" else {}
+        registered = self._already_registered(job, payload, vehicle)
+        if registered:
+            self.stats["already_registered"] += 1
+            if await self._complete(job, registered):
+                await self._log(job, "INFO", f"{job['job_type']}: {registered} no Brasil Risk; etapa pulada.")
+            return
+        try:
+            try:
+                await self._attempt(job, payload)
+            except NeedsHumanAction:
+                if self.session is None:
+                    raise
+                # Sessão caiu no meio do caminho: renova (só pede humano se a renovação
+                # silenciosa falhar) e tenta de novo uma vez
+                self.session.invalidate()
+                await self._attempt(job, payload)
+        except (NeedsHumanAction, SessionRefreshFailed) as e:
+            self.stats["blocked"] += 1
+            await asyncio.to_thread(db.block_job, job_id, self.owner, str(e))
+            await self._log(job, "WARN", f"{job['job_type']}: aguardando ação humana ({e}).")
+            return
+        if await self._complete(job, DRIVER_CREATED):
+            self.stats["done"] += 1
+            await self._log(job, "INFO", f"{job['job_type']} concluído.")
+
+    async def _complete(self, job: Dict[str, Any], status_brasil_risk: str) -> bool:
+        """Conclui o job e, na Etapa 1, grava o status do motorista. False se o lease foi
+        perdido: outro worker já reclamou o job e é ele quem conclui."""
+        if not await asyncio.to_thread(db.complete_job, job["id"], self.owner):
+            self.stats["lease_lost"] += 1
+            await self._log(job, "WARN", f"{job['job_type']}: lease perdido antes de concluir; resultado descartado.")
+            return False
+        # status_brasil_risk é o status do motorista (Etapa 1): a Etapa 2 fica só no evento,
+        # sem sobrescrever o que a Etapa 1 gravou
+        if job["job_type"] == "STEP1_DRIVER":
+            await asyncio.to_thread(db.update_request_fields, job["request_id"], {"status_brasil_risk": status_brasil_risk})
+        return True
+
+    async def _worker(self, jobs: "asyncio.Queue[Optional[Dict[str, Any]]]", idle: asyncio.Semaphore) -> None:
+        while True:
+            job = await jobs.get()
+            if job is None:
+                return
+            try:
+                await self._run_job(job)
+            finally:
+                idle.release()
+
+    async def run(self, once: bool = False) -> Dict[str, int]:
+        await asyncio.to_thread(db.init_db)
+        async with async_playwright() as pw:
+            self._pw = pw
+            mirror_task: Optional["asyncio.Task[None]"] = None
+            self._browser = await pw.chromium.launch(headless=self.headless)
+            try:
+                if self.session is not None:
+                    await self.session.ensure(pw, self._browser)  # login antes de reclamar jobs
+                if self.mirror is not None:
+                    await asyncio.to_thread(self.mirror.load)
+                    await self._safe_refresh_mirror()
+                    if not once:
+                        mirror_task = asyncio.create_task(self._mirror_loop())
+                jobs: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+                idle = asyncio.Semaphore(self.size)
+                await asyncio.gather(
+                    self._schedule(jobs, idle, once),
+                    *(self._worker(jobs, idle) for _ in range(self.size)),
+                )
+            finally:
+                if mirror_task is not None:
+                    mirror_task.cancel()
+                await self._browser.close()
+                self._browser = None
+                await asyncio.to_thread(self.events.flush)
+        return self.stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    if args.fixture:
+        pool = WorkerPool(size=args.workers, create_url=FIXTURE_DRIVER_CREATE.as_uri(), headless=not args.headed)
+    else:
+        session = SessionManager(tenant=args.tenant)
+        if args.login:
+            session.invalidate()
+        pool = WorkerPool(size=args.workers, session=session, mirror=BrMirror(), headless=not args.headed)
+    stats = await pool.run(once=args.once)
+    print(stats)
+    ev = pool.events.stats()
+    print(f"eventos: {ev['written']:.0f} gravados em {ev['batches']:.0f} lotes, flush médio {ev['flush_ms_avg']:.1f} ms")
+    if pool.session is not None:
+        m = pool.session.metrics()
+        print(
+            f"sessão: hit rate {m['hit_rate']:.0%}, {m['silent_refreshes']:.0f} renovações silenciosas, "
+            f"{m['human_refreshes']:.0f} logins humanos, {m['human_wait_s']:.0f}s aguardando humano"
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Pool de workers Playwright (Etapa 1).")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--once", action="store_true", help="para quando a fila esvaziar")
+    ap.add_argument("--fixture", action="store_true", help="usa fixtures/motorista_criar.html")
+    ap.add_argument("--login", action="store_true", help="refaz o login e salva nova sessão")
+    ap.add_argument("--tenant", default=None, help="tenant da sessão (padrão: CCR_BR_TENANT)")
+    ap.add_argument("--headed", action="store_true")
+    asyncio.run(_main(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()